@@ -1,16 +1,42 @@
 #!/usr/bin/env python3
 import sys
 from Constants import version, versiondate
+from util.StartupProfiler import DEFAULT_REPORT, start_profiling, finish_profiling, phase
+
+def _profile_startup_option():
+	'''
+	Removes --profile-startup [report-file] or --profile-startup=report-file from the arguments.
+	Returns the report file, or None.
+	'''
+	for i, arg in enumerate(sys.argv[1:], 1):
+		if arg.startswith("--profile-startup="):
+			del sys.argv[i]
+			return arg.partition("=")[2] or DEFAULT_REPORT
+		if arg == "--profile-startup":
+			del sys.argv[i]
+			if i < len(sys.argv) and not sys.argv[i].startswith("-"):
+				return sys.argv.pop(i)
+			return DEFAULT_REPORT
+	return None
 
 def main():
-	if len(sys.argv) >= 2:
-		from backend.CLI import cliMain
-		print("PyGAAP v" + version + " (CLI, " + versiondate + ")\nby David Berdik & Michael Fang\n")
-		cliMain()
-	else:
-		from backend.GUI import GUI2
-		app = GUI2.PyGAAP_GUI()
-		app.run()
+	report_path = _profile_startup_option()
+	if report_path is not None:
+		start_profiling(report_path)
+	try:
+		if len(sys.argv) >= 2:
+			with phase("import CLI"):
+				from backend.CLI import cliMain
+			print("PyGAAP v" + version + " (CLI, " + versiondate + ")\nby David Berdik & Michael Fang\n")
+			cliMain()
+		else:
+			with phase("import GUI"):
+				from backend.GUI import GUI2
+			app = GUI2.PyGAAP_GUI()
+			app.run()
+	finally:
+		# writes the report if start-up didn't finish, e.g. the CLI only printed its help.
+		finish_profiling()
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	main()
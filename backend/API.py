@@ -1,6 +1,4 @@
 # import spacy
-from importlib import import_module
-from os import listdir as ls
 
 class API:
 	'''API class'''
@@ -54,59 +52,27 @@ class API:
 	unknown_docs: list = [] # list of unknown documents "Documents" (backend.Document). LIST OF DOCUMENTS
 
 	default_mp = True # toggle built-in multiprocessing
+	default_workers = 0 # worker processes for built-in multiprocessing. 0: one per CPU, minus one.
+	default_fused = False # run per-document pre-processing stages as one task per document.
+	default_compact_documents = False # CLI: use backend.CompactDocument for corpora.
+	default_streaming = False # read and reduce documents to event counts one chunk at a time (see run_experiment).
+	preprocess_cache = None # backend.PreprocessCache shared by experiments, or None to not cache.
 
 	def __init__(self, documents):
 
-		# delay importing modules to creation of API instance
-		from generics.Canonicizer import Canonicizer
-		from generics.EventCulling import EventCulling
-		from generics.EventDriver import EventDriver
-		from generics.Embedding import Embedding
-		from generics.AnalysisMethod import AnalysisMethod
-		from generics.DistanceFunction import DistanceFunction
-
-
-		self.modules = []
-		for item in ls("./generics/modules/"):
-			if item[-3:] == ".py":
-				self.modules.append(import_module("generics.modules.%s" % (item[:-3])))
+		# modules are found without importing them;
+		# each module's file is imported when the module is first created.
+		from backend.ModuleRegistry import discover
+		from util.StartupProfiler import phase
 
 		'''Build dictionaries of all the different parameters we can choose from.'''
-		# Populate dictionary of canonicizers.
-		for cls in Canonicizer.__subclasses__():
-			if self.canonicizers.get(cls.displayName()) != None:
-				raise ValueError("Two canonicizers can't both have the same displayed name: %s" % cls.displayName())
-			self.canonicizers[cls.displayName()] = cls
-		
-		# Populate dictionary of event drivers.
-		for cls in EventDriver.__subclasses__():
-			if self.eventDrivers.get(cls.displayName()) != None:
-				raise ValueError("Two event drivers can't both have the same displayed name: %s" % cls.displayName())
-			self.eventDrivers[cls.displayName()] = cls
-
-		# Populate dictionary of event culling.
-		for cls in EventCulling.__subclasses__():
-			if self.eventCulling.get(cls.displayName()) != None:
-				raise ValueError("Two event cullers can't both have the same displayed name: %s" % cls.displayName())
-			self.eventCulling[cls.displayName()] = cls
-
-		for cls in Embedding.__subclasses__():
-			if self.embeddings.get(cls.displayName()) != None:
-				raise ValueError("Two embedders can't both have the same displayed name: %s" % cls.displayName())
-			self.embeddings[cls.displayName()] = cls
-		
-		# Populate dictionary of analysis methods.
-		for cls in AnalysisMethod.__subclasses__():
-			if self.analysisMethods.get(cls.displayName()) != None:
-				raise ValueError("Two analysis methods can't both have the same displayed name: %s" % cls.displayName())
-			self.analysisMethods[cls.displayName()] = cls
-		
-		# Populate dictionary of distance functions.
-		for cls in DistanceFunction.__subclasses__():
-			if self.distanceFunctions.get(cls.displayName()) != None:
-				raise ValueError("Two distance functions can't both have the same displayed name: %s" % cls.displayName())
-			self.distanceFunctions[cls.displayName()] = cls
-			
+		with phase("API.__init__: module registration"):
+			registry = discover("./generics")
+			for module_type, available in self.moduleTypeDict.items():
+				available.clear()
+				available.update(registry[module_type])
+		self.modules = sorted({module.module_name for available in registry.values() for module in available.values()})
+
 		# Set a list of documents for processing.
 		self.documents = documents
 
@@ -32,6 +32,9 @@ def manager_run_exp(api, pipe_mainproc: Connection, pipe_subproc: Connection,
 	pipe_mainproc.send(("unknown_docs", api.unknown_docs))
 	pipe_mainproc.send(("global_parameters", api.global_parameters))
 	pipe_mainproc.send(("default_mp", api.default_mp))
+	pipe_mainproc.send(("default_workers", api.default_workers))
+	pipe_mainproc.send(("default_fused", api.default_fused))
+	pipe_mainproc.send(("preprocess_cache", api.preprocess_cache))
 	pipe_mainproc.send("End docs and global params")
 
 	for mod_type in mod_names:
@@ -7,6 +7,9 @@ from time import time
 from backend import run_experiment
 from util.MultiprocessLoading import receive_info_text
 from multiprocessing import Queue
+from util.StartupProfiler import DEFAULT_REPORT, finish_profiling, phase
+
+PIPELINE_SUFFIX = ".pgp" # trained pipelines saved by the experiment engine.
 
 def setParams(module_object, params_list: list, mod_name=""):
 	for param in params_list:
@@ -35,156 +38,302 @@ def cliMain():
 	# The GUI splash screen appears while API is loading so the app doesn't appear unresponsive.
 	args = _parse_args()
 
-	cross_compatibility_note = False
+	if args.pack_corpus:
+		packCorpus(*args.pack_corpus)
 
 	print("starting experiment(s)")
 	# If a CSV file has been specified, process it.
 	if args.experimentengine:
-		from backend.API import API
-		api = API([])
 		# Get a list of experiments in the CSV.
 		expCsvPath = args.experimentengine[0]
-		experiments = readExperimentCSV(expCsvPath)
-		
-		# Process each experiment entry in the CSV.
-		for exp in experiments:
-			exp_name = exp[0]
-			for mod_type in api.modulesInUse:
-				api.modulesInUse[mod_type] = []
-			# Get a list of entries in the specified corpus CSV.
-			corpusEntries = readCorpusCSV(findCorpusCSVPath(exp[-1]))
-			api.documents = []
-			for doc in corpusEntries:
-				api.documents.append(Document(
-					doc[0], doc[2], "", doc[1]
-				))
-
-			# now check for file format: whether PyGAAP exp csv or JGAAP exp csv
-			if len(exp) == 8 or len(exp) == 9:
-				# PyGAAP format
-				canonicizers = exp[1].split('&')
-				eventDrivers = exp[2].split('&')
-				eventCulling = exp[3].split('&')
-				embeddings = [exp[4]]
-				if '&' in embeddings:
-					raise ValueError("There can only be 1 embedder per experiment")
-				analysisMethods = [exp[5]]
-				if '&' in analysisMethods:
-					raise ValueError("There can only be 1 analysis method per experiment")
-				distanceFunctions = [exp[6]]
-				if '&' in distanceFunctions:
-					raise ValueError("There can only be 1 distance function per experiment")
-
-
-			elif len(exp) == 6 or len(exp) == 7:
-				# JGAAP format
-				api.modulesInUse["Embeddings"] = [api.embeddings["Frequency"]()]
-				canonicizers = exp[1].split('&')
-				eventDrivers = exp[2].split('&')
-				eventCulling = []
-				analysisMethods = [exp[3]]
-				distanceFunctions = [exp[4]]
-				if analysisMethods[0].startswith("Absolute Centroid Driver"):
-					cross_compatibility_note = True
-					analysisMethods[0].replace("Absolute Centroid Driver", "Centroid Driver")
-					api.modulesInUse["Embeddings"][0].normalization = "None"
-				elif analysisMethods[0].startswith("Centroid Driver"):
-					api.modulesInUse["Embeddings"][0].normalization = "Per-document token count"
-
-			canonicizers = [x for x in canonicizers if x != ""]
-			eventCulling = [x for x in eventCulling if x != ""]
-
-			# now set the parameters
-			for can in canonicizers:
-				params = can.split("|")
-				cc = params[0]
-				mod = api.canonicizers[cc]()
-				api.modulesInUse["Canonicizers"].append(mod)
-				if len(params) > 1: 
-					params = params[1:]
-					setParams(mod, params, cc)
-
-			for edr in eventDrivers:
-				params = edr.split("|")
-				ed = params[0]
-				mod = api.eventDrivers[ed]()
-				api.modulesInUse["EventDrivers"].append(mod)
-				if len(params) > 1: 
-					params = params[1:]
-					setParams(mod, params, ed)
-
-			for ecl in eventCulling:
-				params = ecl.split("|")
-				ec = params[0]
-				mod = api.eventCulling[ec]()
-				api.modulesInUse["EventCulling"].append(mod)
-				if len(params) > 1: 
-					params = params[1:]
-					setParams(mod, params, ec)
-
-			if len(exp) == 8 or len(exp) == 9:
-				nmc = embeddings[0]
-				params = nmc.split("|")
-				nc = params[0]
-				mod = api.embeddings[nc]()
-				api.modulesInUse["Embeddings"].append(mod)
-				if len(params) > 1:
-					params = params[1:]
-					setParams(mod, params, nc)
-
-			anm = analysisMethods[0]
-			params = anm.split("|")
-			am = params[0]
-			mod = api.analysisMethods[am]()
-			api.modulesInUse["AnalysisMethods"].append(mod)
-			if len(params) > 1:
-				params = params[1:]
-				setParams(mod, params, am)
-
-			if mod._NoDistanceFunction_:
-				api.modulesInUse["DistanceFunctions"].append("NA")
-				if distanceFunctions != [""]:
-					print("CLI: Warning:", mod.__class__.displayName(),
-					"does not accept a distance function but one is specified. It will be ignored."
-				)
-			else:
-				dis = distanceFunctions[0]
-				params = dis.split("|")
-				df = params[0]
-				mod = api.distanceFunctions[df]()
-				api.modulesInUse["DistanceFunctions"].append(mod)
-				if len(params) > 1:
-					params = params[1:]
-					setParams(mod, params, df)
-
-			experiment_runner = run_experiment.Experiment(api)
-			exp_return = experiment_runner.run_experiment(skip_loading_docs=1, return_results=1, verbose=1)
-
-			# Create the directories that the results will be stored in.
-			outPath = os.path.join(Path.cwd(), "tmp",
-				'&'.join(canonicizers).replace('|', '_').replace(':', '_'),
-				'&'.join(eventDrivers).replace('|', '_').replace(':', '_'),
-				analysisMethods[0].replace('|', '_').replace(':', '_')
-				+ '-' + distanceFunctions[0].replace('|', '_').replace(':', '_'))
-			if not os.path.exists(outPath):
-				os.makedirs(outPath)
-			out_filepath = os.path.join(outPath, (exp_name + str(int(time()))) + ".txt")
-			print(out_filepath)
-			with open(out_filepath, 'w') as expFile:
-				expFile.write(exp_return["results_text"])
-			if cross_compatibility_note:
-				with open(os.path.join(Path.cwd(), "tmp", "compatibility_note.txt"), "w+") as cc_note:
-					cc_note.write("Some modules from JGAAP were substituted with similar ones in PyGAAP.")
+		with phase("read experiment CSV"):
+			rows = [parseExperimentRow(exp) for exp in readExperimentCSV(expCsvPath)]
+		if args.save_pipelines is not None:
+			os.makedirs(args.save_pipelines, exist_ok=True)
+			for row in rows:
+				row["save_pipeline"] = os.path.join(args.save_pipelines, row["name"] + PIPELINE_SUFFIX)
+		batch = planBatch(rows)
+		print("%d experiment(s), %d pre-processing run(s) (%d shared)" %
+			(len(rows), len(batch), len(rows) - len(batch)))
+
+		settings = {"workers": args.workers, "fused": args.fused, "streaming": args.streaming,
+			"compact_documents": args.compact_documents,
+			"cache_dir": args.cache_dir, "cache_size": args.cache_size}
+		jobs = min(args.jobs, len(batch))
+		if jobs > 1:
+			finish_profiling()
+			hits, misses = runBatchParallel(batch, settings, jobs)
+		else:
+			with phase("create API"):
+				api = makeAPI(settings)
+			# start-up ends when the first experiment starts.
+			finish_profiling()
+			for group in batch:
+				runGroup(api, group)
+			if api.preprocess_cache is not None:
+				hits, misses = api.preprocess_cache.hits, api.preprocess_cache.misses
+		if args.cache_dir is not None:
+			print("Pre-processing cache: %d hits, %d misses" % (hits, misses))
+	if args.attribute:
+		attributeFiles(args.attribute[0], args.attribute[1:])
+	if args.serve:
+		from backend.TrainedPipeline import TrainedPipeline
+		from backend.Server import serve
+		with phase("load pipeline"):
+			pipeline = TrainedPipeline.load(args.serve)
+		finish_profiling()
+		serve(pipeline, args.host, args.port,
+			max_batch=args.max_batch, max_wait=args.max_wait / 1000)
 	print("Finished")
 
+def packCorpus(csv_path, archive_path=None):
+	'''Packs a corpus CSV and its documents into a corpus archive, which can be used instead of the CSV.'''
+	from backend.CorpusArchive import pack_corpus
+	start = time()
+	archive_path = pack_corpus(csv_path, archive_path)
+	print("Packed %s into %s (%.1f MB) in %.3fs" %
+		(csv_path, archive_path, os.path.getsize(archive_path) / 2**20, time() - start))
+
+def attributeFiles(pipeline_path, paths):
+	'''Attributes the documents at paths with a pipeline saved by the experiment engine (--save-pipelines).'''
+	from backend.TrainedPipeline import TrainedPipeline
+	start = time()
+	with phase("load pipeline"):
+		pipeline = TrainedPipeline.load(pipeline_path)
+	loaded = time()
+	finish_profiling()
+	docs, results = pipeline.attribute_files(paths)
+	print("Loaded pipeline in %.3fs, attributed %d document(s) in %.3fs" % (loaded - start, len(docs), time() - loaded))
+	if pipeline.skipped_event_cullers > 0:
+		print("CLI: Note: %d event culler(s) need all documents and are not applied to new documents." %
+			pipeline.skipped_event_cullers)
+	for doc, doc_results in zip(docs, results):
+		print(doc.filepath)
+		placement = 0
+		prev = None
+		for author in sorted(doc_results, key=doc_results.get):
+			if prev == None or prev < doc_results[author]:
+				placement += 1
+				prev = doc_results[author]
+			print(str(placement) + ". " + str(author) + ' ' + str(doc_results[author]))
+
+def makeAPI(settings):
+	'''Creates an API for the experiment engine. settings: workers, fused, streaming, compact_documents, cache_dir, cache_size (see _parse_args).'''
+	from backend.API import API
+	api = API([])
+	api.default_workers = settings["workers"]
+	api.default_fused = settings["fused"]
+	api.default_streaming = settings["streaming"]
+	api.default_compact_documents = settings["compact_documents"]
+	if settings["cache_dir"] is not None:
+		from backend.PreprocessCache import PreprocessCache
+		api.preprocess_cache = PreprocessCache(settings["cache_dir"], settings["cache_size"])
+	return api
+
+def runBatchParallel(batch, settings, jobs):
+	'''
+	Runs the groups of a batch (see planBatch) in ```jobs``` processes, each with its own API.
+	The CPU budget (settings["workers"], or one per CPU minus one) is split between the jobs,
+	so the experiments' own worker pools don't oversubscribe the CPUs.
+	Result files are written by the jobs as each row completes.
+	Returns the pre-processing cache hits and misses over all jobs.
+	If groups fail, the other groups still run, then the first failure's error is raised, as in a serial run.
+	'''
+	from concurrent.futures import ProcessPoolExecutor, as_completed
+	from backend.WorkerPool import default_workers
+	budget = settings["workers"] if settings["workers"] > 0 else default_workers()
+	job_settings = dict(settings, workers=max(1, budget // jobs))
+	print("Running %d job(s), %d worker process(es) each" % (jobs, job_settings["workers"]))
+	hits, misses = 0, 0
+	errors = []
+	with ProcessPoolExecutor(jobs, initializer=_initJob, initargs=(job_settings,)) as executor:
+		futures = {executor.submit(_runGroupJob, group): group for group in batch}
+		for future in as_completed(futures):
+			try:
+				group_hits, group_misses = future.result()
+			except Exception as error:
+				print("CLI: Error: experiment(s) %s failed:\n%s" %
+					(", ".join(row["name"] for row in futures[future]), str(error)))
+				errors.append(error)
+				continue
+			hits += group_hits
+			misses += group_misses
+	if len(errors) > 0:
+		print("CLI: Error: %d of %d experiment group(s) failed." % (len(errors), len(batch)))
+		raise errors[0]
+	return hits, misses
+
+_job_api = None # API of a job process (runBatchParallel), created once per process.
+
+def _initJob(settings):
+	global _job_api
+	_job_api = makeAPI(settings)
+
+def _runGroupJob(group):
+	'''Runs a group in a job process. Returns the pre-processing cache hits and misses of the group.'''
+	cache = _job_api.preprocess_cache
+	hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+	runGroup(_job_api, group)
+	if cache is None: return 0, 0
+	return cache.hits - hits, cache.misses - misses
+
+def parseExperimentRow(exp):
+	'''
+	Splits a row of the experiment CSV (PyGAAP or JGAAP format) into its module strings,
+	each "module name|parameter:value|...". Returns a dict with the experiment name,
+	the corpus CSV path and one list of module strings per module type.
+	'''
+	row = {"name": exp[0], "corpus": str(findCorpusCSVPath(exp[-1])), "cross_compatibility_note": False}
+	if len(exp) == 8 or len(exp) == 9:
+		# PyGAAP format
+		row["Canonicizers"] = exp[1].split('&')
+		row["EventDrivers"] = exp[2].split('&')
+		row["EventCulling"] = exp[3].split('&')
+		row["Embeddings"] = [exp[4]]
+		if '&' in exp[4]:
+			raise ValueError("There can only be 1 embedder per experiment")
+		row["AnalysisMethods"] = [exp[5]]
+		if '&' in exp[5]:
+			raise ValueError("There can only be 1 analysis method per experiment")
+		row["DistanceFunctions"] = [exp[6]]
+		if '&' in exp[6]:
+			raise ValueError("There can only be 1 distance function per experiment")
+
+	elif len(exp) == 6 or len(exp) == 7:
+		# JGAAP format
+		row["Canonicizers"] = exp[1].split('&')
+		row["EventDrivers"] = exp[2].split('&')
+		row["EventCulling"] = []
+		row["Embeddings"] = ["Frequency"]
+		row["AnalysisMethods"] = [exp[3]]
+		row["DistanceFunctions"] = [exp[4]]
+		if row["AnalysisMethods"][0].startswith("Absolute Centroid Driver"):
+			row["cross_compatibility_note"] = True
+			row["AnalysisMethods"][0] = row["AnalysisMethods"][0].replace("Absolute Centroid Driver", "Centroid Driver")
+			row["Embeddings"] = ["Frequency|normalization:None"]
+		elif row["AnalysisMethods"][0].startswith("Centroid Driver"):
+			row["Embeddings"] = ["Frequency|normalization:Per-document token count"]
+
+	row["Canonicizers"] = [x for x in row["Canonicizers"] if x != ""]
+	row["EventCulling"] = [x for x in row["EventCulling"] if x != ""]
+	return row
+
+def planBatch(rows):
+	'''
+	Groups experiment rows that share a corpus, canonicizers, event drivers and event cullers,
+	so the documents are read and pre-processed once per group.
+	Groups and the rows in them keep the order they first appear in.
+	'''
+	groups = dict()
+	for row in rows:
+		key = (row["corpus"], tuple(row["Canonicizers"]), tuple(row["EventDrivers"]), tuple(row["EventCulling"]))
+		groups.setdefault(key, []).append(row)
+	return list(groups.values())
+
+def _addModules(api, mod_type, module_strings):
+	'''Creates the modules in module_strings, sets their parameters and adds them to api.modulesInUse.'''
+	available = {"Canonicizers": api.canonicizers, "EventDrivers": api.eventDrivers,
+		"EventCulling": api.eventCulling, "Embeddings": api.embeddings,
+		"AnalysisMethods": api.analysisMethods, "DistanceFunctions": api.distanceFunctions}[mod_type]
+	for module_string in module_strings:
+		params = module_string.split("|")
+		mod = available[params[0]]()
+		api.modulesInUse[mod_type].append(mod)
+		if len(params) > 1:
+			setParams(mod, params[1:], params[0])
+
+def runGroup(api, group):
+	'''
+	Runs the experiment rows of one group (see planBatch).
+	The first row reads and pre-processes the documents; the other rows reuse them
+	and only run their embedder, analysis method and distance function.
+	'''
+	first = group[0]
+	for mod_type in api.modulesInUse:
+		api.modulesInUse[mod_type] = []
+	# Get a list of entries in the specified corpus CSV.
+	if api.default_compact_documents:
+		from backend.CompactDocument import CompactDocument, EventVocabulary
+		vocabulary = EventVocabulary()
+		api.documents = [CompactDocument(doc[0], doc[2], "", doc[1], vocabulary=vocabulary)
+			for doc in readCorpusCSV(first["corpus"])]
+	else:
+		api.documents = [Document(doc[0], doc[2], "", doc[1]) for doc in readCorpusCSV(first["corpus"])]
+	for mod_type in ["Canonicizers", "EventDrivers", "EventCulling"]:
+		_addModules(api, mod_type, first[mod_type])
+
+	pre_processed = False
+	streamed_counts = None
+	for row in group:
+		for mod_type in ["Embeddings", "AnalysisMethods", "DistanceFunctions"]:
+			api.modulesInUse[mod_type] = []
+		_addModules(api, "Embeddings", row["Embeddings"])
+		_addModules(api, "AnalysisMethods", row["AnalysisMethods"])
+		mod = api.modulesInUse["AnalysisMethods"][0]
+		if mod._NoDistanceFunction_:
+			api.modulesInUse["DistanceFunctions"].append("NA")
+			if row["DistanceFunctions"] != [""]:
+				print("CLI: Warning:", mod.__class__.displayName(),
+				"does not accept a distance function but one is specified. It will be ignored."
+			)
+		else:
+			_addModules(api, "DistanceFunctions", row["DistanceFunctions"])
+
+		experiment_runner = run_experiment.Experiment(api)
+		exp_return = experiment_runner.run_experiment(skip_loading_docs=1,
+			skip_pre_processing=pre_processed, streamed_counts=streamed_counts,
+			save_pipeline=row.get("save_pipeline"), return_results=1, verbose=1)
+		pre_processed = pre_processed or experiment_runner.pre_processing_done
+		streamed_counts = streamed_counts or experiment_runner.streamed_counts
+		writeResults(row, exp_return)
+
+def writeResults(row, exp_return):
+	'''Writes the results text of an experiment row to tmp/<canonicizers>/<event drivers>/<method>-<distance>/.'''
+	# Create the directories that the results will be stored in.
+	outPath = os.path.join(Path.cwd(), "tmp",
+		'&'.join(row["Canonicizers"]).replace('|', '_').replace(':', '_'),
+		'&'.join(row["EventDrivers"]).replace('|', '_').replace(':', '_'),
+		row["AnalysisMethods"][0].replace('|', '_').replace(':', '_')
+		+ '-' + row["DistanceFunctions"][0].replace('|', '_').replace(':', '_'))
+	if not os.path.exists(outPath):
+		os.makedirs(outPath)
+	out_filepath = os.path.join(outPath, (row["name"] + str(int(time()))) + ".txt")
+	print(out_filepath)
+	with open(out_filepath, 'w') as expFile:
+		expFile.write(exp_return["results_text"])
+	if row["cross_compatibility_note"]:
+		with open(os.path.join(Path.cwd(), "tmp", "compatibility_note.txt"), "w+") as cc_note:
+			cc_note.write("Some modules from JGAAP were substituted with similar ones in PyGAAP.")
+
 def _parse_args(empty=False):
 	"""Parse command line arguments"""
 	parser = argparse.ArgumentParser(description='Welcome to PyGAAP\u2014the Python Graphical Authorship Attribution Program')
 	parser.add_argument('-ee', '--experimentengine', metavar='csv-file', nargs=1, help="Specifies a CSV file for batch processing multiple experiments at once.")
+	parser.add_argument('-w', '--workers', metavar='N', type=int, default=0, help="Number of worker processes shared by all stages of an experiment. Default (0): one per CPU, minus one.")
+	parser.add_argument('-j', '--jobs', metavar='N', type=int, default=1, help="Number of experiments (groups of rows sharing pre-processing) to run at once, each in its own process. The worker processes (-w) are split between them.")
+	parser.add_argument('--fused', action='store_true', help="Run canonicizers, event drivers and per-document event cullers in one task per document.")
+	parser.add_argument('--streaming', action='store_true', help="Read and pre-process documents a chunk at a time, keeping only their event counts, for corpora larger than memory. Needs per-document modules and an embedder that works from counts (e.g. Frequency).")
+	parser.add_argument('--compact-documents', action='store_true', help="Store documents' events as integer IDs into a vocabulary shared by the corpus, which uses several times less memory for large event sets.")
+	parser.add_argument('--cache-dir', metavar='dir', default=None, help="Directory to cache canonicized texts and event sets in, reused across experiments and runs.")
+	parser.add_argument('--pack-corpus', metavar=('corpus-csv', 'archive'), nargs='+', help="Pack a corpus CSV and its documents into one corpus archive file (default: the CSV's path with .pgca), which can be used wherever a corpus CSV is, and loads faster.")
+	parser.add_argument('--save-pipelines', metavar='dir', default=None, help="Save each experiment's trained pipeline to <dir>/<experiment name>%s, to attribute new documents later with --attribute." % PIPELINE_SUFFIX)
+	parser.add_argument('--attribute', metavar=('pipeline', 'document'), nargs='+', help="Attribute documents with a pipeline saved by --save-pipelines.")
+	parser.add_argument('--serve', metavar='pipeline', default=None, help="Keep a pipeline saved by --save-pipelines loaded and attribute documents sent over HTTP (POST /attribute, GET /stats).")
+	parser.add_argument('--host', default="127.0.0.1", help="Address for --serve. Default: 127.0.0.1 (this computer only).")
+	parser.add_argument('--port', type=int, default=8372, help="Port for --serve. Default: 8372.")
+	parser.add_argument('--max-batch', metavar='N', type=int, default=64, help="Most documents --serve attributes in one batch. Default: 64.")
+	parser.add_argument('--max-wait', metavar='ms', type=float, default=10, help="How long --serve waits for more requests to batch together. Default: 10.")
+	parser.add_argument('--profile-startup', metavar='report-file', nargs='?', const=DEFAULT_REPORT, help="Write the time of each import and start-up phase, slowest first, to report-file (default: %s). Also works without other options, for the GUI." % DEFAULT_REPORT)
+	parser.add_argument('--cache-size', metavar='MB', type=float, default=1024, help="Size limit of the pre-processing cache. Least recently used entries are removed first. Default: 1024.")
 	# If no arguments specified, print help and completely exit.
 	if empty:
 		parser.print_help()
 		sys.exit(1)
 	
+	args = parser.parse_args()
+	# argparse can't limit nargs to one or two values.
+	if args.pack_corpus is not None and len(args.pack_corpus) > 2:
+		parser.error("argument --pack-corpus: expected one or two arguments (corpus-csv [archive])")
+
 	# Return parsed arguments.
-	return parser.parse_args()
\ No newline at end of file
+	return args
\ No newline at end of file
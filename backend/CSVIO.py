@@ -1,10 +1,19 @@
-import csv, pathlib
-
-from pandas import value_counts
+import csv, pathlib, codecs, locale, mmap, os
+from concurrent.futures import ThreadPoolExecutor
 
 ERROR_PREFIX = "Experiment CSV: "
+ENCODING_SAMPLE_SIZE = 65536 # bytes at the start of a document used to detect its encoding.
+MMAP_MIN_SIZE = 1 << 20 # smaller documents are read with one read() call instead of memory-mapped.
+CORPUS_MEMBER_SEPARATOR = "::" # between a corpus archive's path and a document's path in it.
 def readCorpusCSV(csvPath, delimiter=","):
-	'''Read the corpus csv at the given path in to a list of lists and return it.'''
+	'''
+	Read the corpus csv at the given path in to a list of lists and return it.
+	Also reads corpus archives (see backend.CorpusArchive), whose rows have the documents' member paths.
+	'''
+	# imported here: CorpusArchive imports this module.
+	from backend import CorpusArchive
+	if CorpusArchive.is_archive(csvPath):
+		return CorpusArchive.open_archive(csvPath).rows()
 	# Read each row from the CSV in to a list.
 	csvRows = []
 	with open(csvPath, "r") as file:
@@ -61,12 +70,78 @@ def findDocumentPath(documentPathEntry):
 	'''Find the path of the specified document based on the document path entry.'''
 	return findCorpusCSVPath(documentPathEntry)
 	
-def readDocument(documentPath):
-	'''Returns the contents of the document at the specified path.'''
-	try:
-		return pathlib.Path(documentPath).read_text()
-	except UnicodeError:
+def _candidateEncodings():
+	'''Encodings tried in order: the default for text files, UTF-8, and ISO-8859-15, which decodes anything.'''
+	return [locale.getpreferredencoding(False), "UTF-8", "ISO-8859-15"]
+
+def detectEncoding(sample, candidates=None):
+	'''
+	Returns the index in candidates (default: _candidateEncodings()) of the first encoding that decodes
+	the sample, the start of a document. A character cut off at the end of the sample is allowed.
+	'''
+	candidates = candidates or _candidateEncodings()
+	for i, encoding in enumerate(candidates):
+		try:
+			codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+			return i
+		except UnicodeError:
+			pass
+	return len(candidates) - 1
+
+def decodeDocument(data):
+	'''
+	Decodes the bytes (or buffer) of a document like Path.read_text() with the fallbacks of readDocument,
+	but in one pass: the encoding is detected from a sample at the start of the document,
+	and others are only tried if the rest of the document doesn't decode.
+	Line endings are translated to "\\n".
+	'''
+	candidates = _candidateEncodings()
+	for encoding in candidates[detectEncoding(data[:ENCODING_SAMPLE_SIZE], candidates):]:
 		try:
-			return pathlib.Path(documentPath).read_text(encoding="UTF-8")
+			text = str(data, encoding)
+			break
 		except UnicodeError:
-			return pathlib.Path(documentPath).read_text(encoding="ISO-8859-15")
+			pass
+	if "\r" in text:
+		text = text.replace("\r\n", "\n").replace("\r", "\n")
+	return text
+
+def readDocumentBytes(documentPath):
+	'''
+	Returns the contents of the document at the specified path, decoded with decodeDocument, and its size in bytes.
+	Documents in corpus archives (member paths, see backend.CorpusArchive) are read from the archive.
+	'''
+	if CORPUS_MEMBER_SEPARATOR in str(documentPath):
+		from backend.CorpusArchive import read_member
+		return read_member(documentPath)
+	with open(documentPath, "rb") as file:
+		size = os.fstat(file.fileno()).st_size
+		if size < MMAP_MIN_SIZE:
+			return decodeDocument(file.read()), size
+		with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+			if hasattr(mapped, "madvise"):
+				# read ahead the whole file instead of one page fault at a time.
+				mapped.madvise(mmap.MADV_WILLNEED)
+			with memoryview(mapped) as data:
+				return decodeDocument(data), size
+
+def readDocument(documentPath):
+	'''Returns the contents of the document at the specified path.'''
+	return readDocumentBytes(documentPath)[0]
+
+def readDocuments(documentPaths, threads=None):
+	'''
+	Reads many documents at once with a pool of threads, so reads from slow disks overlap.
+	Returns the texts (see readDocument) in the order of the paths, and the number of bytes read.
+	threads: default is ThreadPoolExecutor's. Raises the error of the first document that can't be read.
+	'''
+	documentPaths = list(documentPaths)
+	if len(documentPaths) == 0:
+		return [], 0
+	if all(CORPUS_MEMBER_SEPARATOR in str(path) for path in documentPaths):
+		# corpus archives are already mapped: there are no reads to overlap.
+		results = [readDocumentBytes(path) for path in documentPaths]
+		return [text for text, _ in results], sum(size for _, size in results)
+	with ThreadPoolExecutor(threads) as executor:
+		results = list(executor.map(readDocumentBytes, documentPaths))
+	return [text for text, _ in results], sum(size for _, size in results)
@@ -0,0 +1,206 @@
+"""
+Character n-grams with NumPy, without making a string per n-gram position.
+
+The text is viewed as an array of code points (UTF-32), and each n-gram position
+gets an exact integer key, rolled in with shifts and ors: code points are replaced
+by their rank in the text's alphabet, so each character takes only as many bits as the
+alphabet needs, and a key is as many uint64 words as n characters take (one word for
+n up to 9 with an alphabet of up to 127 characters). Equal keys are then given the same ID:
+with a table indexed by key if keys are small enough, else by sorting them. Keys of several
+words are first hashed into one uint64, and the IDs are checked against the full keys.
+Each distinct n-gram is made into a string once, and lists of n-grams share those strings.
+When most n-grams of a text are distinct (long n), that saves little, and the n-grams are sliced
+from the text directly instead (still without nltk's tuple per position).
+
+char_ngrams returns the same list as joining the tuples of nltk.ngrams(text, n);
+char_ngram_ids and char_ngram_counts skip the list. The *_by_order functions do the same
+for several n at once, sharing the work of shorter n-grams with longer ones.
+"""
+
+from collections import Counter
+from math import log
+
+import numpy as np
+
+_WORD_BITS = 64
+_TABLE_MAX_CODE_POINT = 0xFFFF # larger alphabets are ranked by sorting.
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+# n-grams looked at to estimate how many n-grams of a text are distinct: 1/16 of them, within these bounds.
+_SAMPLE_POSITIONS = (1024, 65536)
+# about where slicing every n-gram gets faster. The estimates (see _mostly_distinct) tend to be high.
+_DISTINCT_FRACTION = 0.3
+
+
+def code_points(text):
+	"""The code points of text as a uint32 array (a view of its UTF-32 encoding)."""
+	# surrogatepass: lone surrogates are valid in str, and are kept as they are.
+	return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def _alphabet_ranks(codes):
+	"""Rank of each code point among the distinct code points of codes (uint64 array), and their number."""
+	if codes.shape[0] == 0:
+		return np.zeros(0, dtype=np.uint64), 0
+	if codes.max() > _TABLE_MAX_CODE_POINT:
+		alphabet, ranks = np.unique(codes, return_inverse=True)
+		return ranks.astype(np.uint64), alphabet.shape[0]
+	present = np.zeros(int(codes.max()) + 1, dtype=bool)
+	present[codes] = True
+	rank = np.cumsum(present, dtype=np.int64) - 1
+	return rank[codes].astype(np.uint64), int(rank[-1]) + 1
+
+
+def _key_ids(words, key_bits):
+	"""
+	IDs of n-gram keys: uint64 arrays (words) with one item per n-gram, using key_bits bits of the first word.
+	Equal keys have the same ID. Returns the IDs and their number.
+	"""
+	positions = words[0].shape[0]
+	if len(words) == 1 and (1 << key_bits) <= 4 * positions + (1 << 16):
+		present = np.zeros(1 << key_bits, dtype=bool)
+		present[words[0]] = True
+		ids = np.cumsum(present, dtype=np.int64) - 1
+		return ids[words[0]], int(ids[-1]) + 1
+	if len(words) == 1:
+		unique, ids = np.unique(words[0], return_inverse=True)
+		return ids, unique.shape[0]
+	hashes = words[0].copy()
+	for word in words[1:]:
+		hashes *= _HASH_MULTIPLIER
+		hashes ^= word
+	unique, ids = np.unique(hashes, return_inverse=True)
+	representative = _representatives(ids, unique.shape[0])[ids]
+	if all(np.array_equal(word, word[representative]) for word in words):
+		return ids, unique.shape[0]
+	# hash collision: IDs of the full keys.
+	keys = np.ascontiguousarray(np.stack(words, axis=1)).view(np.dtype((np.void, 8 * len(words)))).ravel()
+	unique, ids = np.unique(keys, return_inverse=True)
+	return ids, unique.shape[0]
+
+
+def _representatives(ids, count):
+	"""A position of each ID in ids."""
+	positions = np.empty(count, dtype=np.int64)
+	positions[ids] = np.arange(ids.shape[0])
+	return positions
+
+
+def _first_positions(ids, count):
+	"""The first position of each ID in ids."""
+	first = np.full(count, ids.shape[0], dtype=np.int64)
+	np.minimum.at(first, ids, np.arange(ids.shape[0]))
+	return first
+
+
+def _mostly_distinct(text, n):
+	"""
+	Whether more than _DISTINCT_FRACTION of the n-grams of text are distinct: then slicing them all
+	is faster than finding the distinct ones first. Estimated from the first n-grams of text (see _SAMPLE_POSITIONS)
+	and the first quarter of them, with the number of distinct n-grams growing as a power of
+	the number of n-grams (Heaps' law).
+	"""
+	positions = len(text) - n + 1
+	if positions <= 0:
+		return False
+	sample = min(positions, max(_SAMPLE_POSITIONS[0], min(_SAMPLE_POSITIONS[1], positions // 16)))
+	quarter = max(1, sample // 4)
+	seen = {text[i:i + n] for i in range(quarter)}
+	distinct_quarter = len(seen)
+	seen.update(text[i:i + n] for i in range(quarter, sample))
+	distinct = len(seen)
+	if sample < positions:
+		distinct *= (positions / sample) ** (log(distinct / distinct_quarter) / log(sample / quarter))
+	return distinct > _DISTINCT_FRACTION * positions
+
+
+def _ids_by_order(text, n_min, n_max, slice_distinct=True):
+	"""
+	Yields (n, IDs, number of IDs) of the n-grams of text (see _key_ids), for each n from n_min to n_max.
+	The code point ranks are found once, and the keys of each n extend the keys of n - 1.
+	With slice_distinct, yields (n, None, 0) instead once most n-grams are distinct (see _mostly_distinct),
+	for them to be sliced from the text: then longer n-grams are mostly distinct too.
+	"""
+	sliced = n_min if slice_distinct and _mostly_distinct(text, n_min) else None
+	if sliced is None:
+		ranks, alphabet_size = _alphabet_ranks(code_points(text))
+		bits = max(1, (alphabet_size - 1).bit_length())
+		per_word = _WORD_BITS // bits
+		words = []
+	for n in range(1, n_max + 1):
+		if sliced is None and n > n_min and slice_distinct and _mostly_distinct(text, n):
+			sliced = n
+		if sliced is not None:
+			if n >= sliced:
+				yield n, None, 0
+			continue
+		positions = max(0, len(text) - n + 1)
+		# the n-gram at each position is the (n - 1)-gram there, and one more character.
+		words = [word[:positions] for word in words]
+		character = ranks[n - 1:n - 1 + positions]
+		if (n - 1) % per_word == 0:
+			words.append(character)
+		else:
+			words[-1] = (words[-1] << np.uint64(bits)) | character
+		if n >= n_min:
+			yield (n,) + _key_ids(words, bits * min(n, per_word))
+
+
+def _ngram_list(text, n, ids, count, suffix=""):
+	if ids is None:
+		if suffix == "":
+			return [text[i:i + n] for i in range(len(text) - n + 1)]
+		return [text[i:i + n] + suffix for i in range(len(text) - n + 1)]
+	ngrams = np.empty(count, dtype=object)
+	ngrams[:] = [text[i:i + n] + suffix for i in _representatives(ids, count).tolist()]
+	return ngrams[ids].tolist()
+
+
+def _ngram_counts(text, n, ids, count, suffix=""):
+	if ids is None:
+		return Counter(text[i:i + n] + suffix for i in range(len(text) - n + 1))
+	first = _first_positions(ids, count)
+	order = np.argsort(first)
+	counts = np.bincount(ids, minlength=count)
+	return {text[i:i + n] + suffix: c for i, c in zip(first[order].tolist(), counts[order].tolist())}
+
+
+def _order_tag(n, tag):
+	return "_%d" % n if tag else ""
+
+
+def char_ngram_ids(text, n):
+	"""
+	IDs of the n-grams of text, in order, as an int array, and the n-gram of each ID
+	(list of strings, sorted by first appearance: IDs count up from 0 as new n-grams appear).
+	"""
+	_, ids, count = next(_ids_by_order(text, n, n, slice_distinct=False))
+	first = _first_positions(ids, count)
+	order = np.argsort(first)
+	renumber = np.empty_like(order)
+	renumber[order] = np.arange(count)
+	return renumber[ids], [text[i:i + n] for i in first[order].tolist()]
+
+
+def char_ngrams(text, n):
+	"""The n-grams of text, in order, as a list of strings. Equal n-grams share a string, unless most are distinct."""
+	_, ids, count = next(_ids_by_order(text, n, n))
+	return _ngram_list(text, n, ids, count)
+
+
+def char_ngram_counts(text, n):
+	"""Counts of the n-grams of text (dict of n-gram: count, in order of first appearance)."""
+	_, ids, count = next(_ids_by_order(text, n, n))
+	return _ngram_counts(text, n, ids, count)
+
+
+def char_ngrams_by_order(text, n_min, n_max, tag=False):
+	"""
+	char_ngrams of text for each n from n_min to n_max (dict of n: list), in one pass (see _ids_by_order).
+	tag: "_<n>" is appended to the n-grams of length n (e.g. "ab_2").
+	"""
+	return {n: _ngram_list(text, n, ids, count, _order_tag(n, tag)) for n, ids, count in _ids_by_order(text, n_min, n_max)}
+
+
+def char_ngram_counts_by_order(text, n_min, n_max, tag=False):
+	"""char_ngram_counts of text for each n from n_min to n_max (dict of n: counts), in one pass. tag: as char_ngrams_by_order."""
+	return {n: _ngram_counts(text, n, ids, count, _order_tag(n, tag)) for n, ids, count in _ids_by_order(text, n_min, n_max)}
@@ -0,0 +1,124 @@
+"""
+A smaller Document for large corpora and large event sets.
+
+Documents' events are stored as a NumPy int32 array of IDs into an EventVocabulary
+shared by the corpus, instead of a list of separate strings per document.
+eventSet still gets and sets lists of events, so modules work unchanged.
+Attributes are in __slots__ (no per-document __dict__), and documents are equal
+only to themselves, instead of comparing every attribute including the texts.
+
+Modules can also work on the IDs directly (see uses_event_ids): count_event_ids counts
+events and keep_event_ids culls them with NumPy, without hashing or pickling the events' strings.
+"""
+
+from itertools import islice
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from backend.CSVIO import readDocument
+
+
+class EventVocabulary:
+	"""Event: integer ID, in order of first appearance. Shared by the documents of a corpus."""
+
+	def __init__(self):
+		self.ids = dict()
+		self.events = [] # event of each ID.
+
+	def __len__(self):
+		return len(self.ids)
+
+	def encode(self, events):
+		"""IDs of events (an iterable of hashable events) as an int32 array. New events get new IDs."""
+		ids = self.ids
+		encoded = np.fromiter((ids.setdefault(e, len(ids)) for e in events), dtype=np.int32)
+		if len(ids) > len(self.events):
+			# dicts keep insertion order: the new events are the last keys.
+			self.events.extend(islice(ids, len(self.events), None))
+		return encoded
+
+	def decode(self, event_ids):
+		"""Events of an array of IDs, as a list."""
+		events = self.events
+		return [events[i] for i in event_ids.tolist()]
+
+
+class CompactDocument:
+	'''Document with __slots__ and events stored as IDs (see the module docstring).'''
+	__slots__ = ("author", "title", "text", "filepath", "canonicized", "numbers", "event_ids", "vocabulary")
+
+	def __init__(self, author="", title="", text="", filepath="", **extras):
+		'''
+		Same arguments as Document, plus ```vocabulary```: the EventVocabulary shared with the other documents.
+		A new one by default.
+		'''
+		self.author = extras.get("author", author)
+		self.title = extras.get("title", title)
+		self.text = extras.get("text", text)
+		self.filepath = extras.get("filepath", filepath)
+		self.canonicized = extras.get("canonicized", None)
+		self.numbers = extras.get("numbers", None)
+		self.vocabulary = extras.get("vocabulary", None)
+		if self.vocabulary is None:
+			self.vocabulary = EventVocabulary()
+		self.event_ids = np.zeros(0, dtype=np.int32)
+		self.eventSet = extras.get("eventSet", list())
+
+	@property
+	def eventSet(self):
+		return self.vocabulary.decode(self.event_ids)
+
+	@eventSet.setter
+	def eventSet(self, eventSet):
+		self.event_ids = self.vocabulary.encode(eventSet)
+
+	def event_count(self):
+		return self.event_ids.shape[0]
+
+	def setEventSet(self, eventSet, **options):
+		'''Sets the eventSet list value.'''
+		if not options.get("append", True):
+			self.eventSet = eventSet
+		else:
+			self.event_ids = np.concatenate([self.event_ids, self.vocabulary.encode(eventSet)])
+
+	def read_self(self, encoding=None):
+		self.text = readDocument(self.filepath) + "\n"
+		return self.text
+
+	def __repr__(self):
+		return '<Auth: "%s", Title: "%s", Text sample: |%s|, Event sample: %s, Path: %s>' % \
+			(str(self.author), str(self.title), str(self.text[:10]),
+			str(self.vocabulary.decode(self.event_ids[:10]))[:10]+"...", str(self.filepath))
+
+	def is_same_doc(self, other):
+		return self.author == other.author and self.title == other.title and self.filepath == other.filepath
+
+
+def uses_event_ids(docs):
+	"""Whether docs are CompactDocuments sharing one vocabulary, so their event IDs can be used directly."""
+	return len(docs) > 0 and all(isinstance(d, CompactDocument) and d.vocabulary is docs[0].vocabulary for d in docs)
+
+
+def count_event_ids(docs):
+	"""
+	Counts of the events of docs (see uses_event_ids) as a (docs x events) CSR array,
+	and the events of its columns, in order of their IDs. Only events found in docs have a column.
+	"""
+	ids = np.concatenate([d.event_ids for d in docs])
+	used, columns = np.unique(ids, return_inverse=True)
+	rows = np.repeat(np.arange(len(docs)), [d.event_ids.shape[0] for d in docs])
+	# duplicate (row, column) entries are summed.
+	counts = csr_array((np.ones(ids.shape[0]), (rows, columns)), shape=(len(docs), used.shape[0]))
+	counts.sum_duplicates()
+	events = docs[0].vocabulary.events
+	return counts, [events[i] for i in used.tolist()]
+
+
+def keep_event_ids(docs, events):
+	"""Removes the events not in events (an iterable) from docs (see uses_event_ids), keeping their order."""
+	ids = docs[0].vocabulary.ids
+	kept = np.fromiter((ids[e] for e in events if e in ids), dtype=np.int32)
+	for d in docs:
+		d.event_ids = d.event_ids[np.isin(d.event_ids, kept)]
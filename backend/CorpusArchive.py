@@ -0,0 +1,146 @@
+"""
+Packed corpus archives: a corpus CSV and all its documents in one file,
+for corpora of many small files, which are slow to open one by one (e.g. on network filesystems).
+
+Layout:
+	MAGIC (8 bytes), index offset and index length (little-endian uint64 each),
+	the texts of the documents as UTF-8, one after another,
+	the index: JSON list of [author, title, path, text offset, text length in bytes].
+Texts are stored as readDocument returns them (decoded, "\\n" line endings).
+
+An archive is accepted wherever a corpus CSV is: readCorpusCSV returns its rows with member paths
+"<archive path>::<original path>", and readDocument reads those from the archive.
+Archives are memory-mapped and kept open, so each text is decoded straight from the mapping.
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from backend.CSVIO import CORPUS_MEMBER_SEPARATOR as MEMBER_SEPARATOR, readCorpusCSV, readDocuments
+from backend.Document import Document
+
+ARCHIVE_SUFFIX = ".pgca"
+MAGIC = b"PGCA\0\0\0\1"
+_HEADER = struct.Struct("<8sQQ")
+_PACK_CHUNK_SIZE = 256 # documents read at a time while packing.
+
+_open_archives = dict() # absolute path: (file version, CorpusArchive), see open_archive.
+
+
+def is_archive(path):
+	"""Whether the file at path is a corpus archive (by its first bytes, not its name)."""
+	try:
+		with open(path, "rb") as f:
+			return f.read(len(MAGIC)) == MAGIC
+	except OSError:
+		return False
+
+
+def pack_corpus(csv_path, archive_path=None):
+	"""
+	Packs a corpus CSV and its documents into an archive. Default archive path: the CSV's, with ARCHIVE_SUFFIX.
+	Returns the archive path. The archive is written to a temporary file first, so a failure leaves no partial archive.
+	"""
+	rows = readCorpusCSV(csv_path)
+	archive_path = Path(archive_path if archive_path is not None else Path(csv_path).with_suffix(ARCHIVE_SUFFIX))
+	temporary_path = archive_path.with_name(archive_path.name + ".tmp")
+	index = []
+	try:
+		with open(temporary_path, "wb") as f:
+			f.write(_HEADER.pack(MAGIC, 0, 0))
+			offset = _HEADER.size
+			for start in range(0, len(rows), _PACK_CHUNK_SIZE):
+				chunk = rows[start:start + _PACK_CHUNK_SIZE]
+				texts, _ = readDocuments(row[1] for row in chunk)
+				for row, text in zip(chunk, texts):
+					data = text.encode("utf-8")
+					f.write(data)
+					index.append([row[0], row[2], row[1], offset, len(data)])
+					offset += len(data)
+			index_data = json.dumps(index).encode("utf-8")
+			f.write(index_data)
+			f.seek(0)
+			f.write(_HEADER.pack(MAGIC, offset, len(index_data)))
+		os.replace(temporary_path, archive_path)
+	finally:
+		if temporary_path.exists():
+			temporary_path.unlink()
+	return archive_path
+
+
+class CorpusArchive:
+
+	def __init__(self, path):
+		"""Opens and memory-maps the archive at path."""
+		self.path = str(path)
+		with open(path, "rb") as f:
+			header = f.read(_HEADER.size)
+			if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+				raise ValueError("Not a corpus archive: %s" % str(path))
+			self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		_, index_offset, index_length = _HEADER.unpack(header)
+		# [author, title, path, offset, length] per document.
+		self.index = json.loads(str(self._mmap[index_offset:index_offset + index_length], "utf-8"))
+		self._members = {entry[2]: i for i, entry in enumerate(self.index)}
+
+	def __len__(self):
+		return len(self.index)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self):
+		self._mmap.close()
+
+	def rows(self):
+		"""Rows as readCorpusCSV returns them: [author, member path, title]."""
+		return [[author, self.path + MEMBER_SEPARATOR + path, title] for author, title, path, _, _ in self.index]
+
+	def text_bytes(self, i):
+		"""The UTF-8 text of the i-th document, as a memoryview of the mapping (no copy)."""
+		_, _, _, offset, length = self.index[i]
+		return memoryview(self._mmap)[offset:offset + length]
+
+	def text(self, i):
+		with self.text_bytes(i) as data:
+			return str(data, "utf-8")
+
+	def member(self, member_path):
+		"""Index of a document by its original path."""
+		return self._members[member_path]
+
+	def documents(self):
+		"""Documents (author, title, text, member path) of the whole archive, with their texts."""
+		return [Document(author, title, self.text(i) + "\n", self.path + MEMBER_SEPARATOR + path)
+			for i, (author, title, path, _, _) in enumerate(self.index)]
+
+
+def open_archive(path):
+	"""An open CorpusArchive for path, shared by all callers and reopened when the file changes."""
+	path = os.path.abspath(path)
+	stat = os.stat(path)
+	# pack_corpus replaces the file, so a new archive has a new inode.
+	version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+	opened = _open_archives.get(path)
+	if opened is None or opened[0] != version:
+		# the old archive isn't closed: texts may still be read from it by other threads.
+		opened = (version, CorpusArchive(path))
+		_open_archives[path] = opened
+	return opened[1]
+
+
+def read_member(member_path):
+	"""Text and size in bytes of a document given by its member path (archive path::original path)."""
+	archive_path, _, path = str(member_path).partition(MEMBER_SEPARATOR)
+	archive = open_archive(archive_path)
+	try:
+		i = archive.member(path)
+	except KeyError:
+		raise FileNotFoundError(2, "No such document in corpus archive", str(member_path))
+	return archive.text(i), archive.index[i][4]
@@ -1,4 +1,4 @@
-from pathlib import Path
+from backend.CSVIO import readDocument
 
 class Document:
 	'''Document object'''
@@ -35,15 +35,11 @@ class Document:
 		else:
 			self.eventSet += eventSet
 	
+	def event_count(self):
+		return len(self.eventSet)
+
 	def read_self(self, encoding=None):
-		try:
-			self.text = Path(self.filepath).read_text()
-		except UnicodeError:
-			try:
-				self.text = Path(self.filepath).read_text(encoding="UTF-8")
-			except UnicodeError:
-				self.text = Path(self.filepath).read_text(encoding="ISO-8859-15")
-		self.text += "\n"
+		self.text = readDocument(self.filepath) + "\n"
 		return self.text
 	
 	def __repr__(self):
@@ -51,7 +47,10 @@ class Document:
 			(str(self.author), str(self.title), str(self.text[:10]), str(self.eventSet)[:10]+"...", str(self.filepath))
 
 	def __eq__(self, other):
+		if self is other: return True
 		try:
+			# cheap attributes first, before comparing texts and event sets.
+			if not self.is_same_doc(other): return False
 			for att in self.__dict__:
 				if att[0] != "_" and self.__dict__[att] != other.__dict__[att]:
 					return False
@@ -40,6 +40,7 @@ from idlelib.tooltip import Hovertip
 # local modules
 from backend.CSVIO import readDocument, readCorpusCSV, readExperimentCSV
 import util.MultiprocessLoading as MultiprocessLoading
+from util.StartupProfiler import finish_profiling, phase
 from backend.Document import Document
 from backend import CSVIO
 import Constants
@@ -139,7 +140,7 @@ class PyGAAP_GUI:
 
 	def __init__(self):
 		# no internal error handling because fatal error.
-		with open(Path("./resources/gui_params.json"), "r") as f:
+		with open(Path("./resources/gui_params.json"), "r") as f, phase("load resources/gui_params.json"):
 			params = json_load(f)
 			self.gui_params = params
 			self.gui_params["styles"]["JGAAP_blue"]
@@ -147,14 +148,15 @@ class PyGAAP_GUI:
 
 		try:
 			f = open(Path("./resources/search_dictionary.json"), "r")
-			self.search_dictionary = json_load(f)
+			with phase("load resources/search_dictionary.json"):
+				self.search_dictionary = json_load(f)
 			f.close()
 		except FileNotFoundError:
 			self.search_dictionary = dict()
 			print("Search dictionary not found.")
 
 		try:
-			with open(Path("./resources/tooltips.json"), "r") as f:
+			with open(Path("./resources/tooltips.json"), "r") as f, phase("load resources/tooltips.json"):
 				self.tooltips = json_load(f)
 		except FileNotFoundError:
 			self.tooltips = dict()
@@ -664,7 +666,8 @@ class PyGAAP_GUI:
 				assert filename != None, "load_save_csv() autoload corpus cannot be empty"
 			elif function == "load" or function == "load_clear":
 				filename = askopenfilename(
-					filetypes = (("Comma separated values", "*.csv"), ("Text File", "*.txt"), ("All Files", "*.*")),
+					filetypes = (("Comma separated values", "*.csv"), ("Corpus archive", "*.pgca"),
+						("Text File", "*.txt"), ("All Files", "*.*")),
 					title = "Load corpus csv", multiple = False
 				)
 			corpus_list = readCorpusCSV(filename)
@@ -1497,7 +1500,7 @@ class PyGAAP_GUI:
 		if GUI_debug >= 3: print("check_DF_listbox()")
 		try:
 			if self.backend_API.analysisMethods[lbAv.get(lbAv.curselection())]\
-					.__dict__.get("_NoDistanceFunction_", False):
+					.class_attribute("_NoDistanceFunction_", False):
 				lbOp.config(state = DISABLED)
 			else:
 				lbOp.config(state = NORMAL)
@@ -1902,13 +1905,18 @@ class PyGAAP_GUI:
 		self.tabs.add(self.tabs_frames["Tab_ReviewProcess"], text = "Review & Process")
 
 		# add various tabs
-		self._review_process_tab(self.tabs)
-		self._documents_tab()
-		self._unified_tabs()
-
-		self._load_modules_to_GUI(True)
+		with phase("review & process tab"):
+			self._review_process_tab(self.tabs)
+		with phase("documents tab"):
+			self._documents_tab()
+		with phase("module tabs"):
+			self._unified_tabs()
+
+		with phase("list modules"):
+			self._load_modules_to_GUI(True)
 		self._bottom_frame()
-		self.change_style(self.topwindow)
+		with phase("change style"):
+			self.change_style(self.topwindow)
 
 	def change_style(self, parent_widget):
 		"""This changes the colors of the widgets."""
@@ -2014,11 +2022,15 @@ class PyGAAP_GUI:
 		from backend.API import API
 		###############################
 		#### BACKEND API ##############
-		self.backend_API = API("place-holder")
+		with phase("create API"):
+			self.backend_API = API("place-holder")
 		###############################
 		###############################
 		pipe_from.send("Starting GUI")
-		self.gui()
+		with phase("build GUI"):
+			self.gui()
 		pipe_from.send(-1)
 		pipe_from.close()
+		# start-up ends when the window is ready.
+		finish_profiling()
 		self.topwindow.mainloop()
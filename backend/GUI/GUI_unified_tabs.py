@@ -5,9 +5,15 @@
 from tkinter import *
 from tkinter import ttk
 from idlelib.tooltip import Hovertip
+from util.StartupProfiler import phase
 
-# This function creates canonicizers, event drivers, event culling, and analysis methods tabs.
 def create_module_tab(tab_frame: Frame, available_content: list, parameters_content: str = None, **extra):
+	"""Creates a module tab (see _create_module_tab), timed as a start-up phase."""
+	with phase("%s tab widgets" % (parameters_content or available_content[0])):
+		return _create_module_tab(tab_frame, available_content, parameters_content, **extra)
+
+# This function creates canonicizers, event drivers, event culling, and analysis methods tabs.
+def _create_module_tab(tab_frame: Frame, available_content: list, parameters_content: str = None, **extra):
 	"""
 	creates a tab of available-buttons-selected-description tab.
 	See PyGAAP_developer_manual.md for list of major widgets/frames.
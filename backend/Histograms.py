@@ -1,3 +1,5 @@
+from backend.PrepareNumbers import VocabularyBuilder
+
 def generateKnownDocsAbsoluteHistogramSet(documents):
 	'''Generates a dictionary where author names are keys and values are lists of absolute dictionary-based histograms.'''
 	# Create a dictionary of lists of documents by different authors.
@@ -74,6 +76,16 @@ def normalizeHistogram(histogram):
 
 	return normHist
 
+def histogramsToMatrix(histograms, **options):
+	'''
+	Returns a sparse (CSR) matrix with one row per histogram and the events of its columns.
+	Histograms can be dictionary-based histograms or event lists, and are added one at a time.
+	Options are passed to backend.PrepareNumbers.VocabularyBuilder (e.g. n_features for feature hashing,
+	in which case the events are None).
+	'''
+	builder = VocabularyBuilder(**options).add_all(histograms)
+	return builder.to_csr(), (builder.feature_names() if builder.n_features <= 0 else None)
+
 def _generateAuthorDocumentDictionary(documents):
 	'''Generates a dictionary of lists of documents by author.'''
 	docsByAuthor = dict()
@@ -0,0 +1,105 @@
+"""
+Per-stage and per-module metrics of an experiment.
+
+Each stage (reading documents, each canonicizer, event driver, event culler and
+embedder, streaming pre-processing, and the training and analysis of each analysis method) records:
+	wall_seconds, cpu_seconds: time taken, and CPU time of the experiment's own process
+		(work done in worker processes is in the wall time only),
+	peak_rss_mb: the process's largest resident memory so far, at the end of the stage
+		(None where the resource module isn't available, e.g. Windows),
+	documents, documents_per_second,
+	events, events_per_second: events after the stage, for event drivers and cullers,
+	bytes, bytes_per_second: bytes read, for reading documents,
+	feature_matrix: shape, nonzero and density, for embedders.
+Records are plain dicts of numbers and strings, so they can be saved as JSON.
+"""
+
+from contextlib import contextmanager
+from sys import platform
+from time import perf_counter, process_time
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+
+def peak_rss_mb():
+	"""Largest resident set size of this process so far, in MB. None if unknown."""
+	if resource is None: return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# bytes on macOS, KB on Linux.
+	return peak / 2**20 if platform == "darwin" else peak / 2**10
+
+
+def count_events(docs):
+	return sum(d.event_count() for d in docs)
+
+
+def matrix_metrics(numbers):
+	"""Shape, number of nonzero values and density of a dense or sparse (docs x features) matrix."""
+	# numpy isn't imported at the top, to not slow down start-up.
+	from numpy import count_nonzero
+	rows, columns = numbers.shape[0], (numbers.shape[1] if len(numbers.shape) > 1 else 1)
+	# scipy sparse arrays have nnz.
+	nonzero = int(numbers.nnz if hasattr(numbers, "nnz") else count_nonzero(numbers))
+	return {"shape": [int(rows), int(columns)], "nonzero": nonzero,
+		"density": nonzero / (rows * columns) if rows * columns > 0 else 0.0}
+
+
+class ExperimentMetrics:
+
+	def __init__(self, verbose=False):
+		self.records = []
+		self.verbose = verbose
+
+	@contextmanager
+	def stage(self, stage, module=None, docs=None):
+		"""
+		Times a stage. The yielded record can be updated inside the block, e.g. with
+		```record["events"] = ...``` or ```record["feature_matrix"] = matrix_metrics(...)```.
+		The record is only kept if the block finishes without an exception.
+		"""
+		record = {"stage": stage, "module": module}
+		start_wall, start_cpu = perf_counter(), process_time()
+		yield record
+		record["wall_seconds"] = perf_counter() - start_wall
+		record["cpu_seconds"] = process_time() - start_cpu
+		record["peak_rss_mb"] = peak_rss_mb()
+		if docs is not None:
+			record["documents"] = len(docs)
+			record["documents_per_second"] = _rate(len(docs), record["wall_seconds"])
+		if "events" in record:
+			record["events_per_second"] = _rate(record["events"], record["wall_seconds"])
+		if "bytes" in record:
+			record["bytes_per_second"] = _rate(record["bytes"], record["wall_seconds"])
+		self.records.append(record)
+		if self.verbose:
+			print("  " + format_record(record))
+
+	def stages(self, *stage_names):
+		"""Records of the given stages, in the order they ran."""
+		return [r for r in self.records if r["stage"] in stage_names]
+
+
+def _rate(count, seconds):
+	return count / seconds if seconds > 0 else None
+
+
+def format_record(record):
+	"""One line summary of a stage record."""
+	text = "%s%s: %.3fs wall, %.3fs CPU" % (record["stage"],
+		" (%s)" % record["module"] if record["module"] is not None else "",
+		record["wall_seconds"], record["cpu_seconds"])
+	if record.get("documents_per_second") is not None:
+		text += ", %.1f docs/s" % record["documents_per_second"]
+	if record.get("events_per_second") is not None:
+		text += ", %d events (%.0f/s)" % (record["events"], record["events_per_second"])
+	if record.get("bytes_per_second") is not None:
+		text += ", %.1f MB/s" % (record["bytes_per_second"] / 2**20)
+	if "feature_matrix" in record:
+		matrix = record["feature_matrix"]
+		text += ", features %dx%d (density %.4f)" % (matrix["shape"][0], matrix["shape"][1], matrix["density"])
+	if record["peak_rss_mb"] is not None:
+		text += ", peak RSS %.0f MB" % record["peak_rss_mb"]
+	return text
@@ -0,0 +1,194 @@
+"""
+Discovers PyGAAP's modules without importing them.
+
+The generic module files (generics/*.py) and the files in generics/modules/ are
+parsed (not imported) to find the direct subclasses of the six module types,
+with their display names, descriptions and literal class attributes such as
+_variable_options. Each is registered as a LazyModule, which only imports the
+file that defines it when the module is created (or when something the scan
+couldn't read is needed), so e.g. a character n-gram + centroid experiment
+doesn't load transformers, torch or sklearn.
+"""
+
+import ast
+from importlib import import_module
+from pathlib import Path
+
+# base class: API module type.
+MODULE_TYPES = {
+	"Canonicizer": "Canonicizers",
+	"EventDriver": "EventDrivers",
+	"EventCulling": "EventCulling",
+	"Embedding": "Embeddings",
+	"AnalysisMethod": "AnalysisMethods",
+	"DistanceFunction": "DistanceFunctions",
+}
+
+# singular names for error messages.
+_TYPE_NAMES = {
+	"Canonicizers": "canonicizers", "EventDrivers": "event drivers", "EventCulling": "event cullers",
+	"Embeddings": "embedders", "AnalysisMethods": "analysis methods", "DistanceFunctions": "distance functions",
+}
+
+# calls allowed in class attributes read by the scan.
+_SAFE_CALLS = {"range": range, "list": list, "tuple": tuple, "dict": dict, "set": set}
+
+
+def _literal(node):
+	"""
+	Value of an expression made of literals, +, * and unary -, and calls to range, list, tuple, dict, set.
+	Raises ValueError for anything else (e.g. names or lambdas): those are read by importing the module.
+	"""
+	if isinstance(node, ast.Constant):
+		return node.value
+	if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+		values = [_literal(e) for e in node.elts]
+		return {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)](values)
+	if isinstance(node, ast.Dict):
+		if None in node.keys: raise ValueError("Dict unpacking")
+		return {_literal(k): _literal(v) for k, v in zip(node.keys, node.values)}
+	if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mult)):
+		left, right = _literal(node.left), _literal(node.right)
+		return left + right if isinstance(node.op, ast.Add) else left * right
+	if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+		return -_literal(node.operand)
+	if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _SAFE_CALLS \
+			and not node.keywords:
+		return _SAFE_CALLS[node.func.id](*[_literal(a) for a in node.args])
+	raise ValueError("Not a literal: %s" % type(node).__name__)
+
+
+def _returned_literal(function):
+	"""The value returned by a function whose body is (a docstring and) one return statement. None if unknown."""
+	body = [s for s in function.body if not (isinstance(s, ast.Expr) and isinstance(s.value, ast.Constant))]
+	if len(body) != 1 or not isinstance(body[0], ast.Return) or body[0].value is None:
+		return None
+	try:
+		value = _literal(body[0].value)
+	except (ValueError, TypeError):
+		return None
+	return value if isinstance(value, str) else None
+
+
+class LazyModule:
+	"""
+	A module class found by the scan. Calling it creates the module, importing its file first.
+	displayName() and displayDescription() don't import anything if the scan could read them;
+	other attributes are taken from the class body if they are literals, else from the imported class.
+	"""
+
+	def __init__(self, module_name, class_name, module_type, display_name, description=None, attributes=None, unread=()):
+		"""
+		attributes: literal attributes set in the class body.
+		unread: names of other attributes set in the class body, which need the import.
+		"""
+		self.module_name = module_name
+		self.class_name = class_name
+		self.module_type = module_type
+		self.display_name = display_name
+		self.description = description
+		self.attributes = attributes if attributes is not None else dict()
+		self.unread = set(unread)
+		self._class = None
+
+	def load(self):
+		"""Imports the module's file and returns its class."""
+		if self._class is None:
+			self._class = getattr(import_module(self.module_name), self.class_name)
+		return self._class
+
+	def is_loaded(self):
+		return self._class is not None
+
+	def __call__(self, *args, **kwargs):
+		return self.load()(*args, **kwargs)
+
+	def displayName(self):
+		return self.display_name
+
+	def displayDescription(self):
+		if self.description is None:
+			return self.load().displayDescription()
+		return self.description
+
+	def class_attribute(self, name, default=None):
+		"""An attribute set in the class body itself (not inherited), as in cls.__dict__.get(name, default)."""
+		if self._class is not None:
+			return self._class.__dict__.get(name, default)
+		if name in self.attributes:
+			return self.attributes[name]
+		if name in self.unread:
+			return self.load().__dict__.get(name, default)
+		return default
+
+	def __getattr__(self, name):
+		# only called for attributes not set in __init__.
+		if name.startswith("__") or name in ("attributes", "unread", "_class"):
+			raise AttributeError(name)
+		if self._class is None and name in self.attributes:
+			return self.attributes[name]
+		return getattr(self.load(), name)
+
+	def __repr__(self):
+		return "<LazyModule %s.%s%s>" % (self.module_name, self.class_name, "" if self.is_loaded() else " (not loaded)")
+
+
+def scan_file(path, module_name):
+	"""LazyModules for the classes in a Python file that directly subclass one of the module types."""
+	with open(path, "r", encoding="utf-8") as f:
+		tree = ast.parse(f.read(), filename=str(path))
+	found = []
+	for node in tree.body:
+		if not isinstance(node, ast.ClassDef): continue
+		bases = [b.id if isinstance(b, ast.Name) else b.attr if isinstance(b, ast.Attribute) else None
+			for b in node.bases]
+		base = next((b for b in bases if b in MODULE_TYPES), None)
+		if base is None: continue
+		functions = {s.name: s for s in node.body if isinstance(s, ast.FunctionDef)}
+		display_name = _returned_literal(functions["displayName"]) if "displayName" in functions else None
+		if display_name is None: continue
+		description = _returned_literal(functions["displayDescription"]) if "displayDescription" in functions else None
+		attributes, unread = dict(), set()
+		for statement in node.body:
+			if isinstance(statement, ast.Assign) and len(statement.targets) == 1 \
+					and isinstance(statement.targets[0], ast.Name):
+				name, value = statement.targets[0].id, statement.value
+			elif isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name) \
+					and statement.value is not None:
+				name, value = statement.target.id, statement.value
+			else: continue
+			try:
+				attributes[name] = _literal(value)
+				unread.discard(name)
+			except (ValueError, TypeError):
+				# e.g. validators (lambdas): importing the module is needed to read this attribute.
+				attributes.pop(name, None)
+				unread.add(name)
+		found.append(LazyModule(module_name, node.name, MODULE_TYPES[base], display_name, description, attributes, unread))
+	return found
+
+
+def discover(generics_dir="./generics"):
+	"""
+	Scans the generic module files and generics/modules/.
+	Returns {module type: {display name: LazyModule}}.
+
+	Raises ValueError if two modules of a type have the same display name, except
+	for copies in generics/modules/ of a class (same name) from a generic module file:
+	the class in the generic module file is used.
+	"""
+	generics_dir = Path(generics_dir)
+	registry = {module_type: dict() for module_type in MODULE_TYPES.values()}
+	files = [(generics_dir / ("%s.py" % base), "generics.%s" % base) for base in MODULE_TYPES]
+	files += [(path, "generics.modules.%s" % path.stem) for path in sorted((generics_dir / "modules").glob("*.py"))]
+	for path, module_name in files:
+		if not path.exists(): continue
+		for module in scan_file(path, module_name):
+			same_type = registry[module.module_type]
+			previous = same_type.get(module.display_name)
+			if previous is None:
+				same_type[module.display_name] = module
+			elif previous.class_name != module.class_name or previous.module_name.startswith("generics.modules."):
+				raise ValueError("Two %s can't both have the same displayed name: %s"
+					% (_TYPE_NAMES[module.module_type], module.display_name))
+	return registry
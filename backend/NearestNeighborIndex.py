@@ -0,0 +1,65 @@
+"""
+Approximate nearest-neighbour search for analysis methods with large sets of known documents.
+
+RandomProjectionIndex projects the known documents' features to a few dimensions
+with a random Gaussian matrix, which approximately preserves Euclidean distances
+(Johnson-Lindenstrauss). A query scans the projected documents to pick candidates,
+which the analysis method then ranks with its own distance function.
+More candidates: higher recall, slower queries.
+"""
+
+import numpy as np
+from scipy.sparse import issparse
+
+from backend import PrepareNumbers as pn
+
+
+class RandomProjectionIndex:
+
+	def __init__(self, dimensions=64, angular=False, seed=0):
+		"""
+		dimensions: number of projected dimensions.
+		angular: index the directions of the vectors (rows scaled to unit length),
+		for distances that only depend on the angle, e.g. cosine distance.
+		"""
+		self.dimensions = dimensions
+		self.angular = angular
+		self.seed = seed
+		self._projection = None
+		self._projected = None
+		self._projected_norms = None
+
+	def _project(self, matrix):
+		if self.angular:
+			lengths = np.sqrt(pn.row_sums_of_squares(matrix))
+			lengths[lengths == 0] = 1
+			matrix = pn.scale_rows(matrix, 1 / lengths)
+		projected = matrix @ self._projection
+		if issparse(projected):
+			projected = projected.toarray()
+		return np.asarray(projected, dtype=np.float32)
+
+	def fit(self, known):
+		"""Indexes the rows of a (docs x features) dense or CSR matrix."""
+		rng = np.random.default_rng(self.seed)
+		self._projection = rng.standard_normal((known.shape[1], self.dimensions)) / np.sqrt(self.dimensions)
+		self._projected = self._project(known)
+		self._projected_norms = np.sum(np.square(self._projected), axis=1)
+		return self
+
+	def query(self, unknown, n_candidates, block_rows=256):
+		"""
+		Indices (unknown x n_candidates) of the candidate known docs for each unknown row,
+		the nearest in the projected space. All docs if n_candidates is at least the number of docs.
+		"""
+		n_known = self._projected.shape[0]
+		if n_candidates >= n_known:
+			return np.tile(np.arange(n_known), (unknown.shape[0], 1))
+		projected = self._project(unknown)
+		candidates = np.empty((unknown.shape[0], n_candidates), dtype=np.int64)
+		for start in range(0, projected.shape[0], block_rows):
+			block = projected[start:start + block_rows]
+			# squared distances up to a per-row constant, which doesn't change the ranking.
+			distances = self._projected_norms - 2 * (block @ self._projected.T)
+			candidates[start:start + block_rows] = np.argpartition(distances, n_candidates - 1, axis=1)[:, :n_candidates]
+		return candidates
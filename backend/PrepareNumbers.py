@@ -16,11 +16,99 @@ doc2 >>      [4, 0, 12]]     [a2]]
 
 
 import numpy as np
-import pandas as pd
-from scipy.sparse import csr_array, coo_array, _arrays
+from zlib import crc32
+from scipy.sparse import csr_array, coo_array, issparse, vstack as sparse_vstack
 
 
 
+class VocabularyBuilder:
+	"""
+	Builds a (docs x features) CSR matrix one document at a time,
+	from either a histogram (dict of event: count) or a list of events.\n
+	Columns follow a stable vocabulary: each new event gets the next column,
+	so rows added later never move existing columns.\n
+	Options:\n
+	`dict vocabulary`: start from this vocabulary (event: column).\n
+	`bool fixed`: don't add new events; events not in the vocabulary are dropped.\n
+	`int n_features`: if > 0, use feature hashing instead of a vocabulary:
+	an event's column is the crc32 of its UTF-8 text modulo n_features.
+	"""
+
+	def __init__(self, **options):
+		self.vocabulary = dict(options.get("vocabulary", dict()))
+		self.fixed = options.get("fixed", False)
+		self.n_features = options.get("n_features", 0)
+		self._indices = []
+		self._data = []
+		self._row_lengths = []
+
+	def _columns(self, events):
+		"""Column of each event, -1 for events dropped from a fixed vocabulary."""
+		if self.n_features > 0:
+			return np.fromiter((crc32(str(e).encode("utf-8", "surrogatepass")) % self.n_features for e in events),
+				dtype=np.int64, count=len(events))
+		vocabulary = self.vocabulary
+		if self.fixed:
+			return np.fromiter((vocabulary.get(e, -1) for e in events), dtype=np.int64, count=len(events))
+		return np.fromiter((vocabulary.setdefault(e, len(vocabulary)) for e in events),
+			dtype=np.int64, count=len(events))
+
+	def add(self, item):
+		"""Adds a document: a histogram (dict of event: count) or a list of events."""
+		if isinstance(item, dict):
+			columns = self._columns(list(item.keys()))
+			counts = np.fromiter(item.values(), dtype=float, count=len(item))
+			keep = columns >= 0
+			columns, counts = columns[keep], counts[keep]
+			if self.n_features > 0:
+				# hash collisions: sum the counts of events sharing a column.
+				columns, inverse = np.unique(columns, return_inverse=True)
+				counts = np.bincount(inverse, weights=counts, minlength=columns.shape[0])
+		else:
+			columns = self._columns(item)
+			columns, counts = np.unique(columns[columns >= 0], return_counts=True)
+		order = np.argsort(columns, kind="stable")
+		self._indices.append(columns[order])
+		self._data.append(np.asarray(counts, dtype=float)[order])
+		self._row_lengths.append(columns.shape[0])
+		return self
+
+	def add_all(self, items):
+		"""Adds each document (histogram or list of events) in an iterable."""
+		for item in items:
+			self.add(item)
+		return self
+
+	def n_columns(self):
+		return self.n_features if self.n_features > 0 else len(self.vocabulary)
+
+	def feature_names(self):
+		"""Events in column order. Not available with feature hashing."""
+		if self.n_features > 0:
+			raise ValueError("Feature names are not kept with feature hashing")
+		names = [None] * len(self.vocabulary)
+		for event, column in self.vocabulary.items():
+			names[column] = event
+		return names
+
+	def to_csr(self):
+		"""All documents added so far as a CSR array, one row per document."""
+		indptr = np.zeros(len(self._row_lengths) + 1, dtype=np.int64)
+		np.cumsum(self._row_lengths, out=indptr[1:])
+		indices = np.concatenate(self._indices) if self._indices else np.zeros(0, dtype=np.int64)
+		data = np.concatenate(self._data) if self._data else np.zeros(0)
+		return csr_array((data, indices, indptr), shape=(len(self._row_lengths), self.n_columns()))
+
+	def to_sorted_csr(self):
+		"""
+		Same as to_csr(), but with columns in sorted order of the events
+		(the order used by sklearn's CountVectorizer). Returns the matrix and the sorted events.
+		"""
+		names = self.feature_names()
+		order = sorted(range(len(names)), key=names.__getitem__)
+		return csr_array(self.to_csr()[:, order]), [names[i] for i in order]
+
+
 def dicts_to_array(events: list, **options) -> np.ndarray:
 	"""
 	Converts list of dictionaries to a single NumPy array.\n
@@ -31,13 +119,13 @@ def dicts_to_array(events: list, **options) -> np.ndarray:
 	[1, 2, 0]\n
 	[3, 0, 4]\n
 	Options: `bool sort_keys`: whether to sort dict keys (usually used for debugging only.)
+	Columns are otherwise in order of first appearance.
+	For large vocabularies, use VocabularyBuilder directly to keep the matrix sparse.
 	"""
-	sorted = options.get("sort_keys", False)
-	cols = list(set([dict_keys for dic in events for dict_keys in list(dic.keys())]))
-	if sorted: cols.sort()
-	df = pd.DataFrame(events).fillna(0)[cols].values
-
-	return np.array(df)
+	builder = VocabularyBuilder().add_all(events)
+	if options.get("sort_keys", False):
+		return builder.to_sorted_csr()[0].toarray()
+	return builder.to_csr().toarray()
 
 
 def auth_list_to_labels(auth_list, **options):
@@ -67,18 +155,164 @@ def auth_list_to_labels(auth_list, **options):
 	return labels, labels_to_categories
 	
 
-def find_mean_per_author(data, labels):
-	"""Finds the mean per category. Equivalent to finding mean author histogram"""
-	label_set = np.unique(labels[:,0])
-	means = np.zeros((label_set.shape[0], data.shape[1]))
-	row = 0
-	
-	for label in label_set:
-		this_category = data[np.where(labels[:,0] == label)]
-		if type(data) == np.ndarray:
-			this_category = np.mean(this_category, axis=0, keepdims=1)
-		elif type(data) == _arrays.csr_array:
-			this_category = this_category.mean(axis=0)
-		means[row]=this_category
-		row += 1
+def label_indicator(labels):
+	"""
+	Sparse (categories x docs) matrix with a 1 where a doc belongs to a category,
+	and the sorted categories. Multiplying it with a (docs x features) matrix sums the rows per category.
+	"""
+	labels = np.asarray(labels).ravel()
+	label_set, label_index = np.unique(labels, return_inverse=True)
+	indicator = csr_array((np.ones(labels.shape[0]), (label_index, np.arange(labels.shape[0]))),
+		shape=(label_set.shape[0], labels.shape[0]))
+	return indicator, label_set
+
+
+def sum_per_author(data, labels):
+	"""Sums of the rows of data per category, dense, and the number of rows and the sorted categories."""
+	indicator, label_set = label_indicator(labels)
+	sums = indicator @ data
+	if issparse(sums):
+		sums = sums.toarray()
+	counts = np.diff(indicator.indptr)
+	return np.asarray(sums, dtype=float), counts, label_set
+
+
+def find_mean_per_author(data, labels, **options):
+	"""
+	Finds the mean per category. Equivalent to finding mean author histogram.\n
+	Computed as one sparse product of a category-indicator matrix with data (dense or sparse).\n
+	Options: `bool return_counts`: also return the number of docs per category,
+	for use with ```update_mean_per_author```.
+	"""
+	sums, counts, label_set = sum_per_author(data, labels)
+	means = sums / counts[:, np.newaxis]
+	if options.get("return_counts", False):
+		return means, label_set.reshape((means.shape[0],1)), counts
 	return means, label_set.reshape((means.shape[0],1))
+
+
+def update_mean_per_author(means, means_labels, counts, data, labels):
+	"""
+	Adds rows to the means found by ```find_mean_per_author(..., return_counts=True)```.\n
+	Only the categories in labels are recomputed, from their old mean, their count and the new rows.
+	New categories are added in sorted order after the existing ones.
+	If data has more columns than means (e.g. new events appended to a vocabulary),
+	the means are padded with zeros.\n
+	Returns the updated means, labels and counts.
+	"""
+	sums, new_counts, label_set = sum_per_author(data, labels)
+	if sums.shape[1] > means.shape[1]:
+		means = np.pad(means, ((0, 0), (0, sums.shape[1] - means.shape[1])))
+	old_labels = means_labels[:,0]
+	existing = np.isin(label_set, old_labels)
+	rows = np.searchsorted(old_labels, label_set[existing], sorter=np.argsort(old_labels))
+	rows = np.argsort(old_labels)[rows]
+
+	means = means.copy()
+	counts = np.asarray(counts).copy()
+	total = counts[rows] + new_counts[existing]
+	means[rows] = (means[rows] * counts[rows][:, np.newaxis] + sums[existing]) / total[:, np.newaxis]
+	counts[rows] = total
+
+	means = np.vstack([means, sums[~existing] / new_counts[~existing][:, np.newaxis]])
+	counts = np.concatenate([counts, new_counts[~existing]])
+	means_labels = np.concatenate([old_labels, label_set[~existing]]).reshape((means.shape[0],1))
+	return means, means_labels, counts
+
+
+def k_nearest(distances, labels, k):
+	"""
+	The k nearest known docs for each row of a (unknown x known) distance matrix,
+	found with argpartition instead of sorting whole rows.\n
+	labels: label of each known doc, or a label per entry of distances
+	(e.g. when each row holds the distances to different candidate docs).\n
+	Returns (indices, distances), both (unknown x k), nearest first.
+	Equal distances are ordered by label, then by position, as sorting [distance, label] pairs would.
+	"""
+	distances = np.asarray(distances)
+	labels = _labels_per_entry(labels, distances.shape)
+	k = min(k, distances.shape[1])
+	rows = np.arange(distances.shape[0])[:, np.newaxis]
+	if k < distances.shape[1]:
+		nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+	else:
+		nearest = np.tile(np.arange(k), (distances.shape[0], 1))
+	nearest_distances = distances[rows, nearest]
+	# rows with more docs at the k-th distance than were taken: choose among those by label.
+	kth = nearest_distances.max(axis=1)
+	tied_rows = np.flatnonzero(np.sum(distances <= kth[:, np.newaxis], axis=1) > k)
+	for row in tied_rows:
+		candidates = np.flatnonzero(distances[row] <= kth[row])
+		nearest[row] = candidates[np.lexsort((labels[row, candidates], distances[row, candidates]))[:k]]
+	nearest_distances = distances[rows, nearest]
+	order = np.lexsort((labels[rows, nearest], nearest_distances), axis=1)
+	nearest = nearest[rows, order]
+	return nearest, distances[rows, nearest]
+
+
+def _labels_per_entry(labels, shape):
+	"""Labels as an array of the given (unknown x known) shape."""
+	labels = np.asarray(labels)
+	if labels.size == shape[1]:
+		return np.broadcast_to(labels.ravel(), shape)
+	return labels.reshape(shape)
+
+
+def k_nearest_votes(distances, labels, k, n_labels):
+	"""
+	Votes of the k nearest known docs for each row of a (unknown x known) distance matrix (see k_nearest).\n
+	Returns three (unknown x n_labels) arrays: the number of votes per label,
+	the mean and the minimum distance of the voting docs per label (NaN and inf for labels without votes).
+	"""
+	distances = np.asarray(distances)
+	labels = _labels_per_entry(labels, distances.shape)
+	nearest, nearest_distances = k_nearest(distances, labels, k)
+	n_rows = nearest.shape[0]
+	rows = np.arange(n_rows)[:, np.newaxis]
+	# offset each row's labels so one bincount counts all rows.
+	flat_labels = (labels[rows, nearest] + rows * n_labels).ravel()
+	votes = np.bincount(flat_labels, minlength=n_rows * n_labels).reshape((n_rows, n_labels))
+	sums = np.bincount(flat_labels, weights=nearest_distances.ravel(), minlength=n_rows * n_labels)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		means = sums.reshape((n_rows, n_labels)) / votes
+	minimums = np.full(n_rows * n_labels, np.inf)
+	np.minimum.at(minimums, flat_labels, nearest_distances.ravel())
+	return votes, means, minimums.reshape((n_rows, n_labels))
+
+
+def stack_rows(rows):
+	"""
+	Stacks per-document rows (e.g. ```Document.numbers```) into one matrix.\n
+	Sparse rows are stacked into a CSR array; anything else into a NumPy array.
+	"""
+	if len(rows) > 0 and issparse(rows[0]):
+		return csr_array(sparse_vstack(rows, format="csr"))
+	return np.array(rows)
+
+
+def row_sums_of_squares(matrix):
+	"""Sum of squares of each row as a 1D array. Works for dense and sparse matrices."""
+	if issparse(matrix):
+		return np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+	return np.sum(np.square(matrix), axis=1)
+
+
+def dense_dot(a, b):
+	"""a @ b.T as a dense NumPy array, for any mix of dense and sparse inputs."""
+	product = a @ b.transpose()
+	if issparse(product):
+		return product.toarray()
+	return np.asarray(product)
+
+
+def scale_rows(matrix, factors):
+	"""
+	Multiplies each row of the matrix by the corresponding factor.\n
+	Sparse matrices stay sparse (CSR); rows that are entirely zero are left as is.
+	"""
+	factors = np.asarray(factors, dtype=float).ravel()
+	if issparse(matrix):
+		matrix = csr_array(matrix, dtype=float)
+		matrix.data *= np.repeat(factors, np.diff(matrix.indptr))
+		return matrix
+	return matrix * factors[:, np.newaxis]
@@ -0,0 +1,102 @@
+"""
+Content-addressed on-disk cache of canonicized texts and event sets.
+
+An entry is keyed by the hash of a document's text together with the names and
+parameters of the canonicizers (in order) and the event drivers, and the experiment's
+global parameters (e.g. the language, which tokenizers read), so any change to the text,
+the modules or the language misses the cache instead of returning stale events.
+Entries store the events as their unique strings plus an index array, compressed.
+The least recently used entries are removed when the cache grows past its size limit.
+"""
+
+import os
+import pickle
+import zlib
+from hashlib import sha256
+from json import dumps as json_dumps
+from pathlib import Path
+
+import numpy as np
+
+ENTRY_SUFFIX = ".pgc"
+
+
+def module_signature(modules):
+	"""Names and public parameters of modules, in order, as a JSON string."""
+	return json_dumps([
+		[mod.__class__.displayName(),
+		{p:mod.__dict__[p] for p in sorted(mod.__dict__) if not p.startswith("_")}]
+		for mod in modules
+	], default=repr)
+
+
+class PreprocessCache:
+
+	def __init__(self, cache_dir, max_size=1024):
+		"""cache_dir: directory for the entries. max_size: size limit in MB."""
+		self.cache_dir = Path(cache_dir)
+		self.cache_dir.mkdir(parents=True, exist_ok=True)
+		self.max_bytes = int(max_size * 2**20)
+		self.hits = 0
+		self.misses = 0
+		self._size = sum(f.stat().st_size for f in self.cache_dir.glob("*" + ENTRY_SUFFIX))
+
+	def key(self, text, canonicizers, event_drivers, global_parameters=None):
+		"""Cache key for a document's text processed by the given modules with the given global parameters."""
+		h = sha256(sha256(text.encode("utf-8", "surrogatepass")).digest())
+		h.update(module_signature(canonicizers).encode("utf-8"))
+		h.update(b"\0")
+		h.update(module_signature(event_drivers).encode("utf-8"))
+		h.update(b"\0")
+		h.update(json_dumps(global_parameters, sort_keys=True, default=repr).encode("utf-8"))
+		return h.hexdigest()
+
+	def _path(self, key):
+		return self.cache_dir / (key + ENTRY_SUFFIX)
+
+	def get(self, key):
+		"""Returns (canonicized text, event list) for the key, or None on a miss."""
+		path = self._path(key)
+		try:
+			with open(path, "rb") as f:
+				canonicized, unique_events, indices = pickle.loads(zlib.decompress(f.read()))
+			os.utime(path) # mark as recently used
+		except (OSError, zlib.error, pickle.UnpicklingError, ValueError, EOFError):
+			self.misses += 1
+			return None
+		self.hits += 1
+		return canonicized, [unique_events[i] for i in indices.tolist()]
+
+	def put(self, key, canonicized, events):
+		"""Stores the canonicized text and events under the key, then evicts old entries if needed."""
+		unique_events = {}
+		indices = np.fromiter((unique_events.setdefault(e, len(unique_events)) for e in events),
+			dtype=np.int32, count=len(events))
+		data = zlib.compress(pickle.dumps((canonicized, list(unique_events), indices),
+			protocol=pickle.HIGHEST_PROTOCOL), 1)
+		path = self._path(key)
+		# write then rename, so concurrent readers never see a partial entry.
+		temporary_path = path.with_suffix(".%d.tmp" % os.getpid())
+		with open(temporary_path, "wb") as f:
+			f.write(data)
+		os.replace(temporary_path, path)
+		self._size += len(data)
+		if self._size > self.max_bytes:
+			self.evict()
+
+	def evict(self):
+		"""Deletes least recently used entries until the cache is within its size limit."""
+		entries = []
+		for f in self.cache_dir.glob("*" + ENTRY_SUFFIX):
+			try:
+				stat = f.stat()
+			except OSError: continue
+			entries.append((stat.st_mtime, stat.st_size, f))
+		entries.sort()
+		self._size = sum(e[1] for e in entries)
+		for _, size, f in entries:
+			if self._size <= self.max_bytes: break
+			try:
+				f.unlink()
+			except OSError: continue
+			self._size -= size
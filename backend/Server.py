@@ -0,0 +1,183 @@
+"""
+Local HTTP server that keeps a trained pipeline (backend.TrainedPipeline) loaded
+and attributes documents sent to it, so clients don't pay PyGAAP's start-up time per document.
+
+Endpoints (JSON):
+	POST /attribute	{"text": "..."} or {"texts": ["...", ...]}
+		-> {"results": [[[author, score], ...], ...]}, one ranked list per text, best first.
+	GET /stats	request, document and batch counters, latencies and throughput.
+
+Requests arriving at about the same time are attributed together in one batch:
+the batcher waits up to max_wait seconds for up to max_batch documents.
+If a batch fails, its requests are retried one by one, so only failing requests get an error (HTTP 500).
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue, Empty
+from threading import Event, Lock, Thread
+from time import perf_counter, time
+
+
+class _Request:
+	"""Texts of one HTTP request, waiting for their results."""
+
+	def __init__(self, texts):
+		self.texts = texts
+		self.results = None
+		self.error = None
+		self.done = Event()
+
+
+class AttributionBatcher:
+	"""Collects queued requests into batches and attributes each batch with one call to the pipeline."""
+
+	def __init__(self, pipeline, max_batch=64, max_wait=0.01):
+		self.pipeline = pipeline
+		self.max_batch = max_batch
+		self.max_wait = max_wait
+		self._queue = Queue()
+		self._lock = Lock()
+		self._started = time()
+		self._counters = {"requests": 0, "documents": 0, "batches": 0, "errors": 0,
+			"attribute_seconds": 0.0, "request_seconds": 0.0, "max_request_seconds": 0.0}
+		self._thread = Thread(target=self._run, daemon=True)
+		self._thread.start()
+
+	def attribute(self, texts):
+		"""Attributes texts, waiting for their batch. Returns ranked [author, score] lists."""
+		start = perf_counter()
+		request = _Request(texts)
+		self._queue.put(request)
+		request.done.wait()
+		elapsed = perf_counter() - start
+		with self._lock:
+			self._counters["requests"] += 1
+			self._counters["request_seconds"] += elapsed
+			self._counters["max_request_seconds"] = max(self._counters["max_request_seconds"], elapsed)
+		if request.error is not None:
+			raise request.error
+		return request.results
+
+	def _next_batch(self):
+		"""Blocks for the first request, then takes more until the batch is full or max_wait has passed."""
+		batch = [self._queue.get()]
+		size = len(batch[0].texts)
+		deadline = perf_counter() + self.max_wait
+		while size < self.max_batch:
+			remaining = deadline - perf_counter()
+			if remaining <= 0: break
+			try:
+				request = self._queue.get(timeout=remaining)
+			except Empty: break
+			batch.append(request)
+			size += len(request.texts)
+		return batch
+
+	def _attribute_requests(self, requests):
+		"""Attributes the texts of requests with one call to the pipeline and sets their results. Raises the pipeline's errors."""
+		texts = [text for request in requests for text in request.texts]
+		start = perf_counter()
+		try:
+			results = self.pipeline.attribute(texts)
+		finally:
+			with self._lock:
+				self._counters["attribute_seconds"] += perf_counter() - start
+		position = 0
+		for request in requests:
+			request.results = [sorted(r.items(), key=lambda author_score: author_score[1])
+				for r in results[position:position + len(request.texts)]]
+			position += len(request.texts)
+
+	def _run(self):
+		while True:
+			batch = self._next_batch()
+			with self._lock:
+				self._counters["batches"] += 1
+				self._counters["documents"] += sum(len(request.texts) for request in batch)
+			try:
+				self._attribute_requests(batch)
+			except Exception as error:
+				if len(batch) == 1:
+					batch[0].error = error
+				else:
+					# one request's texts can make the whole batch fail: retry each request on its own,
+					# so that only the requests that fail by themselves get an error.
+					for request in batch:
+						try:
+							self._attribute_requests([request])
+						except Exception as request_error:
+							request.error = request_error
+			with self._lock:
+				self._counters["errors"] += sum(request.error is not None for request in batch)
+			for request in batch:
+				request.done.set()
+
+	def stats(self):
+		with self._lock:
+			stats = dict(self._counters)
+		uptime = time() - self._started
+		stats["uptime_seconds"] = uptime
+		stats["mean_batch_size"] = stats["documents"] / stats["batches"] if stats["batches"] else 0
+		stats["mean_request_seconds"] = stats["request_seconds"] / stats["requests"] if stats["requests"] else 0
+		stats["documents_per_second"] = stats["documents"] / stats["attribute_seconds"] if stats["attribute_seconds"] else 0
+		return stats
+
+
+def make_handler(batcher):
+	"""Request handler class for a batcher."""
+
+	class AttributionHandler(BaseHTTPRequestHandler):
+
+		def _send_json(self, status, content):
+			body = json.dumps(content).encode("utf-8")
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def do_GET(self):
+			if self.path == "/stats":
+				self._send_json(200, batcher.stats())
+			else:
+				self._send_json(404, {"error": "Unknown path"})
+
+		def do_POST(self):
+			if self.path != "/attribute":
+				self._send_json(404, {"error": "Unknown path"})
+				return
+			try:
+				content = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+				texts = content["texts"] if "texts" in content else [content["text"]]
+				if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+					raise ValueError("Texts must be a list of strings")
+			except (ValueError, KeyError, TypeError) as error:
+				self._send_json(400, {"error": "Expected {\"text\": ...} or {\"texts\": [...]}: %s" % str(error)})
+				return
+			try:
+				self._send_json(200, {"results": batcher.attribute(texts) if texts else []})
+			except Exception as error:
+				self._send_json(500, {"error": str(error)})
+
+		def log_message(self, format, *args):
+			# don't print a line per request.
+			pass
+
+	return AttributionHandler
+
+
+def serve(pipeline, host="127.0.0.1", port=8372, **options):
+	"""
+	Serves the pipeline until interrupted.
+	Options: ```max_batch``` (documents per batch, default 64), ```max_wait``` (seconds, default 0.01).
+	"""
+	batcher = AttributionBatcher(pipeline, options.get("max_batch", 64), options.get("max_wait", 0.01))
+	server = ThreadingHTTPServer((host, port), make_handler(batcher))
+	print("Serving attribution on http://%s:%d (POST /attribute, GET /stats)" % (host, server.server_address[1]))
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
@@ -0,0 +1,107 @@
+"""
+A trained experiment pipeline that can be saved to disk and used to attribute new documents.
+
+The pipeline keeps the pre-processing modules with their parameters, the embedder with
+its fitted state (e.g. Frequency's vocabulary) and the trained analysis method
+(e.g. CentroidDriver's centroids, or an sklearn model), so attributing a document
+doesn't need the known documents again.
+
+Event cullers that need all documents at once (e.g. most-common events) can't be
+applied to a single new document. Only the leading per-document cullers are run when
+attributing; the embedder's fitted vocabulary already restricts the features to the
+events that were kept during training.
+"""
+
+import pickle
+from pathlib import Path
+
+from backend.Document import Document
+
+PIPELINE_VERSION = 1
+
+
+class TrainedPipeline:
+
+	def __init__(self, canonicizers, event_drivers, event_cullers, embedding, analysis_method, distance_function="NA"):
+		self.canonicizers = canonicizers
+		self.event_drivers = event_drivers
+		# leading event cullers that work one document at a time.
+		self.event_cullers = []
+		for ec in event_cullers:
+			if ec.get_process_single() is None: break
+			self.event_cullers.append(ec)
+		self.skipped_event_cullers = len(event_cullers) - len(self.event_cullers)
+		self.embedding = embedding
+		self.analysis_method = analysis_method
+		self.distance_function = distance_function
+
+	def _modules(self):
+		mods = self.canonicizers + self.event_drivers + self.event_cullers + [self.embedding, self.analysis_method]
+		if self.distance_function != "NA":
+			mods.append(self.distance_function)
+		return mods
+
+	def module_names(self):
+		"""Display names of the modules, per module type."""
+		return {
+			"Canonicizers": [c.__class__.displayName() for c in self.canonicizers],
+			"EventDrivers": [e.__class__.displayName() for e in self.event_drivers],
+			"EventCulling": [ec.__class__.displayName() for ec in self.event_cullers],
+			"Embeddings": [self.embedding.__class__.displayName()],
+			"AnalysisMethods": [self.analysis_method.__class__.displayName()],
+			"DistanceFunctions": [self.distance_function.__class__.displayName()
+				if self.distance_function != "NA" else "NA"],
+		}
+
+	def save(self, path):
+		"""Writes the pipeline to path."""
+		with open(path, "wb") as f:
+			pickle.dump({"version": PIPELINE_VERSION, "pipeline": self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+	@staticmethod
+	def load(path):
+		"""Reads a pipeline written by save()."""
+		with open(path, "rb") as f:
+			saved = pickle.load(f)
+		if not isinstance(saved, dict) or saved.get("version") != PIPELINE_VERSION:
+			raise ValueError("%s is not a trained pipeline of version %d" % (str(path), PIPELINE_VERSION))
+		pipeline = saved["pipeline"]
+		# attributing a few docs at a time: no worker processes.
+		for mod in pipeline._modules():
+			mod._pool = None
+			mod._default_multiprocessing = False
+		return pipeline
+
+	def pre_process(self, docs):
+		"""Canonicizes the docs and sets their event sets."""
+		for d in docs:
+			d.canonicized = None
+			d.setEventSet([], append=False)
+		for c in self.canonicizers:
+			c.process(docs)
+		for d in docs:
+			if d.canonicized is None or d.canonicized == "":
+				d.canonicized = d.text
+		for e in self.event_drivers:
+			e.process(docs)
+		for ec in self.event_cullers:
+			cull = ec.get_process_single()
+			for d in docs:
+				d.setEventSet(cull(d.eventSet), append=False)
+
+	def attribute(self, docs):
+		"""
+		Attributes unknown docs: a list of backend.Document, or of texts.
+		Returns one dict of author: score per doc, as analysis methods do.
+		"""
+		docs = [d if isinstance(d, Document) else Document(text=d) for d in docs]
+		self.pre_process(docs)
+		numbers = self.embedding.transform(docs)
+		return self.analysis_method.analyze(docs, numbers)
+
+	def attribute_files(self, paths):
+		"""Reads and attributes the documents at paths. Returns the documents and their results."""
+		docs = [Document("", Path(path).name, "", str(path)) for path in paths]
+		for d in docs:
+			d.read_self()
+		return docs, self.attribute(docs)
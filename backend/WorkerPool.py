@@ -0,0 +1,68 @@
+"""
+A process pool that lives for a whole experiment.
+
+The experiment creates one WorkerPool and hands it to every module as ```module._pool```,
+so workers are forked once instead of once per canonicizer, event driver and culler.
+Modules call ```pool_map(func, items, self._pool)```; with no shared pool
+(e.g. a module used outside an experiment) a temporary pool is used, as before.
+"""
+
+from multiprocessing import Pool, cpu_count
+
+
+def default_workers():
+	"""One process per CPU, leaving one for the main process. Never less than 1."""
+	return max(1, cpu_count() - 1)
+
+
+class WorkerPool:
+	"""
+	Lazily-started wrapper around multiprocessing.Pool.\n
+	With a single worker, nothing is forked and maps run in the calling process.
+	"""
+
+	def __init__(self, workers=0):
+		"""workers: number of processes. 0 or less to use ```default_workers()```."""
+		self.workers = workers if workers > 0 else default_workers()
+		self._pool = None
+
+	def __getstate__(self):
+		# multiprocessing pools can't be pickled. Modules carrying this pool
+		# are sent to workers, where their own maps run in-process.
+		return {"workers": 1, "_pool": None}
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def chunksize(self, n_items):
+		"""About four chunks per worker: few enough to keep per-task pickling low, enough to balance load."""
+		return max(1, -(-n_items // (self.workers * 4)))
+
+	def map(self, func, items, chunksize=None):
+		"""Same as Pool.map, but uses chunked imap on the persistent pool."""
+		items = list(items)
+		if self.workers <= 1 or len(items) <= 1:
+			return [func(i) for i in items]
+		if self._pool is None:
+			self._pool = Pool(self.workers)
+		if chunksize is None:
+			chunksize = self.chunksize(len(items))
+		return list(self._pool.imap(func, items, chunksize))
+
+	def close(self):
+		"""Stop the workers. The pool can still be used afterwards; it will start new ones."""
+		if self._pool is not None:
+			self._pool.close()
+			self._pool.join()
+			self._pool = None
+
+
+def pool_map(func, items, pool=None, chunksize=None):
+	"""Map func over items with the shared pool, or a temporary one if pool is None."""
+	if pool is not None:
+		return pool.map(func, items, chunksize)
+	with WorkerPool() as temporary_pool:
+		return temporary_pool.map(func, items, chunksize)
@@ -8,6 +8,7 @@
 
 
 from multiprocessing import Process, Queue, Pipe, Pool	
+from collections import Counter
 from copy import deepcopy
 from copy import copy as shallowcopy
 import re
@@ -19,8 +20,79 @@ from random import randint
 from json import load as json_load
 
 
-from backend.CSVIO import readDocument
+from backend.CSVIO import readDocuments
 from backend.Document import Document
+from backend.WorkerPool import WorkerPool, pool_map
+from backend.TrainedPipeline import TrainedPipeline
+from backend.Metrics import ExperimentMetrics, count_events, matrix_metrics
+from backend.PrepareNumbers import VocabularyBuilder
+
+STREAM_CHUNK_SIZE = 256 # documents read and pre-processed at a time in streaming experiments.
+
+
+class PreprocessingChain:
+	"""
+	Canonicizers, event drivers and per-document event cullers composed into
+	one function of a document's text. Used to fuse pre-processing so that
+	each document crosses process boundaries once, returning only its events.
+	"""
+
+	def __init__(self, canonicizers, event_drivers, event_cullers, return_canonicized=False, event_counters=None):
+		# lists of the modules' per-document functions (see get_process_single)
+		self.canonicizers = canonicizers
+		self.event_drivers = event_drivers
+		self.event_cullers = event_cullers
+		# return (canonicized text, events) instead of only the events.
+		self.return_canonicized = return_canonicized
+		# the event drivers' count_single, used by count() when there are no event cullers.
+		self.event_counters = event_counters
+
+	def canonicize(self, text):
+		canonicized = text
+		for canonicize in self.canonicizers:
+			canonicized = canonicize(canonicized)
+		if canonicized == "" or canonicized is None:
+			canonicized = text
+		return canonicized
+
+	def count(self, text):
+		"""Counts of the events of text (a Counter), without listing the events if the event drivers can count them."""
+		if self.event_counters is None or len(self.event_cullers) > 0:
+			return Counter(self(text))
+		canonicized = self.canonicize(text)
+		counts = Counter()
+		for count_events in self.event_counters:
+			counts.update(count_events(canonicized))
+		return counts
+
+	def __call__(self, text):
+		canonicized = self.canonicize(text)
+		events = []
+		for extract_events in self.event_drivers:
+			events += extract_events(canonicized)
+		for cull in self.event_cullers:
+			events = cull(events)
+		if self.return_canonicized:
+			return canonicized, events
+		return events
+
+
+class DocumentCounter:
+	"""
+	Reads a document and returns the counts of its events (dict of event: count)
+	after a PreprocessingChain, or None if the file can't be read. Used by streaming experiments,
+	so only the counts cross process boundaries.
+	"""
+
+	def __init__(self, chain):
+		self.chain = chain
+
+	def __call__(self, filepath):
+		try:
+			text = Document(filepath=filepath).read_self()
+		except (OSError, UnicodeError):
+			return None
+		return self.chain.count(text)
 
 
 class Experiment:
@@ -47,7 +119,24 @@ class Experiment:
 		#self.dpi_setting = options.get("dpi")
 		self.q = q
 		self.default_mp = api.default_mp
+		# number of worker processes shared by all stages. 0: one per CPU, minus one.
+		self.workers = options.get("workers", getattr(api, "default_workers", 0))
+		self._pool = None
+		# run per-document pre-processing stages as one task per document.
+		self.fused = options.get("fused", getattr(api, "default_fused", False))
+		# backend.PreprocessCache for canonicized texts and event sets, or None.
+		self.cache = options.get("cache", getattr(api, "preprocess_cache", None))
+		# reduce documents to event counts a chunk at a time, without keeping their texts or event sets.
+		self.streaming = options.get("streaming", getattr(api, "default_streaming", False))
+		# (counts, events) of the documents after streaming pre-processing: a (docs x events) CSR array
+		# and the event of each column.
+		self.streamed_counts = None
+		# set when run_pre_processing succeeded. The documents can then be reused
+		# by another experiment with the same pre-processing modules (skip_pre_processing).
+		self.pre_processing_done = False
 		self.results_message = ""
+		# backend.Metrics records of the stages run by the last run_experiment().
+		self.metrics = ExperimentMetrics()
 
 	def run_pre_processing(self, **options):
 		"""
@@ -58,20 +147,72 @@ class Experiment:
 		# dump_queue: when multi-processing,
 		# the shared queue to temporarily store the documents.
 		verbose = options.get("verbose", False)
-		if verbose and len(self.backend_API.modulesInUse["Canonicizers"]) > 0:
+		# clear results left on the documents by a previous run.
+		for doc in self.backend_API.documents:
+			doc.canonicized = None
+			doc.setEventSet([], append=False)
+
+		staged_canonicizers = self.backend_API.modulesInUse["Canonicizers"]
+		staged_event_drivers = self.backend_API.modulesInUse["EventDrivers"]
+		staged_event_cullers = self.backend_API.modulesInUse["EventCulling"]
+		succeeded_event_drivers = 0
+		failed_before_culling = False
+
+		# documents that need canonicizing and event extraction:
+		# all of them, or the cache misses.
+		docs_to_process = self.backend_API.documents
+		if self.cache is not None:
+			with self.metrics.stage("Pre-processing cache", docs=self.backend_API.documents) as record:
+				cache_keys = [self.cache.key(d.text, staged_canonicizers, staged_event_drivers,
+					self.backend_API.global_parameters)
+					for d in self.backend_API.documents]
+				docs_to_process = []
+				miss_keys = []
+				for d, key in zip(self.backend_API.documents, cache_keys):
+					cached = self.cache.get(key)
+					if cached is None:
+						docs_to_process.append(d)
+						miss_keys.append(key)
+					else:
+						d.canonicized = cached[0]
+						d.setEventSet(cached[1], append=False)
+				record["hits"] = len(self.backend_API.documents) - len(docs_to_process)
+			if verbose:
+				print("Pre-processing cache: %s/%s docs found" %
+					(str(len(self.backend_API.documents) - len(docs_to_process)),
+					str(len(self.backend_API.documents))))
+			if len(docs_to_process) == 0:
+				succeeded_event_drivers = len(staged_event_drivers)
+				staged_canonicizers = []
+				staged_event_drivers = []
+
+		if self.fused and len(docs_to_process) > 0:
+			# culled events aren't cached, so cullers are only fused without a cache.
+			fused_cullers = self._run_fused_pre_processing(docs_to_process,
+				verbose=verbose, fuse_cullers=self.cache is None)
+			if fused_cullers is not None:
+				succeeded_event_drivers = len(staged_event_drivers)
+				staged_canonicizers = []
+				staged_event_drivers = []
+				staged_event_cullers = staged_event_cullers[fused_cullers:]
+
+		if verbose and len(staged_canonicizers) > 0:
 			print("Canonicizers processing ...")
 		# for d in self.backend_API.documents:
 		# 	d.text = re.subn(re.compile("(?<!\r)\n"), "\r\n", d.text)[0]
-		for c in self.backend_API.modulesInUse["Canonicizers"]:
+		for c in staged_canonicizers:
 			if verbose: print("Running", c.__class__.displayName())
 			if self.pipe_here is not None:
 				self.pipe_here.send("Running canonicizers\n"+str(c.__class__.displayName()))
 			c._default_multiprocessing = self.default_mp
+			c._pool = self._pool
 			c._global_parameters = self.backend_API.global_parameters
 			try:
-				c.process(self.backend_API.documents, self.pipe_here)
+				with self.metrics.stage("Canonicizers", c.__class__.displayName(), docs_to_process):
+					c.process(docs_to_process, self.pipe_here)
 			except Exception as error:
 				# allow exp to continue if any or all canonicizers failed, but raise warning.
+				failed_before_culling = True
 				this_error = "\nCanonicizer failed: %s\n%s\n%s\n" %\
 					(c.__class__.displayName(), str(error), format_exc())
 				self.results_message += this_error
@@ -83,23 +224,28 @@ class Experiment:
 			if doc.canonicized == "" or doc.canonicized is None:
 				no_canon += 1
 				doc.canonicized = doc.text
-		if no_canon > 0 and len(self.backend_API.modulesInUse["Canonicizers"]) > 0:
+		if no_canon > 0 and len(staged_canonicizers) > 0:
 			print("! %s/%s docs had no canonicized texts, defaulting to original texts."
 				% (str(no_canon), str(len(self.backend_API.documents))))
 
 
-		if verbose: print("Event drivers processing ...")
-		succeeded_event_drivers = 0
-		for e in self.backend_API.modulesInUse["EventDrivers"]:
+		if verbose and len(staged_event_drivers) > 0: print("Event drivers processing ...")
+		for e in staged_event_drivers:
 			if verbose: print("Running", e.__class__.displayName())
 			if self.pipe_here is not None:
 				self.pipe_here.send("Running event drivers\n"+str(e.__class__.displayName()))
 			e._default_multiprocessing = self.default_mp
+			e._pool = self._pool
 			e._global_parameters = self.backend_API.global_parameters
 			try:
-				e.process(self.backend_API.documents, self.pipe_here)
+				with self.metrics.stage("EventDrivers", e.__class__.displayName(), docs_to_process) as record:
+					events_before = count_events(docs_to_process)
+					e.process(docs_to_process, self.pipe_here)
+					# events extracted by this event driver.
+					record["events"] = count_events(docs_to_process) - events_before
 				succeeded_event_drivers += 1
 			except Exception as error:
+				failed_before_culling = True
 				this_error = "\nEvent driver failed: %s\n%s\n%s\n" %\
 					(e.__class__.displayName(), str(error), format_exc())
 				self.results_message += this_error
@@ -116,7 +262,7 @@ class Experiment:
 			return exp_return if self.return_results else 1
 
 		# abort if any doc ends up having no events.
-		empty_event_sets = [doc.title for doc in self.backend_API.documents if len(doc.eventSet)==0]
+		empty_event_sets = [doc.title for doc in self.backend_API.documents if doc.event_count()==0]
 		if len(empty_event_sets) > 0:
 			this_error = ("%s/%s docs had no event sets after event extraction."
 				% (str(len(empty_event_sets)), str(len(self.backend_API.documents))))
@@ -126,17 +272,25 @@ class Experiment:
 			)
 			return exp_return if self.return_results else 1
 
+		if self.cache is not None and not failed_before_culling:
+			for d, key in zip(docs_to_process, miss_keys):
+				self.cache.put(key, d.canonicized, d.eventSet)
 
-		if verbose and len(self.backend_API.modulesInUse["EventCulling"]) > 0:
+		if verbose and len(staged_event_cullers) > 0:
 			print("Event Cullers processing ...")
-		for ec in self.backend_API.modulesInUse["EventCulling"]:
+		for ec in staged_event_cullers:
 			ec._default_multiprocessing = self.default_mp
+			ec._pool = self._pool
 			if verbose: print("Running", ec.__class__.displayName())
 			if self.pipe_here is not None:
 				self.pipe_here.send("Running event culling\n"+str(ec.__class__.displayName()))
 			ec._global_parameters = self.backend_API.global_parameters
 			try:
-				ec.process(self.backend_API.documents, self.pipe_here)
+				with self.metrics.stage("EventCulling", ec.__class__.displayName(), self.backend_API.documents) as record:
+					# events processed, and events kept.
+					record["events"] = count_events(self.backend_API.documents)
+					ec.process(self.backend_API.documents, self.pipe_here)
+					record["events_kept"] = count_events(self.backend_API.documents)
 			except Exception as error:
 				this_error = "\nEvent culler failed: %s\n%s\n%s\n" %\
 					(ec.__class__.displayName(), str(error), format_exc())
@@ -144,7 +298,7 @@ class Experiment:
 				if verbose: print(this_error)
 
 		# allow the exp to continue if any or all cullers failed, but raise warning.
-		empty_event_sets = [doc for doc in self.backend_API.documents if len(doc.eventSet)==0]
+		empty_event_sets = [doc for doc in self.backend_API.documents if doc.event_count()==0]
 		if len(empty_event_sets) > 0:
 			this_error = "! %s/%s docs had no event sets after event culling:\n"\
 				% (str(len(empty_event_sets)), str(len(self.backend_API.documents)))
@@ -154,19 +308,155 @@ class Experiment:
 			)
 			return exp_return if self.return_results else 1
 
+		self.pre_processing_done = True
+		return 0
+
+	def run_streaming_pre_processing(self, **options):
+		"""
+		Reads, pre-processes and counts the events of the documents STREAM_CHUNK_SIZE at a time,
+		with all canonicizers, event drivers and event cullers applied per document (see PreprocessingChain).
+		Only the counts are kept (self.streamed_counts); the documents' texts and event sets stay empty,
+		so corpora larger than memory can be analyzed. Event cullers that need all documents can't be streamed.
+		"""
+		verbose = options.get("verbose", False)
+		mods = self.backend_API.modulesInUse
+		for mod in mods["Canonicizers"] + mods["EventDrivers"] + mods["EventCulling"]:
+			mod._default_multiprocessing = self.default_mp
+			mod._pool = self._pool
+			mod._global_parameters = self.backend_API.global_parameters
+		stages = [[c.get_process_single() for c in mods["Canonicizers"]],
+			[e.get_process_single() for e in mods["EventDrivers"]],
+			[ec.get_process_single() for ec in mods["EventCulling"]]]
+		not_streamable = [mod.__class__.displayName()
+			for mod, function in zip(mods["Canonicizers"] + mods["EventDrivers"] + mods["EventCulling"], sum(stages, []))
+			if function is None]
+		if len(not_streamable) > 0:
+			exp_return = self.return_exp_results(results_text="", status=1,
+				message="These modules need all documents at once and can't be used when streaming:\n" +
+				"\n".join(not_streamable))
+			return exp_return if self.return_results else 1
+		if self.cache is not None and verbose:
+			print("The pre-processing cache isn't used when streaming.")
+
+		count_document = DocumentCounter(PreprocessingChain(*stages,
+			event_counters=[e.count_single for e in mods["EventDrivers"]]))
+		docs = self.backend_API.documents
+		builder = VocabularyBuilder()
+		empty_event_sets = []
+		if verbose: print("Running streaming pre-processing ...")
+		if self.pipe_here is not None:
+			self.pipe_here.send("Running streaming pre-processing")
+		with self.metrics.stage("Streaming pre-processing", docs=docs) as record:
+			for start in range(0, len(docs), STREAM_CHUNK_SIZE):
+				chunk = docs[start:start + STREAM_CHUNK_SIZE]
+				if self.pipe_here is not None: self.pipe_here.send(100 * start / len(docs))
+				paths = [d.filepath for d in chunk]
+				if self.default_mp:
+					histograms = pool_map(count_document, paths, self._pool)
+				else:
+					histograms = [count_document(path) for path in paths]
+				for d, histogram in zip(chunk, histograms):
+					if histogram is None:
+						exp_return = self.return_exp_results(results_text="", status=1,
+							message="Error reading file at:\n" + str(d.filepath) + "\n")
+						return exp_return if self.return_results else 1
+					if len(histogram) == 0:
+						empty_event_sets.append(d.filepath)
+					builder.add(histogram)
+			counts = builder.to_csr()
+			record["events"] = int(counts.sum())
+		if len(empty_event_sets) > 0:
+			this_error = "! %s/%s docs had no event sets after pre-processing:\n"\
+				% (str(len(empty_event_sets)), str(len(docs)))
+			this_error += "\n".join(empty_event_sets) + "\n"
+			exp_return = self.return_exp_results(
+				results_text="", message=self.results_message + this_error, status=1,
+			)
+			return exp_return if self.return_results else 1
+		self.streamed_counts = (counts, builder.feature_names())
+		self.pre_processing_done = True
 		return 0
 
+	def _run_fused_pre_processing(self, docs, **options):
+		"""
+		Runs all canonicizers, event drivers and the leading per-document event cullers
+		on docs in one task per document (see PreprocessingChain).
+		Returns how many event cullers were fused, or None if the modules can't be fused
+		or the fused run failed. In that case the documents are left unchanged,
+		so the stages can be run separately.
+		Options: ```fuse_cullers``` (default True). If False, the documents also keep their canonicized texts.
+		"""
+		verbose = options.get("verbose", False)
+		fuse_cullers = options.get("fuse_cullers", True)
+		mods = self.backend_API.modulesInUse
+		for mod in mods["Canonicizers"] + mods["EventDrivers"] + mods["EventCulling"]:
+			mod._default_multiprocessing = self.default_mp
+			mod._pool = self._pool
+			mod._global_parameters = self.backend_API.global_parameters
+		canonicizers = [c.get_process_single() for c in mods["Canonicizers"]]
+		event_drivers = [e.get_process_single() for e in mods["EventDrivers"]]
+		if None in canonicizers or None in event_drivers:
+			if verbose: print("Some modules can't be fused; running pre-processing stages separately.")
+			return None
+		event_cullers = []
+		for ec in (mods["EventCulling"] if fuse_cullers else []):
+			cull = ec.get_process_single()
+			if cull is None: break
+			event_cullers.append(cull)
+
+		chain = PreprocessingChain(canonicizers, event_drivers, event_cullers,
+			return_canonicized=not fuse_cullers)
+		if verbose: print("Running fused pre-processing ...")
+		if self.pipe_here is not None:
+			self.pipe_here.send("Running fused pre-processing")
+			self.pipe_here.send(True)
+		try:
+			with self.metrics.stage("Fused pre-processing", docs=docs) as record:
+				if self.default_mp:
+					events = pool_map(chain, [d.text for d in docs], self._pool)
+				else:
+					events = [chain(d.text) for d in docs]
+				for d, event_set in zip(docs, events):
+					if not fuse_cullers:
+						d.canonicized, event_set = event_set
+					d.setEventSet(event_set, append=False)
+				record["events"] = count_events(docs)
+		except Exception as error:
+			if verbose:
+				print("\nFused pre-processing failed, running stages separately:\n%s\n%s\n" %
+					(str(error), format_exc()))
+			return None
+		return len(event_cullers)
+
 	def run_experiment(self, **options):
 
 		"""
 		Process all input files with the parameters in all tabs.
 		input: unknown authors, known authors, all listboxes.
+		One worker pool is started for the experiment and shared by all modules.
 		"""
+		self._pool = WorkerPool(self.workers)
+		try:
+			return self._run_experiment(**options)
+		finally:
+			self._pool.close()
+			self._pool = None
+
+	def _run_experiment(self, **options):
+		"""Body of run_experiment(), run while the worker pool is open."""
 		self.return_results = options.get("return_results", False)
 		verbose = options.get("verbose", False)
+		# the documents were read and pre-processed by a previous experiment
+		# with the same canonicizers, event drivers and event cullers.
+		skip_pre_processing = options.get("skip_pre_processing", False)
+		# path to save the first trained embedder and analysis method to, with the pre-processing modules.
+		save_pipeline = options.get("save_pipeline", None)
+		# when streaming: self.streamed_counts of a previous experiment with the same pre-processing.
+		self.streamed_counts = options.get("streamed_counts", None)
 
 		self.results_message = ""
 		status = 0
+		self.metrics = ExperimentMetrics(verbose)
 
 		# LOADING DOCUMENTS
 		if self.pipe_here != None: self.pipe_here.send("Getting documents")
@@ -200,16 +490,23 @@ class Experiment:
 			docs = known_docs + unknown_docs
 			self.backend_API.documents = docs
 
-		for d in self.backend_API.documents:
-			try:
-				# get the texts of the docs.
-				d.read_self()
-			except:
-				exp_return = self.return_exp_results(
-					results_text="", message="Error reading file at:\n" + str(d.filepath) + "\n" +
-					format_exc(), status=1,
-				)
-				return exp_return if self.return_results else 1
+		# documents reused from an experiment with the same pre-processing already have their texts.
+		# streaming experiments read the documents during pre-processing.
+		if not skip_pre_processing and not self.streaming:
+			with self.metrics.stage("Reading documents", docs=self.backend_API.documents) as record:
+				try:
+					# get the texts of the docs, several at a time.
+					texts, record["bytes"] = readDocuments(d.filepath for d in self.backend_API.documents)
+				except OSError as error:
+					exp_return = self.return_exp_results(
+						results_text="", message="Error reading file at:\n" + str(error.filename) + "\n" +
+						format_exc(), status=1,
+					)
+					return exp_return if self.return_results else 1
+				for d, text in zip(self.backend_API.documents, texts):
+					# as Document.read_self()
+					d.text = text + "\n"
+				record["characters"] = sum(len(d.text) for d in self.backend_API.documents)
 			
 
 		# api documents: known texts first followed by unknown texts.
@@ -228,7 +525,7 @@ class Experiment:
 				results_text="", message="No documents in the train set", status=1,
 			)
 			return exp_return if self.return_results else 1
-		else:
+		elif not self.streaming:
 			# train set: check if a class has no train files
 			empty_authors = {d.author for d in known_docs if d.text.strip()==""}
 			if len(empty_authors) > 0:
@@ -256,9 +553,18 @@ class Experiment:
 				status=1)
 				return exp_return if self.return_results else 1
 
-		preproc_results = self.run_pre_processing(verbose=verbose)
-		if preproc_results != 0:
-			return preproc_results if self.return_results else 1
+		if self.streaming and self.streamed_counts is not None:
+			if verbose: print("Using already counted documents")
+		elif self.streaming:
+			preproc_results = self.run_streaming_pre_processing(verbose=verbose)
+			if preproc_results != 0:
+				return preproc_results if self.return_results else 1
+		elif skip_pre_processing:
+			if verbose: print("Using already pre-processed documents")
+		else:
+			preproc_results = self.run_pre_processing(verbose=verbose)
+			if preproc_results != 0:
+				return preproc_results if self.return_results else 1
 
 		if self.pipe_here != None: self.pipe_here.send(0)
 
@@ -275,6 +581,7 @@ class Experiment:
 		results = [] # list of text-formatted results
 		full_exp_dump = []# list of dict-formatted results
 		nc_success_count = 0
+		pipeline_saved = False
 		for nc in self.backend_API.modulesInUse["Embeddings"]:
 			"""
 			Only one embedder used for one analysis method
@@ -282,6 +589,7 @@ class Experiment:
 			"""
 			nc._global_parameters = self.backend_API.global_parameters
 			nc._default_multiprocessing = self.default_mp
+			nc._pool = self._pool
 
 			if self.pipe_here is not None:
 				self.pipe_here.send("Running embedders")
@@ -289,7 +597,15 @@ class Experiment:
 			if verbose: print("Embedding ... running", nc.__class__.displayName())
 
 			try:
-				all_data = nc.convert(known_docs + unknown_docs, self.pipe_here)
+				with self.metrics.stage("Embeddings", nc.__class__.displayName(), known_docs + unknown_docs) as nc_record:
+					if not self.streaming:
+						all_data = nc.convert(known_docs + unknown_docs, self.pipe_here)
+					elif nc.get_convert_counts() is None:
+						raise ValueError("This embedder needs the documents' event sets and can't be used when streaming.")
+					else:
+						all_data = nc.convert_counts(known_docs + unknown_docs, *self.streamed_counts, self.pipe_here)
+					if hasattr(all_data, "shape"):
+						nc_record["feature_matrix"] = matrix_metrics(all_data)
 			except Exception as error:
 				this_error = "\nembedder failed: %s\n%s\n%s\n" %\
 					(nc.__class__.displayName(), str(error), format_exc())
@@ -328,9 +644,11 @@ class Experiment:
 
 				try:
         			# for each method: first train models on known docs
-					am_df_pair[0].train(known_docs, known_docs_numbers_aggregate)
+					with self.metrics.stage("AnalysisMethods: train", am_df_names_display, known_docs) as train_record:
+						am_df_pair[0].train(known_docs, known_docs_numbers_aggregate)
 					# then for each unknown document, analyze and output results
-					doc_results = am_df_pair[0].analyze(unknown_docs, unknown_docs_numbers_aggregate)
+					with self.metrics.stage("AnalysisMethods: analyze", am_df_names_display, unknown_docs) as analyze_record:
+						doc_results = am_df_pair[0].analyze(unknown_docs, unknown_docs_numbers_aggregate)
 				except Exception as e:
 					this_error = "\n" + "Analysis or distance function failed:\n" %\
 						(am_df_pair[0].__class__.displayName(),
@@ -360,9 +678,26 @@ class Experiment:
 				full_exp_dump.append({
 					"modules": exp_params_out, "doc_results": {
 						unknown_docs[i].filepath:doc_results[i] for i in range(len(unknown_docs))
-					}
+					},
+					# stages of this embedder and analysis method, after the shared ones.
+					"metrics": self.metrics.stages("Reading documents", "Pre-processing cache",
+						"Fused pre-processing", "Streaming pre-processing", "Canonicizers", "EventDrivers", "EventCulling")
+						+ [nc_record, train_record, analyze_record]
 				})
 
+				if save_pipeline is not None and not pipeline_saved:
+					try:
+						TrainedPipeline(self.backend_API.modulesInUse["Canonicizers"],
+							self.backend_API.modulesInUse["EventDrivers"],
+							self.backend_API.modulesInUse["EventCulling"],
+							nc, am_df_pair[0], am_df_pair[1]).save(save_pipeline)
+						pipeline_saved = True
+						if verbose: print("Saved trained pipeline to", save_pipeline)
+					except Exception as error:
+						this_error = "\nSaving the trained pipeline failed:\n%s\n%s\n" % (str(error), format_exc())
+						self.results_message += this_error
+						if verbose: print(this_error)
+
 				for d_index in range(len(unknown_docs)):
 					formatted_results = \
 						self.backend_API.prettyFormatResults(
@@ -415,7 +750,8 @@ class Experiment:
 			"message": kwa.get("message", "No message provided."),
 			"status": kwa.get("status", 1),
 			"full_exp_dump": kwa.get("full_exp_dump", {}),
-			"exp_time": kwa.get("exp_time", str(hex(randint(0, 10000000)))[2:])
+			"exp_time": kwa.get("exp_time", str(hex(randint(0, 10000000)))[2:]),
+			"metrics": kwa.get("metrics", self.metrics.records),
 		}
 		if self.pipe_here != None: self.pipe_here.send(-1)
 		if self.q != None:
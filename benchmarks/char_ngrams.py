@@ -0,0 +1,79 @@
+"""
+Compares character n-gram extraction with nltk.ngrams (the former Character NGrams implementation)
+and with backend.CharNGrams, on the AAAC texts.
+
+For each n, reports the time to list the n-grams of all texts with each implementation,
+and the time to count them (char_ngram_counts against collections.Counter of the nltk list),
+after checking that the outputs are the same. Then, for a range of n, compares extracting each n
+separately (as with one Character NGrams event driver per n) and all n at once with char_ngrams_by_order.
+
+Run from the PyGAAP directory: python benchmarks/char_ngrams.py [-n N ...] [--orders MIN MAX] [--repeat R]
+"""
+
+import argparse
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from collections import Counter
+from glob import glob
+from time import perf_counter
+
+from nltk import ngrams
+
+from backend.CharNGrams import char_ngrams, char_ngram_counts, char_ngrams_by_order
+from backend.CSVIO import readCorpusCSV, readDocuments
+
+
+def nltk_char_ngrams(text, n):
+	return [''.join(val) for val in ngrams(text, n)]
+
+
+def aaac_texts():
+	paths = [row[1] for csv_path in sorted(glob("./resources/aaac/problem*/load*.csv")) for row in readCorpusCSV(csv_path)]
+	texts, _ = readDocuments(paths)
+	return texts
+
+
+def best_time(function, texts, n, repeat):
+	times = []
+	for _ in range(repeat):
+		start = perf_counter()
+		for text in texts:
+			function(text, n)
+		times.append(perf_counter() - start)
+	return min(times)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="nltk vs NumPy character n-grams")
+	parser.add_argument("-n", type=int, nargs="+", default=[2, 3, 5, 10, 20], help="n-gram lengths. Default: 2 3 5 10 20")
+	parser.add_argument("--orders", type=int, nargs=2, default=[2, 5], metavar=("MIN", "MAX"),
+		help="Range of n extracted at once. Default: 2 5")
+	parser.add_argument("--repeat", type=int, default=1, help="Runs of each setting (the best is reported). Default: 1")
+	args = parser.parse_args()
+
+	texts = aaac_texts()
+	print("%d texts, %d characters" % (len(texts), sum(len(t) for t in texts)))
+	for n in args.n:
+		for text in texts:
+			if char_ngrams(text, n) != nltk_char_ngrams(text, n) or char_ngram_counts(text, n) != Counter(nltk_char_ngrams(text, n)):
+				raise AssertionError("Different n-grams for n=%d" % n)
+		nltk_list = best_time(nltk_char_ngrams, texts, n, args.repeat)
+		numpy_list = best_time(char_ngrams, texts, n, args.repeat)
+		nltk_count = best_time(lambda text, n: Counter(nltk_char_ngrams(text, n)), texts, n, args.repeat)
+		numpy_count = best_time(char_ngram_counts, texts, n, args.repeat)
+		print("n=%2d  list: nltk %7.3fs  numpy %7.3fs (x%.1f)  count: nltk %7.3fs  numpy %7.3fs (x%.1f)" %
+			(n, nltk_list, numpy_list, nltk_list / numpy_list, nltk_count, numpy_count, nltk_count / numpy_count))
+
+	n_min, n_max = args.orders
+	orders = range(n_min, n_max + 1)
+	nltk_separate = best_time(lambda text, _: [nltk_char_ngrams(text, n) for n in orders], texts, None, args.repeat)
+	numpy_separate = best_time(lambda text, _: [char_ngrams(text, n) for n in orders], texts, None, args.repeat)
+	one_pass = best_time(lambda text, _: char_ngrams_by_order(text, n_min, n_max), texts, None, args.repeat)
+	print("n=%d..%d  separately: nltk %7.3fs  numpy %7.3fs  at once: numpy %7.3fs" %
+		(n_min, n_max, nltk_separate, numpy_separate, one_pass))
+
+
+if __name__ == "__main__":
+	main()
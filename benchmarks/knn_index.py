@@ -0,0 +1,118 @@
+"""
+Compares exact and approximate (random projection index) K-Nearest Neighbors.
+
+For each AAAC problem, and for a larger synthetic set of known docs, reports:
+recall: fraction of the exact k nearest known docs that the index also returns,
+top-1: fraction of unknown docs whose best-ranked author is the same,
+and the times of train and analyze for each setting.
+
+Run from the PyGAAP directory: python benchmarks/knn_index.py [-k K] [--synthetic N]
+"""
+
+import argparse
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from glob import glob
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from backend import PrepareNumbers as pn
+from backend.CSVIO import readCorpusCSV
+from backend.Document import Document
+from generics.AnalysisMethod import KNearestNeighbor
+from generics.EventDriver import CharacterNGramEventDriver
+from generics.modules.df_0 import CosineDistance, HistogramDistance
+from generics.modules.nc_0 import Frequency
+
+
+def load_problem(csv_path, n=3):
+	"""Known and unknown docs of an AAAC problem, with character n-gram frequencies."""
+	docs = [Document(row[0], row[2], "", row[1]) for row in readCorpusCSV(csv_path)]
+	event_driver = CharacterNGramEventDriver()
+	event_driver.n = n
+	for d in docs:
+		d.read_self()
+		d.setEventSet(event_driver.process_single(d.text), append=False)
+	embedding = Frequency()
+	embedding.sparse = 1
+	embedding.normalization = "Per-document token count"
+	numbers = embedding.convert(docs)
+	known = [i for i, d in enumerate(docs) if d.author != ""]
+	unknown = [i for i, d in enumerate(docs) if d.author == ""]
+	return ([docs[i] for i in known], csr_array(numbers[known]),
+		[docs[i] for i in unknown], csr_array(numbers[unknown]))
+
+
+def synthetic_problem(n_known, n_unknown=50, n_features=20000, n_authors=50, seed=0):
+	"""Random sparse frequencies: each author's docs share a Zipf-distributed profile of events."""
+	rng = np.random.default_rng(seed)
+	profiles = [rng.permutation(n_features) for _ in range(n_authors)]
+	def make(n_docs, authors):
+		rows, columns = [], []
+		for row, author in enumerate(authors):
+			columns.append(profiles[author][np.minimum(rng.zipf(1.5, 400), n_features) - 1])
+			rows.append(np.full(400, row))
+		# duplicate (row, column) entries are summed into counts.
+		return csr_array((np.ones(400 * n_docs), (np.concatenate(rows), np.concatenate(columns))),
+			shape=(n_docs, n_features))
+	known_authors = rng.integers(0, n_authors, n_known)
+	unknown_authors = rng.integers(0, n_authors, n_unknown)
+	known_docs = [Document("a%d" % a) for a in known_authors]
+	unknown_docs = [Document("") for _ in unknown_authors]
+	return known_docs, make(n_known, known_authors), unknown_docs, make(n_unknown, unknown_authors)
+
+
+def run_knn(problem, distance, k, index="Exact", candidates=10):
+	known_docs, known_data, unknown_docs, unknown_data = problem
+	knn = KNearestNeighbor()
+	knn.k, knn.index, knn.candidates = k, index, candidates
+	knn.setDistanceFunction(distance)
+	start = perf_counter()
+	knn.train(known_docs, known_data)
+	trained = perf_counter()
+	results = knn.analyze(unknown_docs, unknown_data)
+	return knn, results, (trained - start, perf_counter() - trained)
+
+
+def neighbour_recall(knn, problem, k):
+	"""Fraction of the exact k nearest docs found among the index's candidates for each unknown doc."""
+	_, known_data, _, unknown_data = problem
+	exact, _ = pn.k_nearest(knn._distance.distance(unknown_data, known_data), knn._train_labels, k)
+	candidates = knn._index.query(unknown_data, k * knn.candidates)
+	return np.mean([len(set(exact[i]) & set(candidates[i])) / exact.shape[1] for i in range(exact.shape[0])])
+
+
+def compare(name, problem, k, candidate_settings):
+	for distance in [HistogramDistance(), CosineDistance()]:
+		_, exact_results, exact_time = run_knn(problem, distance, k)
+		exact_top = [min(r, key=r.get) for r in exact_results]
+		print("%-12s %-18s exact                            train %7.3fs analyze %7.3fs" %
+			((name, distance.__class__.displayName()) + exact_time))
+		for candidates in candidate_settings:
+			knn, results, approximate_time = run_knn(problem, distance, k, "Random projection", candidates)
+			top = [min(r, key=r.get) for r in results]
+			print("%-12s %-18s candidates %2dxK  recall %.2f top-1 %.2f train %7.3fs analyze %7.3fs" %
+				((name, distance.__class__.displayName(), candidates,
+				neighbour_recall(knn, problem, k), np.mean(np.array(top) == np.array(exact_top))) + approximate_time))
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Exact vs approximate K-Nearest Neighbors")
+	parser.add_argument("-k", type=int, default=1, help="K for the AAAC problems (few known docs each). Default: 1")
+	parser.add_argument("--synthetic", metavar="N", type=int, default=20000,
+		help="Number of known docs in the synthetic set. 0 to skip. Default: 20000")
+	args = parser.parse_args()
+
+	for csv_path in sorted(glob("./resources/aaac/problem*/load*.csv")):
+		compare(Path(csv_path).parent.name, load_problem(csv_path), args.k, [1, 2, 5])
+	if args.synthetic > 0:
+		compare("synthetic", synthetic_problem(args.synthetic), 5, [5, 10, 20])
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,252 @@
+"""
+Benchmark suite: a matrix of representative pipelines run over the AAAC problems,
+over AAAC problems scaled up by repeating their documents and over synthetic
+corpora (see util/generate_random.py).
+
+Each case (pipeline, corpus) runs in a new process, once to warm up (lazy imports,
+e.g. NLTK) and then --repeat times. Records per case: median wall time,
+documents/sec, analysis latency per unknown document, median time of each stage
+(see backend.Metrics) and the process's peak RSS.
+
+Each run is appended to a JSON history. If a baseline exists, cases that are slower
+or use more memory than the baseline by more than --tolerance are flagged as
+regressions, and the script exits with status 1.
+
+Run from the PyGAAP directory:
+	python benchmarks/run_benchmarks.py [--problems A B] [--scales 10] [--pipelines centroid]
+	python benchmarks/run_benchmarks.py --problems --scales --synthetic 1000 10000
+	python benchmarks/run_benchmarks.py --save-baseline
+"""
+
+import argparse
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import io
+import json
+import os
+import platform
+import subprocess
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from glob import glob
+from multiprocessing import get_context
+from pathlib import Path
+from statistics import median
+
+from backend.CSVIO import readCorpusCSV
+from backend.Document import Document
+
+DEFAULT_HISTORY = "benchmarks/results/history.json"
+DEFAULT_BASELINE = "benchmarks/results/baseline.json"
+# generated corpora are kept here, one directory per size, and reused.
+SYNTHETIC_DIRECTORY = "benchmarks/results/synthetic"
+
+# pipelines as experiment CSV module strings (see backend.CLI.parseExperimentRow).
+_CHAR = {"Canonicizers": ["Unify Case", "Normalize Whitespace"], "EventDrivers": ["Character NGrams|n:3"], "EventCulling": []}
+_FREQUENCY = ["Frequency|normalization:Per-document token count"]
+PIPELINES = {
+	"char3 centroid histogram": dict(_CHAR, Embeddings=_FREQUENCY,
+		AnalysisMethods=["Centroid Driver"], DistanceFunctions=["Histogram Distance"]),
+	"char3 centroid cosine": dict(_CHAR, Embeddings=_FREQUENCY,
+		AnalysisMethods=["Centroid Driver"], DistanceFunctions=["Cosine Distance"]),
+	"char3 centroid jensen-shannon": dict(_CHAR, Embeddings=_FREQUENCY,
+		AnalysisMethods=["Centroid Driver"], DistanceFunctions=["Jensen-Shannon Distance"]),
+	"char3 sparse knn histogram": dict(_CHAR, Embeddings=["Frequency|normalization:Per-document token count|sparse:1"],
+		AnalysisMethods=["K-Nearest Neighbors|k:3"], DistanceFunctions=["Histogram Distance"]),
+	"char3 most-common centroid": dict(_CHAR, EventCulling=["Most Common Events|numEvents:100"], Embeddings=_FREQUENCY,
+		AnalysisMethods=["Centroid Driver"], DistanceFunctions=["Histogram Distance"]),
+	"char3 linear svm": dict(_CHAR, Embeddings=_FREQUENCY,
+		AnalysisMethods=["Linear SVM (sklearn)"], DistanceFunctions=["NA"]),
+	"char3 naive bayes": dict(_CHAR, Embeddings=["Frequency|normalization:None"],
+		AnalysisMethods=["Naive Bayes (sklearn)"], DistanceFunctions=["NA"]),
+	"word2 centroid cosine": {"Canonicizers": ["Unify Case"],
+		"EventDrivers": ["Word n-grams|n:2|tokenizer:Space delimiter"], "EventCulling": [],
+		"Embeddings": _FREQUENCY, "AnalysisMethods": ["Centroid Driver"], "DistanceFunctions": ["Cosine Distance"]},
+	"words knn cosine": {"Canonicizers": ["Unify Case"],
+		"EventDrivers": ["Words (Whitespace-Delimited)"], "EventCulling": [],
+		"Embeddings": _FREQUENCY, "AnalysisMethods": ["K-Nearest Neighbors|k:3"], "DistanceFunctions": ["Cosine Distance"]},
+}
+
+
+def problem_csv(problem):
+	"""Corpus CSV of an AAAC problem, e.g. "A"."""
+	return glob("./resources/aaac/problem%s/load*.csv" % problem)[0]
+
+
+def synthetic_csv(n_docs):
+	"""Corpus CSV of a synthetic corpus of n_docs documents, generated the first time."""
+	from util.generate_random import generate_corpus
+	directory = Path(SYNTHETIC_DIRECTORY, "docs%d" % n_docs)
+	csv_path = directory / "corpus.csv"
+	if not csv_path.exists():
+		generate_corpus(directory, n_docs, n_authors=20, vocabulary_size=10000)
+	return str(csv_path)
+
+
+def load_corpus(csv_path, scale=1):
+	"""Documents of a corpus CSV, each repeated scale times."""
+	rows = readCorpusCSV(csv_path)
+	return [Document(row[0], row[2] if copy == 0 else "%s (%d)" % (row[2], copy), "", row[1])
+		for row in rows for copy in range(scale)]
+
+
+def _make_api(pipeline, workers):
+	from backend.API import API
+	from backend.CLI import _addModules
+	api = API([])
+	api.default_mp = workers > 0
+	api.default_workers = workers
+	api.modulesInUse = {mod_type: [] for mod_type in api.modulesInUse}
+	for mod_type, module_strings in pipeline.items():
+		if module_strings == ["NA"]:
+			api.modulesInUse[mod_type] = ["NA"]
+		else:
+			_addModules(api, mod_type, module_strings)
+	return api
+
+
+def _stage_name(record):
+	return record["stage"] if record["module"] is None else "%s (%s)" % (record["stage"], record["module"])
+
+
+def run_case(pipeline, csv_path, scale, repeat, workers):
+	"""Runs one case, in its own process. Returns its measurements."""
+	from backend import run_experiment
+	from backend.Metrics import peak_rss_mb
+	# e.g. divisions by zero in distance functions: the results aren't used.
+	warnings.simplefilter("ignore")
+	api = _make_api(pipeline, workers)
+	runs = []
+	for run in range(repeat + 1):
+		api.documents = load_corpus(csv_path, scale)
+		experiment = run_experiment.Experiment(api)
+		with redirect_stdout(io.StringIO()):
+			exp_return = experiment.run_experiment(skip_loading_docs=1, return_results=1)
+		if exp_return["status"] != 0:
+			return {"status": "failed", "message": exp_return["message"][-500:]}
+		if run > 0:
+			runs.append(exp_return["metrics"])
+	n_docs = len(api.documents)
+	n_unknown = sum(1 for d in api.documents if d.author == "")
+	totals = [sum(r["wall_seconds"] for r in metrics) for metrics in runs]
+	stage_names = list(dict.fromkeys(_stage_name(r) for r in runs[0]))
+	stages = {name: median(sum(r["wall_seconds"] for r in metrics if _stage_name(r) == name) for metrics in runs)
+		for name in stage_names}
+	analyze = median(sum(r["wall_seconds"] for r in metrics if r["stage"] == "AnalysisMethods: analyze")
+		for metrics in runs)
+	return {
+		"status": "ok",
+		"documents": n_docs,
+		"unknown_documents": n_unknown,
+		"wall_seconds": median(totals),
+		"documents_per_second": n_docs / median(totals) if median(totals) > 0 else None,
+		"latency_ms_per_unknown_document": 1000 * analyze / n_unknown if n_unknown else None,
+		"peak_rss_mb": peak_rss_mb(),
+		"stages": stages,
+	}
+
+
+def _git_commit():
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+			text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def compare(results, baseline, tolerance):
+	"""Names of the cases slower (documents/sec) or larger (peak RSS) than the baseline by more than tolerance."""
+	regressions = {}
+	for case, result in results.items():
+		base = baseline.get("results", {}).get(case)
+		if base is None or base.get("status") != "ok" or result.get("status") != "ok": continue
+		reasons = []
+		if result["documents_per_second"] < base["documents_per_second"] * (1 - tolerance):
+			reasons.append("throughput %.0f%% of baseline" % (100 * result["documents_per_second"] / base["documents_per_second"]))
+		if None not in (result["peak_rss_mb"], base["peak_rss_mb"]) and \
+				result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+			reasons.append("peak RSS %.0f%% of baseline" % (100 * result["peak_rss_mb"] / base["peak_rss_mb"]))
+		if reasons: regressions[case] = reasons
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(description="PyGAAP benchmark suite")
+	parser.add_argument("--problems", nargs="*", default=None,
+		help="AAAC problems (letters). Default: all.")
+	parser.add_argument("--scales", nargs="*", type=int, default=[10],
+		help="Also run problem A with its documents repeated this many times. Default: 10")
+	parser.add_argument("--synthetic", nargs="*", type=int, default=[],
+		help="Also run synthetic corpora of these many documents (generated in %s). Default: none" % SYNTHETIC_DIRECTORY)
+	parser.add_argument("--pipelines", nargs="+", default=None,
+		help="Only run pipelines whose names contain one of these words.")
+	parser.add_argument("--repeat", type=int, default=3, help="Measured runs per case, after a warm-up run. Default: 3")
+	parser.add_argument("--workers", type=int, default=0,
+		help="Worker processes for the experiments' built-in multiprocessing. Default: 0 (none, for repeatable timings)")
+	parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON file to append this run to. Default: %s" % DEFAULT_HISTORY)
+	parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON file of the baseline run. Default: %s" % DEFAULT_BASELINE)
+	parser.add_argument("--save-baseline", action="store_true", help="Save this run as the baseline.")
+	parser.add_argument("--tolerance", type=float, default=0.2,
+		help="Flag cases more than this fraction slower or larger than the baseline. Default: 0.2")
+	args = parser.parse_args()
+
+	problems = args.problems if args.problems is not None else \
+		sorted(Path(p).name[len("problem"):] for p in glob("./resources/aaac/problem*"))
+	# (name, corpus CSV, scale)
+	corpora = [("problem" + problem, problem_csv(problem), 1) for problem in problems] + \
+		[("problemA", problem_csv("A"), scale) for scale in args.scales if scale > 1] + \
+		[("synthetic%d" % n_docs, synthetic_csv(n_docs), 1) for n_docs in args.synthetic]
+	pipelines = {name: p for name, p in PIPELINES.items()
+		if args.pipelines is None or any(word in name for word in args.pipelines)}
+
+	results = {}
+	for pipeline_name, pipeline in pipelines.items():
+		for corpus, csv_path, scale in corpora:
+			case = "%s @ %s%s" % (pipeline_name, corpus, " x%d" % scale if scale > 1 else "")
+			# a new process per case, so each has its own peak memory and imports.
+			with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+				result = executor.submit(run_case, pipeline, csv_path, scale, args.repeat, args.workers).result()
+			results[case] = result
+			if result["status"] == "ok":
+				print("%-56s %8.3fs %9.1f docs/s %8.2f ms/unknown doc %7.0f MB" % (case, result["wall_seconds"],
+					result["documents_per_second"], result["latency_ms_per_unknown_document"] or 0,
+					result["peak_rss_mb"] or 0))
+			else:
+				print("%-56s FAILED" % case)
+
+	run = {"time": datetime.now().isoformat(timespec="seconds"), "commit": _git_commit(),
+		"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+		"settings": {"repeat": args.repeat, "workers": args.workers}, "results": results}
+
+	Path(args.history).parent.mkdir(parents=True, exist_ok=True)
+	history = []
+	if Path(args.history).exists():
+		with open(args.history, "r") as f:
+			history = json.load(f)
+	history.append(run)
+	with open(args.history, "w") as f:
+		json.dump(history, f, indent=1)
+	print("Appended to", args.history)
+
+	regressions = {}
+	if Path(args.baseline).exists():
+		with open(args.baseline, "r") as f:
+			baseline = json.load(f)
+		regressions = compare(results, baseline, args.tolerance)
+		print("Compared with baseline from %s (commit %s): %d regression(s)" %
+			(baseline["time"], baseline.get("commit"), len(regressions)))
+		for case, reasons in regressions.items():
+			print("REGRESSION %s: %s" % (case, ", ".join(reasons)))
+	if args.save_baseline:
+		with open(args.baseline, "w") as f:
+			json.dump(run, f, indent=1)
+		print("Saved baseline to", args.baseline)
+	return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+	exit(main())
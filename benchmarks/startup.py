@@ -0,0 +1,73 @@
+"""
+Start-up time of the CLI and the GUI: loading their code and creating the API.
+
+Each setting runs in a new Python process, so nothing is already imported. Reports
+the time of the whole process and of the measured code in it, and which of the
+slow-to-import dependencies were loaded.
+"eager" settings also import every module file, as PyGAAP did before modules were loaded lazily.
+
+Run from the PyGAAP directory: python benchmarks/startup.py [--repeat N]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from os import getcwd
+from statistics import median
+from time import perf_counter
+
+HEAVY = ["nltk", "sklearn", "scipy", "torch", "transformers"]
+
+LOAD_ALL = '''
+for available in api.moduleTypeDict.values():
+	for module in available.values():
+		try: module.load()
+		except Exception: pass
+'''
+
+SETTINGS = {
+	"cli": "import backend.CLI\nfrom backend.API import API\napi = API([])",
+	"cli, first experiment modules": "import backend.CLI\nfrom backend.API import API\napi = API([])\n" +
+		"[api.canonicizers['Unify Case'](), api.eventDrivers['Character NGrams'](), api.embeddings['Frequency'](), " +
+		"api.analysisMethods['Centroid Driver'](), api.distanceFunctions['Histogram Distance']()]",
+	"cli, eager": "import backend.CLI\nfrom backend.API import API\napi = API([])" + LOAD_ALL,
+	"gui": "import backend.GUI.GUI2\nfrom backend.API import API\napi = API('place-holder')",
+	"gui, eager": "import backend.GUI.GUI2\nfrom backend.API import API\napi = API('place-holder')" + LOAD_ALL,
+}
+
+TEMPLATE = '''
+import sys, json
+sys.path.append(%r)
+from time import perf_counter
+start = perf_counter()
+%s
+print(json.dumps({"seconds": perf_counter() - start, "heavy": [m for m in %r if m in sys.modules]}))
+'''
+
+
+def measure(code, repeat):
+	"""Median process and in-process times over repeat runs, and the heavy modules loaded."""
+	process_times, code_times = [], []
+	for _ in range(repeat):
+		start = perf_counter()
+		output = subprocess.run([sys.executable, "-c", TEMPLATE % (getcwd(), code, HEAVY)],
+			capture_output=True, text=True, check=True).stdout
+		process_times.append(perf_counter() - start)
+		result = json.loads(output.strip().splitlines()[-1])
+		code_times.append(result["seconds"])
+	return median(process_times), median(code_times), result["heavy"]
+
+
+def main():
+	parser = argparse.ArgumentParser(description="PyGAAP start-up time")
+	parser.add_argument("--repeat", type=int, default=5, help="Runs per setting. Default: 5")
+	args = parser.parse_args()
+
+	for name, code in SETTINGS.items():
+		process_time, code_time, heavy = measure(code, args.repeat)
+		print("%-32s process %6.3fs  code %6.3fs  loaded: %s" % (name, process_time, code_time, ", ".join(heavy) or "-"))
+
+
+if __name__ == "__main__":
+	main()
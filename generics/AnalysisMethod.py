@@ -3,6 +3,7 @@ from codecs import namereplace_errors
 
 import backend.Histograms as histograms
 from backend import PrepareNumbers as pn
+from backend.NearestNeighborIndex import RandomProjectionIndex
 import numpy as np
 
 
@@ -13,6 +14,7 @@ class AnalysisMethod(ABC):
 	The analysis method takes the known docs to train and predicts the labels of the unknown docs.
 	It must be able to take one or a mix of dictinoaries, numpy arrays or scipy sparse arrays as training data.
 	It calls backend.PrepareNumbers to make everything the same format.
+	Dense NumPy arrays and scipy CSR arrays are both accepted as numbers.
 	'''
 	distance = None
 	_variable_options = dict()
@@ -72,8 +74,7 @@ class AnalysisMethod(ABC):
 	def get_train_data_and_labels(self, known_docs, train_data):
 		"""get train data and labels, also sets self._labels_to_categories."""
 		if train_data is None:
-			train_data = tuple([d.numbers for d in known_docs])
-			train_data = np.array(train_data)
+			train_data = pn.stack_rows([d.numbers for d in known_docs])
 		train_labels, self._labels_to_categories =\
 			pn.auth_list_to_labels([d.author for d in known_docs])
 		return train_data, train_labels
@@ -83,7 +84,7 @@ class AnalysisMethod(ABC):
 		Aggregate test data into a single matrix,
 		designed to take parameters from document list input of analyze.
 		"""
-		return np.array([d.numbers for d in unknown_docs])
+		return pn.stack_rows([d.numbers for d in unknown_docs])
 	
 	def get_results_dict_from_matrix(self, scores):
 		"""
@@ -133,13 +134,35 @@ class CentroidDriver(AnalysisMethod):
 	_labels_to_categories = dict()
 	_mean_per_author = dict()
 	_means_labels = None
+	_author_doc_counts = None
 	_distance = None
 
 	def train(self, known_docs, train_data=None):
 
 		train_data, train_labels = self.get_train_data_and_labels(known_docs, train_data)
-		self._mean_per_author, self._means_labels =\
-			pn.find_mean_per_author(train_data, train_labels)
+		self._mean_per_author, self._means_labels, self._author_doc_counts =\
+			pn.find_mean_per_author(train_data, train_labels, return_counts=True)
+		return
+
+	def partial_train(self, known_docs, train_data=None):
+		"""
+		Adds known docs to a trained model. Only the centroids of their authors are updated;
+		new authors get new centroids. train_data must use the same features as the first training.
+		"""
+		if self._means_labels is None:
+			return self.train(known_docs, train_data)
+		if train_data is None:
+			train_data = pn.stack_rows([d.numbers for d in known_docs])
+		categories_to_labels = {auth: label for label, auth in self._labels_to_categories.items()}
+		train_labels = np.zeros((len(known_docs), 1), dtype=np.intc)
+		for doc_index, doc in enumerate(known_docs):
+			if doc.author not in categories_to_labels:
+				categories_to_labels[doc.author] = len(categories_to_labels)
+				self._labels_to_categories[categories_to_labels[doc.author]] = doc.author
+			train_labels[doc_index][0] = categories_to_labels[doc.author]
+		self._mean_per_author, self._means_labels, self._author_doc_counts =\
+			pn.update_mean_per_author(self._mean_per_author, self._means_labels,
+				self._author_doc_counts, train_data, train_labels)
 		return
 
 	def analyze(self, unknown_docs, unknown_data=None):
@@ -163,22 +186,34 @@ class KNearestNeighbor(AnalysisMethod):
 	_labels_to_categories = None
 	_train_labels = None
 	_distance = None
+	_index = None
 	k = 5
 	tie_breaker = "average"
+	index = "Exact"
+	candidates = 10
 	_variable_options = {
 		"k": {"options": range(1, 21), "type": "Slider", "default": 4, "displayed_name": "K"},
-		"tie_breaker": {"options": ["average", "minimum"], "type": "OptionMenu", "default": 0, "displayed_name": "Tie breaker"}
+		"tie_breaker": {"options": ["average", "minimum"], "type": "OptionMenu", "default": 0, "displayed_name": "Tie breaker"},
+		"index": {"options": ["Exact", "Random projection"], "type": "OptionMenu", "default": 0, "displayed_name": "Index"},
+		"candidates": {"options": range(1, 51), "type": "Slider", "default": 9, "displayed_name": "Index candidates (x K)"}
 	}
 	def displayName():
 		return "K-Nearest Neighbors"
 
 	def displayDescription():
 		return "This finds the K nearest documents in the feature space and assigns the class with most docs among them.\n" +\
-			"Tie breakers:\n\taverage: the category with the smallest average\n\tminimum: category of the closest document among the ties."
+			"Tie breakers:\n\taverage: the category with the smallest average\n\tminimum: category of the closest document among the ties.\n" +\
+			"Index: Exact compares each unknown doc with all known docs.\n" +\
+			"\tRandom projection first picks (candidates x K) known docs in a low-dimensional random projection,\n" +\
+			"\tthen ranks only those with the distance function. Faster for many known docs, but approximate:\n" +\
+			"\tmore candidates find the exact neighbours more often."
 
 	def train(self, known_docs, train_data=None, **options):
 		train_data, self._train_labels = self.get_train_data_and_labels(known_docs, train_data)
 		self._document_embeddings = train_data
+		self._index = None
+		if self.index == "Random projection":
+			self._index = RandomProjectionIndex(angular=self._distance._angular).fit(train_data)
 
 	def analyze(self, unknown_docs, unknown_data=None, **options):
 		"""
@@ -193,24 +228,29 @@ class KNearestNeighbor(AnalysisMethod):
 		"""
 		if unknown_data is None:
 			unknown_data = self.get_test_data(unknown_docs)
-		labels = self._train_labels.flatten().tolist()
-		unknown_by_known = self._distance.distance(unknown_data, self._document_embeddings)
-		unknown_by_known = [[[u_doc[d], labels[d]] for d in range(len(u_doc))] for u_doc in unknown_by_known]
-		unknown_by_known = [sorted(x)[:self.k] for x in unknown_by_known]
+		if self._index is not None:
+			# distances to each unknown doc's candidates only.
+			candidates = self._index.query(unknown_data, self.k * self.candidates)
+			unknown_by_known = np.vstack([
+				self._distance.distance(unknown_data[i:i+1], self._document_embeddings[candidates[i]])
+				for i in range(candidates.shape[0])
+			])
+			labels = self._train_labels.ravel()[candidates]
+		else:
+			unknown_by_known = self._distance.distance(unknown_data, self._document_embeddings)
+			labels = self._train_labels
+		votes, mean_distances, min_distances = pn.k_nearest_votes(unknown_by_known,
+			labels, self.k, len(self._labels_to_categories))
+		tie_breaking = mean_distances if self.tie_breaker == "average" else min_distances
 
 		unknown_by_authors = []
-		for doc in unknown_by_known:
-			doc_dict = dict()
-			for auth in doc:
-				doc_dict[auth[1]] = doc_dict.get(auth[1], []) + [auth[0]]
-			if self.tie_breaker == "average":
-							# votes				average
-				doc_list = [[len(doc_dict[a]), sum(doc_dict[a])/len(doc_dict[a]), a] for a in doc_dict]
-			elif self.tie_breaker == "minimum":
-							# votes				closest score
-				doc_list = [[len(doc_dict[a]), min(doc_dict[a]), a] for a in doc_dict]
-			doc_list.sort(); doc_list.reverse()
+		for doc_votes, doc_tie_breaking in zip(votes.tolist(), tie_breaking.tolist()):
+			# [votes, average or closest distance, label] of the authors with votes, most votes first.
+			doc_list = sorted(([doc_votes[a], doc_tie_breaking[a], a]
+				for a in range(len(doc_votes)) if doc_votes[a] > 0), reverse=True)
 			max_vote = doc_list[0][0]
-			doc_list = {self._labels_to_categories[auth[2]]:max_vote-auth[0]+auth[1]/(2*max([a[1] for a in doc_list])) for auth in doc_list}
+			max_tie_breaking = max([a[1] for a in doc_list])
+			doc_list = {self._labels_to_categories[auth[2]]:max_vote-auth[0]+
+				(auth[1]/(2*max_tie_breaking) if max_tie_breaking > 0 else 0) for auth in doc_list}
 			unknown_by_authors.append(doc_list)
 		return unknown_by_authors
\ No newline at end of file
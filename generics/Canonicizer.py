@@ -1,13 +1,17 @@
 from abc import ABC, abstractmethod
 import re
-from multiprocessing import Pool, cpu_count
-import c_cc_0
+from backend.WorkerPool import pool_map
+
+def _canonicizer_input(doc):
+	"""Text for the next canonicizer: the canonicized text so far, or the original text."""
+	return doc.canonicized if doc.canonicized is not None else doc.text
 
 # An abstract Canonicizer class.
 class Canonicizer(ABC):
 	_index = 0
 	_global_parameters = dict()
 	_default_multiprocessing = True
+	_pool = None # backend.WorkerPool shared by the experiment.
 
 	def __init__(self, **options):
 		try:
@@ -42,19 +46,28 @@ class Canonicizer(ABC):
 	def process(self, docs, pipe=None):
 		"""
 		process all docs at once, auto-call process_single.
+		Starts from the previous canonicizer's output if there is one.
 		"""
 		if self._default_multiprocessing:
 			if pipe is not None: pipe.send(True)
-			with Pool(cpu_count()-1) as p:
-				canon = p.map(self.process_single, [d.text for d in docs])
+			canon = pool_map(self.process_single, [_canonicizer_input(d) for d in docs], self._pool)
 			for d in range(len(canon)):
 				docs[d].canonicized = canon[d]
 		else:
 			for i, d in enumerate(docs):
 				if pipe is not None: pipe.send(100*i/len(docs))
-				d.canonicized = self.process_single(d.text)
+				d.canonicized = self.process_single(_canonicizer_input(d))
 		return
 
+	def get_process_single(self):
+		"""
+		Returns the function that process() applies to each text, so stages can be fused.
+		None if process() is overridden, i.e. it may need all documents at once.
+		"""
+		if type(self).process is not Canonicizer.process:
+			return None
+		return self.process_single
+
 
 	def process_single(self, text):
 		"""
@@ -84,6 +97,8 @@ class NormalizeWhitespace(Canonicizer):
 		return ' '.join(procText.split())
 
 	def process_single_C(self, text):
+		# the C extension is only imported for the "C++" implementation.
+		import c_cc_0
 		return c_cc_0.normalize_ws_process_single(text)
 
 	def after_init(self, **options):
@@ -92,16 +107,18 @@ class NormalizeWhitespace(Canonicizer):
 	def process(self, docs, pipe=None):
 		if self._default_multiprocessing:
 			if pipe is not None: pipe.send(True)
-			with Pool(cpu_count()-1) as p:
-				canon = p.map(self._ps[self.imp], [d.text for d in docs])
+			canon = pool_map(self._ps[self.imp], [_canonicizer_input(d) for d in docs], self._pool)
 			for d in range(len(canon)):
 				docs[d].canonicized = canon[d]
 		else:
 			for i, d in enumerate(docs):
 				if pipe is not None: pipe.send(100*i/len(docs))
-				d.canonicized = self._ps[self.imp](d.text)
+				d.canonicized = self._ps[self.imp](_canonicizer_input(d))
 		return
 
+	def get_process_single(self):
+		return self._ps[self.imp]
+
 	def displayName():
 		return "Normalize Whitespace"
 
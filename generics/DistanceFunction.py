@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-import dictances as distances
+# import dictances as distances # for the commented-out distance functions below.
 
 # An abstract DistanceFunction class.
 class DistanceFunction(ABC):
 	_global_parameters = dict()
+	# the distance only depends on the angle between vectors (e.g. cosine).
+	# Nearest-neighbour indexes then compare directions instead of positions.
+	_angular = False
 
 	def __init__(self, **options):
 		try:
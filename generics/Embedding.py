@@ -8,6 +8,7 @@ class Embedding(ABC):
 	"""
 	_global_parameters = dict()
 	_default_multiprocessing = False
+	_pool = None # backend.WorkerPool shared by the experiment.
 
 	def __init__(self, **options):
 		try:
@@ -45,6 +46,28 @@ class Embedding(ABC):
 		'''Input is event set, output is numbers'''
 		pass
 
+	def transform(self, docs, pipe_here=None):
+		'''
+		Embeds new docs like the docs of the last convert(), e.g. with the same features.
+		Used to attribute new docs with a trained pipeline.
+		For embedders without fitted state, this is the same as convert().
+		'''
+		return self.convert(docs, pipe_here)
+
+	def convert_counts(self, docs, counts, events, pipe_here=None):
+		'''
+		Embeds docs from their event counts instead of their event sets, for streaming experiments,
+		which discard the event sets once counted. counts: (docs x events) CSR array,
+		events: the event of each column (in no particular order).
+		'''
+		raise NotImplementedError
+
+	def get_convert_counts(self):
+		"""Returns convert_counts, or None if the embedder needs the docs' event sets."""
+		if type(self).convert_counts is Embedding.convert_counts:
+			return None
+		return self.convert_counts
+
 	def displayName():
 		'''Returns the display name for the given distance function.'''
 		pass
@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
 from importlib import import_module
-from multiprocessing import Pool, cpu_count
+from backend.WorkerPool import pool_map
 
 # An abstract Event Culling class.
 class EventCulling(ABC):
 
 	_global_parameters = dict()
 	_default_multiprocessing = True
+	_pool = None # backend.WorkerPool shared by the experiment.
 
 	def __init__(self, **options):
 		try:
@@ -42,8 +43,7 @@ class EventCulling(ABC):
 		"""Process all docs"""
 		if self._default_multiprocessing:
 			if pipe is not None: pipe.send(True)
-			with Pool(cpu_count()-1) as p:
-				events = p.map(self.process_single, [d.eventSet for d in docs])
+			events = pool_map(self.process_single, [d.eventSet for d in docs], self._pool)
 			for d in range(len(events)):
 				docs[d].setEventSet(events[d], append=False)
 		else:
@@ -54,6 +54,51 @@ class EventCulling(ABC):
 		return
 			
 		
+	def keep_events(self, docs, events):
+		"""
+		Removes the events not in events (an iterable) from the docs' event sets.
+		Documents with event IDs (backend.CompactDocument) are culled with NumPy.
+		"""
+		# imported here, like NumPy, only by the cullers that need them.
+		from backend.CompactDocument import uses_event_ids, keep_event_ids
+		if uses_event_ids(docs):
+			keep_event_ids(docs, events)
+			return
+		self._kept_events = set(events)
+		if self._default_multiprocessing:
+			new_events = pool_map(self._keep_single, [d.eventSet for d in docs], self._pool)
+		else:
+			new_events = [self._keep_single(d.eventSet) for d in docs]
+		for d, event_set in zip(docs, new_events):
+			d.setEventSet(event_set, append=False)
+
+	def _keep_single(self, eventSet):
+		return [e for e in eventSet if e in self._kept_events]
+
+	def event_frequencies(self, docs):
+		"""
+		Dense (docs x events) array of event counts, with the events in sorted order
+		(as sklearn's CountVectorizer), and the events.
+		"""
+		from backend.CompactDocument import uses_event_ids, count_event_ids
+		from backend.PrepareNumbers import VocabularyBuilder
+		if uses_event_ids(docs):
+			counts, events = count_event_ids(docs)
+		else:
+			builder = VocabularyBuilder().add_all(d.eventSet for d in docs)
+			counts, events = builder.to_csr(), builder.feature_names()
+		order = sorted(range(len(events)), key=events.__getitem__)
+		return counts[:, order].toarray(), [events[i] for i in order]
+
+	def get_process_single(self):
+		"""
+		Returns the function that process() applies to each event set, so stages can be fused.
+		None if process() is overridden, e.g. cullers that need statistics over all documents.
+		"""
+		if type(self).process is not EventCulling.process:
+			return None
+		return self.process_single
+
 	def process_single(self, eventSet):
 		"""Process a single document"""
 		raise NotImplementedError
@@ -1,11 +1,9 @@
 from abc import ABC, abstractmethod
-from nltk import ngrams
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk import WordNetLemmatizer
+from collections import Counter
 from json import load as json_load
 from pathlib import Path
 from importlib import import_module
-from multiprocessing import Pool, cpu_count
+from backend.WorkerPool import pool_map
 # import spacy
 
 language_codes = dict()
@@ -14,11 +12,25 @@ with open(Path("./resources/languages.json"), "r") as f:
 f.close()
 del f
 
+# NLTK takes seconds to import: it's imported when an event driver first uses it.
+def ngrams(sequence, n):
+	from nltk import ngrams as nltk_ngrams
+	return nltk_ngrams(sequence, n)
+
+def word_tokenize(text, language="english"):
+	from nltk.tokenize import word_tokenize as nltk_word_tokenize
+	return nltk_word_tokenize(text, language=language)
+
+def sent_tokenize(text, language="english"):
+	from nltk.tokenize import sent_tokenize as nltk_sent_tokenize
+	return nltk_sent_tokenize(text, language=language)
+
 # An abstract EventDriver class.
 class EventDriver(ABC):
 
 	_global_parameters = dict()
 	_default_multiprocessing = True
+	_pool = None # backend.WorkerPool shared by the experiment.
 
 	def __init__(self, **options):
 		try:
@@ -67,8 +79,7 @@ class EventDriver(ABC):
 		"""Sets the events for the documents for all docs. Calls createEventSet for each doc."""
 		if self._default_multiprocessing:
 			if pipe is not None: pipe.send(True)
-			with Pool(cpu_count()-1) as p:
-				events = p.map(self.process_single, [d.canonicized for d in docs])
+			events = pool_map(self.process_single, [d.canonicized for d in docs], self._pool)
 			for i in range(len(events)):
 				docs[i].setEventSet(events[i])
 		else:
@@ -78,6 +89,22 @@ class EventDriver(ABC):
 				d.setEventSet(event_set)
 		return
 	
+	def get_process_single(self):
+		"""
+		Returns the function that process() applies to each canonicized text, so stages can be fused.
+		None if process() is overridden, i.e. it may need all documents at once.
+		"""
+		if type(self).process is not EventDriver.process:
+			return None
+		return self.process_single
+
+	def count_single(self, procText):
+		"""
+		Counts of the events of a single document (dict of event: count), for streaming experiments.
+		Event drivers that can count events without listing them may override this.
+		"""
+		return Counter(self.process_single(procText))
+
 	def process_single(self, procText):
 		'''
 		Processes a single document.
@@ -96,12 +123,20 @@ class CharacterNGramEventDriver(EventDriver):
 		
 	def process_single(self, procText):
 		'''Returns a list containing the desired character n-grams.'''
-		nltkRawOutput = list(ngrams(procText, self.n)) # This gives us a list of tuples.
-		# Make the list of tuples in to a list of character fragments in the form of strings.
-		formattedOutput = [''.join(val) for val in nltkRawOutput]
+		# same n-grams as joining nltk.ngrams' tuples, without a tuple and a string per position.
+		# imported here, like NLTK, so that NumPy isn't imported at startup.
+		from backend.CharNGrams import char_ngrams
+		formattedOutput = char_ngrams(procText, self.n)
 		if len(formattedOutput) == 0:
-			raise ValueError("NLTK n-gram returned empty list. Check output of previous modules.")
+			raise ValueError("Character n-gram list is empty. Check output of previous modules.")
 		return formattedOutput
+
+	def count_single(self, procText):
+		from backend.CharNGrams import char_ngram_counts
+		counts = char_ngram_counts(procText, self.n)
+		if len(counts) == 0:
+			raise ValueError("Character n-gram list is empty. Check output of previous modules.")
+		return counts
 	
 	def displayName():
 		return "Character NGrams"
@@ -112,6 +147,47 @@ class CharacterNGramEventDriver(EventDriver):
 
 	def displayDescription(): # The text to display in PyGAAP GUI's description box.
 		return "Groups of N successive characters (sliding window); N is given as a parameter."
+
+
+class MultiCharacterNGramEventDriver(EventDriver):
+	'''Event Driver for character n-grams of several lengths, in one pass over the text.'''
+	n_min = 2
+	n_max = 5
+	_variable_options = {
+		"n_min": {"options": range(1, 21), "type": "Slider", "default": 1, "displayed_name": "Shortest n-gram (n min)"},
+		"n_max": {"options": range(1, 21), "type": "Slider", "default": 4, "displayed_name": "Longest n-gram (n max)"}
+	}
+
+	def process_single(self, procText):
+		'''Returns the character n-grams for each n from n_min to n_max, shortest first, tagged with their n.'''
+		from backend.CharNGrams import char_ngrams_by_order
+		eventSet = []
+		for ngrams in char_ngrams_by_order(procText, *sorted((self.n_min, self.n_max)), tag=True).values():
+			eventSet += ngrams
+		if len(eventSet) == 0:
+			raise ValueError("Character n-gram list is empty. Check output of previous modules.")
+		return eventSet
+
+	def count_single(self, procText):
+		from backend.CharNGrams import char_ngram_counts_by_order
+		counts = dict()
+		for order_counts in char_ngram_counts_by_order(procText, *sorted((self.n_min, self.n_max)), tag=True).values():
+			counts.update(order_counts)
+		if len(counts) == 0:
+			raise ValueError("Character n-gram list is empty. Check output of previous modules.")
+		return counts
+
+	def displayName():
+		return "Character NGrams (Multiple N)"
+
+	def setParams(self, params):
+		self.n_min = params[0]
+		self.n_max = params[1]
+
+	def displayDescription():
+		return "Groups of n successive characters (sliding window) for each n from n min to n max, " +\
+			"in one pass over the text: faster than a Character NGrams event driver per n.\n" +\
+			"Events are tagged with their n, e.g. \"ab_2\"."
 	
 		
 class WhitespaceDelimitedWordEventDriver(EventDriver):
@@ -299,8 +375,7 @@ class WordNGram(EventDriver):
 			self._lang_module = import_module("spacy.lang.%s" % lang.split(".")[0])
 			self._lang_module = getattr(self._lang_module, lang.split(".")[1])()
 			if self._default_multiprocessing:
-				with Pool(cpu_count()-1) as p:
-					events = p.map(self.spacy_single, docs)
+				events = pool_map(self.spacy_single, docs, self._pool)
 				for i in range(len(docs)):
 					docs[i].setEventSet(events[i])
 			else:
@@ -312,8 +387,7 @@ class WordNGram(EventDriver):
 			lang = self._global_parameters["language_code"].get(self._global_parameters["language"], "eng")
 			self._nltk_lang = language_codes.get(lang, "unk").get("nltk", "english")
 			if self._default_multiprocessing:
-				with Pool(cpu_count()-1) as p:
-					events = p.map(word_tokenize, [d.text for d in docs])
+				events = pool_map(word_tokenize, [d.text for d in docs], self._pool)
 				for i in range(len(docs)):
 					docs[i].setEventSet(events[i])
 			else:
@@ -1,12 +1,20 @@
 from generics.DistanceFunction import DistanceFunction
+from backend import PrepareNumbers as pn
 import numpy as np
 
+
+def _rows_per_block(n_known, memory_budget):
+	"""Number of unknown rows whose (rows x n_known) float64 block fits in memory_budget MB."""
+	return max(1, int(memory_budget * 2**20) // (8 * max(1, n_known)))
+
 class CosineDistance(DistanceFunction):
+	_angular = True
+
 	def distance(self, unknown, known:np.ndarray):
-		"""Compute distance using numpy"""
-		unknown_magnitude = np.sqrt(np.sum(np.square(unknown), axis=1, keepdims=1))
-		known_magnitude = np.sqrt(np.sum(np.square(known), axis=1, keepdims=1))
-		doc_by_author_distance = 1-np.divide(np.matmul(unknown, known.transpose()), np.matmul(unknown_magnitude, known_magnitude.transpose()))
+		"""Compute distance using numpy. Accepts dense or CSR inputs."""
+		unknown_magnitude = np.sqrt(pn.row_sums_of_squares(unknown))
+		known_magnitude = np.sqrt(pn.row_sums_of_squares(known))
+		doc_by_author_distance = 1-np.divide(pn.dense_dot(unknown, known), np.outer(unknown_magnitude, known_magnitude))
 		return doc_by_author_distance
 
 	def displayDescription():
@@ -17,13 +25,36 @@ class CosineDistance(DistanceFunction):
 
 
 class HistogramDistance(DistanceFunction):
+	memory_budget = 256
+	_variable_options = {
+		"memory_budget": {"options": [16, 64, 256, 1024, 4096], "type": "OptionMenu", "default": 2,
+			"displayed_name": "Memory budget (MB)"}
+	}
+
 	def distance(self, unknown, known:np.ndarray):
-		"""Compute distance using numpy"""
-		doc_by_author = np.sum(np.square(unknown[:,np.newaxis] - known), axis=2, keepdims=0)
+		"""
+		Compute squared Euclidean distance using numpy.
+		Uses ||a||^2 + ||b||^2 - 2ab over blocks of unknown rows so the
+		(unknown x known x features) difference tensor is never created.
+		Accepts dense or CSR inputs.
+		"""
+		unknown_sq = pn.row_sums_of_squares(unknown)
+		known_sq = pn.row_sums_of_squares(known)
+		doc_by_author = np.empty((unknown.shape[0], known.shape[0]))
+		block = _rows_per_block(known.shape[0], self.memory_budget)
+		for start in range(0, unknown.shape[0], block):
+			end = min(start + block, unknown.shape[0])
+			doc_by_author[start:end] = pn.dense_dot(unknown[start:end], known)
+			doc_by_author[start:end] *= -2
+			doc_by_author[start:end] += unknown_sq[start:end, np.newaxis]
+			doc_by_author[start:end] += known_sq
+		# rounding in the expansion can give tiny negatives for identical rows.
+		np.maximum(doc_by_author, 0, out=doc_by_author)
 		return doc_by_author
 
 	def displayDescription():
-		return "Computes Euclidean/Histogram distance"
+		return "Computes Euclidean/Histogram distance\n" +\
+			"Memory budget: approximate size of the working block used per batch of unknown documents."
 
 	def displayName():
 		return "Histogram Distance"
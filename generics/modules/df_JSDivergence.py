@@ -1,10 +1,13 @@
 from generics.DistanceFunction import DistanceFunction
 import numpy as np
+from scipy.sparse import csr_array, issparse
 
 
 class JSDistance(DistanceFunction):
 	def distance(self, unknown:np.ndarray, known:np.ndarray):
 		"""Compute distance using numpy"""
+		if issparse(unknown) or issparse(known):
+			return self._distance_sparse(unknown, known)
 		unknown_split = unknown[:,np.newaxis]
 		reference_distribution = (unknown_split + known) / 2
 		# references where for each unknown item there is a matrix
@@ -25,6 +28,30 @@ class JSDistance(DistanceFunction):
 		js = np.sqrt(kl_unknown_to_reference + kl_known_to_reference)/2
 		return js
 
+	def _distance_sparse(self, unknown, known):
+		"""
+		Same distance for CSR inputs, one unknown row at a time.
+		Where a known row is zero, the unknown's term is u * log2(2u/u) = u,
+		so only the non-zeros of the known matrix need to be visited:
+		sum(u) plus a correction at each known non-zero.
+		"""
+		known = csr_array(known)
+		known_rows = np.repeat(np.arange(known.shape[0]), np.diff(known.indptr))
+		k = known.data
+		js = np.empty((unknown.shape[0], known.shape[0]))
+		with np.errstate(divide="ignore", invalid="ignore"):
+			for i in range(unknown.shape[0]):
+				u_row = unknown[i:i+1]
+				u_row = u_row.toarray().ravel() if issparse(u_row) else np.asarray(u_row).ravel()
+				u = u_row[known.indices]
+				m = u + k
+				known_term = np.where(k > 0, k * np.log2(2 * k / m), 0)
+				unknown_correction = np.where(u > 0, u * np.log2(2 * u / m) - u, 0)
+				total = np.sum(u_row) + np.bincount(known_rows,
+					weights=known_term + unknown_correction, minlength=known.shape[0])
+				js[i] = np.sqrt(np.maximum(total, 0))/2
+		return js
+
 	def displayDescription():
 		return "Computes Jensen-Shannon distance, the square root of Jensen-Shannon divergence."
 
@@ -2,10 +2,28 @@
 Implementation of several Event Cullers found in JGAAP
 @Alejandro Napolitano Jawerbaum
 """
-from generics.module import EventCulling
-from multiprocessing import Pool, cpu_count
-from sklearn.feature_extraction.text import CountVectorizer
-import numpy, scipy, data, stats
+from generics.EventCulling import EventCulling
+from backend.CompactDocument import uses_event_ids
+import numpy, scipy
+
+
+def _events_by_count(docs, descending):
+	"""
+	Events of all docs sorted by their total number of occurrences.
+	Equal counts keep the order the events first appear in. Documents with event IDs are counted with NumPy.
+	"""
+	if uses_event_ids(docs):
+		ids = numpy.concatenate([d.event_ids for d in docs])
+		used, first, counts = numpy.unique(ids, return_index=True, return_counts=True)
+		order = numpy.lexsort((first, -counts if descending else counts))
+		events = docs[0].vocabulary.events
+		return [events[i] for i in used[order].tolist()]
+	totalEventSet = dict()
+	for d in docs:
+		#if d.author is None or d.author == "": continue
+		for e in d.eventSet:
+			totalEventSet[e] = totalEventSet.get(e, 0) + 1
+	return sorted(totalEventSet, key=lambda i: totalEventSet[i], reverse=descending)
 
 class MostCommonEvents(EventCulling):
 	_variable_options = {
@@ -13,28 +31,14 @@ class MostCommonEvents(EventCulling):
     }
 	numEvents = _variable_options["numEvents"]["options"][_variable_options["numEvents"]["default"]]
 	
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._sortedEventSet]
-
 	def preprocess(self, docs):
 		"""saves n most common events in self._sortedEventSet"""
-		totalEventSet = dict()
-		for d in docs:
-			#if d.author is None or d.author == "": continue
-			for e in d.eventSet:
-				totalEventSet[e] = totalEventSet.get(e, 0) + 1
-		self._sortedEventSet = sorted(
-			totalEventSet, key=lambda i: totalEventSet[i], reverse=1
-		)[:self.numEvents]
+		self._sortedEventSet = _events_by_count(docs, descending=True)[:self.numEvents]
 		return
 
 	def process(self, docs, pipe=None):
 		self.preprocess(docs)
-		with Pool(cpu_count()-1) as p:
-			new_events = p.map(self.process_single, docs)
-		for d_i, d in enumerate(docs):
-			# new_events = self.process_single(d.eventSet)
-			d.setEventSet(new_events[d_i], append=False)
+		self.keep_events(docs, self._sortedEventSet)
 		return
 
 	def displayName():
@@ -52,28 +56,14 @@ class LeastCommonEvents(EventCulling):
     }
 	numEvents = _variable_options["numEvents"]["options"][_variable_options["numEvents"]["default"]]
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._sortedEventSet]
-
 	def preprocess(self, docs):
-		"""saves n most common events in self._sortedEventSet"""
-		totalEventSet = dict()
-		for d in docs:
-			#if d.author is None or d.author == "": continue
-			for e in d.eventSet:
-				totalEventSet[e] = totalEventSet.get(e, 0) + 1
-		self._sortedEventSet = sorted(
-			totalEventSet, key=lambda i: totalEventSet[i], reverse=0
-		)[:self.numEvents]
+		"""saves n least common events in self._sortedEventSet"""
+		self._sortedEventSet = _events_by_count(docs, descending=False)[:self.numEvents]
 		return
 
 	def process(self, docs, pipe=None):
 		self.preprocess(docs)
-		with Pool(cpu_count()-1) as p:
-			new_events = p.map(self.process_single, docs)
-		for d_i, d in enumerate(docs):
-			# new_events = self.process_single(d.eventSet)
-			d.setEventSet(new_events[d_i], append=False)
+		self.keep_events(docs, self._sortedEventSet)
 		return
 
 	def displayName():
@@ -84,25 +74,25 @@ class LeastCommonEvents(EventCulling):
 
 class ExtremeCuller(EventCulling):
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self.extremeEvents]
-
 	def process(self, docs, pipe=None):
 		"""Process all docs"""
 
 		# get set of events common in all docs, including test set
-		self.extremeEvents = set(docs[0].eventSet)
-		for d in docs[1:]:
-			self.extremeEvents = self.extremeEvents.intersection(set(d.eventSet))
+		if uses_event_ids(docs):
+			common = docs[0].event_ids
+			for d in docs[1:]:
+				common = numpy.intersect1d(common, d.event_ids)
+			self.extremeEvents = {docs[0].vocabulary.events[i] for i in common.tolist()}
+		else:
+			self.extremeEvents = set(docs[0].eventSet)
+			for d in docs[1:]:
+				self.extremeEvents = self.extremeEvents.intersection(set(d.eventSet))
 		#print(self.extremeEvents)
 		if len(self.extremeEvents) == 0:
 			raise ValueError("No events to analyze because there is no single event common in all docs.")
 
 		# filter events. only leave those also in extremeEvents.
-		with Pool(cpu_count()-1) as p:
-			new_events = p.map(self.process_single, docs)
-		for d_i, d in enumerate(docs):
-			d.setEventSet(new_events[d_i], append=False)
+		self.keep_events(docs, self.extremeEvents)
 		return
 
 	def displayName():
@@ -126,17 +116,12 @@ class MeanAbsoluteDeviation(EventCulling):
 	def process(self, docs, pipe=None):
 		mads = dict()
 		# get 2D array of events, where D1 is documents; D2 is the feature vector. (auto-filled zeros)
-		cv = CountVectorizer(analyzer=lambda t:t)
-		event_frequencies = cv.fit_transform([d.eventSet for d in docs]).toarray()
-		event_names = cv.get_feature_names_out()
-		means = []
-		mad = []
-		for i in numpy.transpose(event_frequencies): #Iterate through the columns (so have to transpose) to find the mean of each event
-			mean = numpy.mean(i)
-			deviations = []
-			for j in i: #Find the deviation by taking |event.freq - mean|
-				deviations.append(abs(j-mean))
-			mad.append(numpy.mean(deviations))
+		event_frequencies, event_names = self.event_frequencies(docs)
+		# one row per event (contiguous, so the means are summed as for each column on its own).
+		event_rows = numpy.ascontiguousarray(numpy.transpose(event_frequencies))
+		means = numpy.mean(event_rows, axis=1)
+		#Find the deviation by taking |event.freq - mean|
+		mad = numpy.mean(numpy.abs(event_rows - means[:, numpy.newaxis]), axis=1)
 		#mads = numpy.mean(event_frequencies-numpy.mean(event_frequencies, axis=0), axis=0)
 		# mads: dict of event: MAD
 		
@@ -148,22 +133,9 @@ class MeanAbsoluteDeviation(EventCulling):
 			self._mads = list(mads.keys())[-self.numEvents:]
 		elif self.Informative == "least":
 			self._mads = list(mads.keys())[:self.numEvents]
-		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
-			for i, v in enumerate(new_event_sets):
-				docs[i].setEventSet(v, append=False)
-		else:
-			for d_i, d in enumerate(docs):
-				if pipe is not None: pipe.send(d_i/len(docs))
-				new_events = self.process_single(d)
-				d.setEventSet(new_events, append=False)
-				print(d.eventSet)
+		self.keep_events(docs, self._mads)
 		return
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._mads]
-
 	def displayName():
 		return "Mean Absolute Deviation"
 	def displayDescription():
@@ -183,9 +155,7 @@ class CoefficientOfVariation(EventCulling):
 	def process(self, docs, pipe=None):
 		covs = dict()
 		# get 2D array of events, where D1 is documents; D2 is the feature vector. (auto-filled zeros)
-		cv = CountVectorizer(analyzer=lambda t:t)
-		event_frequencies = cv.fit_transform([d.eventSet for d in docs]).toarray()
-		event_names = cv.get_feature_names_out()
+		event_frequencies, event_names = self.event_frequencies(docs)
 		covs = [numpy.std(i) / numpy.mean(i) for i in numpy.transpose(event_frequencies)]
 
 		# covs: dict of event: CoV
@@ -197,22 +167,9 @@ class CoefficientOfVariation(EventCulling):
 		elif self.Informative == "least":
 			self._covs = list(covs.keys())[:self.numEvents]
 		#print(self._covs)
-		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
-			for i, v in enumerate(new_event_sets):
-				docs[i].setEventSet(v, append=False)
-				#print(docs[i].eventSet)
-		else:
-			for d_i, d in enumerate(docs):
-				if pipe is not None: pipe.send(d_i/len(docs))
-				new_events = self.process_single(d)
-				d.setEventSet(new_events, append=False)
+		self.keep_events(docs, self._covs)
 		return
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._covs]
-
 	def displayName():
 		return "Coefficient of Variation"
 
@@ -234,9 +191,7 @@ class IndexOfDispersion(EventCulling):
 	def process(self, docs, pipe=None):
 		iods = dict()
 		# get 2D array of events, where D1 is documents; D2 is the feature vector. (auto-filled zeros)
-		cv = CountVectorizer(analyzer=lambda t:t)
-		event_frequencies = cv.fit_transform([d.eventSet for d in docs]).toarray()
-		event_names = cv.get_feature_names_out()
+		event_frequencies, event_names = self.event_frequencies(docs)
 		iod = [numpy.var(i)/numpy.mean(i) for i in numpy.transpose(event_frequencies)]
 
 		# iods: dict of event: IoD
@@ -248,22 +203,9 @@ class IndexOfDispersion(EventCulling):
 			self._iods = list(iods.keys())[-self.numEvents:]
 		elif self.Informative == "least":
 			self._iods = list(iods.keys())[:self.numEvents]
-		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
-			for i, v in enumerate(new_event_sets):
-				docs[i].setEventSet(v, append=False)
-		else:
-			for d_i, d in enumerate(docs):
-				if pipe is not None: pipe.send(d_i/len(docs))
-				new_events = self.process_single(d)
-				d.setEventSet(new_events, append=False)
-				print(d.eventSet)
+		self.keep_events(docs, self._iods)
 		return
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._iods]
-
 	def displayName():
 		return "Index of Dispersion"
 
@@ -283,12 +225,10 @@ class StandardDeviation(EventCulling):
 	def process(self, docs, pipe=None):
 		stds = dict()
 		# get 2D array of events, where D1 is documents; D2 is the feature vector. (auto-filled zeros)
-		cv = CountVectorizer(analyzer=lambda t:t)
-		event_frequencies = cv.fit_transform([d.eventSet for d in docs]).toarray()
-		event_names = cv.get_feature_names_out()
+		event_frequencies, event_names = self.event_frequencies(docs)
 		std = [numpy.std(i) for i in numpy.transpose(event_frequencies)]
 		# iods: dict of event: IoD
-		stds = {e:stds[i] for i, e in enumerate(event_names)}
+		stds = {e:std[i] for i, e in enumerate(event_names)}
 		# sort the dictionary
 		stds = {e:stds[e] for e in sorted(stds.keys(), key=lambda item:stds[item])}
 		# sort by IoD value.
@@ -296,21 +236,9 @@ class StandardDeviation(EventCulling):
 			self._stds = list(stds.keys())[-self.numEvents:]
 		elif self.Informative == "least":
 			self._stds = list(stds.keys())[:self.numEvents]
-		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
-			for i, v in enumerate(new_event_sets):
-				docs[i].setEventSet(v, append=False)
-		else:
-			for d_i, d in enumerate(docs):
-				if pipe is not None: pipe.send(d_i/len(docs))
-				new_events = self.process_single(d)
-				d.setEventSet(new_events, append=False)
+		self.keep_events(docs, self._stds)
 		return
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._stds]
-
 	def displayName():
 		return "Standard Deviation"
 
@@ -330,9 +258,7 @@ class RangeCuller(EventCulling):
 	def process(self, docs, pipe=None):
 		rang = dict()
 		# get 2D array of events, where D1 is documents; D2 is the feature vector. (auto-filled zeros)
-		cv = CountVectorizer(analyzer=lambda t:t)
-		event_frequencies = cv.fit_transform([d.eventSet for d in docs]).toarray()
-		event_names = cv.get_feature_names_out()
+		event_frequencies, event_names = self.event_frequencies(docs)
 		ran = [numpy.max(i) - numpy.min(i) for i in numpy.transpose(event_frequencies)]
 
 		# iods: dict of event: IoD
@@ -344,21 +270,9 @@ class RangeCuller(EventCulling):
 			self._rang = list(rang.keys())[-self.numEvents:]
 		elif self.Informative == "least":
 			self._rang = list(rang.keys())[:self.numEvents]
-		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
-			for i, v in enumerate(new_event_sets):
-				docs[i].setEventSet(v, append=False)
-		else:
-			for d_i, d in enumerate(docs):
-				if pipe is not None: pipe.send(d_i/len(docs))
-				new_events = self.process_single(d)
-				d.setEventSet(new_events, append=False)
+		self.keep_events(docs, self._rang)
 		return
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._rang]
-
 	def displayName():
 		return "Range Culler"
 
@@ -378,9 +292,7 @@ class Variance(EventCulling):
 	def process(self, docs, pipe=None):
 		var = dict()
 		# get 2D array of events, where D1 is documents; D2 is the feature vector. (auto-filled zeros)
-		cv = CountVectorizer(analyzer=lambda t:t)
-		event_frequencies = cv.fit_transform([d.eventSet for d in docs]).toarray()
-		event_names = cv.get_feature_names_out()
+		event_frequencies, event_names = self.event_frequencies(docs)
 		v = [numpy.var(i) for i in numpy.transpose(event_frequencies)]
 
 		# iods: dict of event: IoD
@@ -392,21 +304,9 @@ class Variance(EventCulling):
 			self._var = list(var.keys())[-self.numEvents:]
 		elif self.Informative == "least":
 			self._var = list(var.keys())[:self.numEvents]
-		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
-			for i, v in enumerate(new_event_sets):
-				docs[i].setEventSet(v, append=False)
-		else:
-			for d_i, d in enumerate(docs):
-				if pipe is not None: pipe.send(d_i/len(docs))
-				new_events = self.process_single(d)
-				d.setEventSet(new_events, append=False)
+		self.keep_events(docs, self._var)
 		return
 
-	def process_single(self, doc):
-		return [e for e in doc.eventSet if e in self._var]
-
 	def displayName():
 		return "Variance"
 
@@ -448,8 +348,7 @@ class WeightedVariance(EventCulling):
 			self._wvar = list(wvar.keys())[:self.numEvents]
 		print(self._wvar)
 		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
+			new_event_sets = pool_map(self.process_single, docs, self._pool)
 			for i, v in enumerate(new_event_sets):
 				docs[i].setEventSet(v, append=False)
 		else:
@@ -495,8 +394,7 @@ class InformationGain(EventCulling):
 			self._igs = list(igs.keys())[:self.numEvents]
 		print(self._igs)
 		if self._default_multiprocessing:
-			with Pool(cpu_count()-1) as pool:
-				new_event_sets = pool.map(self.process_single, docs)
+			new_event_sets = pool_map(self.process_single, docs, self._pool)
 			for i, v in enumerate(new_event_sets):
 				docs[i].setEventSet(v, append=False)
 		else:
@@ -1,9 +1,10 @@
 from generics.Embedding import Embedding
 # from backend.Histograms import generateAbsoluteHistogram as gh
-# from backend import PrepareNumbers as pn
+from backend import PrepareNumbers as pn
+from backend.CompactDocument import uses_event_ids, count_event_ids
 from multiprocessing import Pool, cpu_count
 import numpy as np
-from sklearn.feature_extraction.text import CountVectorizer
+from scipy.sparse import csr_array
 from copy import deepcopy
 
 # class Frequency(Embedding):
@@ -43,49 +44,92 @@ class Frequency(Embedding):
 	normalization = "Global max"
 	max_features = 0
 	binary = 0
+	sparse = 0
 	_default_multiprocessing = False
+	_vocabulary = None # event: column, of the last convert.
+	_global_max = None # largest count of the last convert.
 	_variable_options = {
 		"normalization": {"options": ["None", "Per-document token count", "Per-document max", "Global max"],
 		"type": "OptionMenu", "default": 1, "displayed_name": "Normalization"},
 		"max_features": {"options": range(0, 101), "type": "Slider", "default": 0, "displayed_name": "Max features"},
-		"binary": {"options": [0, 1], "type": "Tick", "default": 0, "displayed_name": "Binary"}
+		"binary": {"options": [0, 1], "type": "Tick", "default": 0, "displayed_name": "Binary"},
+		"sparse": {"options": [0, 1], "type": "Tick", "default": 0, "displayed_name": "Sparse (CSR)"}
 	}
 
 	def convert(self, docs, pipe=None):
 		"""Convert and assign to Documents.numbers"""
+		if uses_event_ids(docs):
+			return self.convert_counts(docs, *count_event_ids(docs), pipe)
 
-		mf = self.max_features if self.max_features > 0 else None
-		bi = True if self.binary else False
-		cv = CountVectorizer(lowercase=False, analyzer=lambda x:x, max_features=mf, binary=bi)
+		builder = pn.VocabularyBuilder().add_all(d.eventSet for d in docs)
+		return self.convert_counts(docs, builder.to_csr(), builder.feature_names(), pipe)
 
-		numbers = cv.fit_transform([d.eventSet for d in docs]).toarray()
+	def convert_counts(self, docs, counts, events, pipe=None):
+		"""Convert from a (docs x events) CSR array of counts and assign to Documents.numbers"""
+		# sorted columns, as in sklearn's CountVectorizer.
+		order = sorted(range(len(events)), key=events.__getitem__)
+		numbers, events = csr_array(counts[:, order]), [events[i] for i in order]
+		if self.binary:
+			numbers.data[:] = 1
+		if self.max_features > 0 and self.max_features < len(events):
+			# keep the most frequent events, still in sorted order.
+			keep = np.sort((-np.asarray(numbers.sum(axis=0)).ravel()).argsort()[:self.max_features])
+			numbers = csr_array(numbers[:, keep])
+			events = [events[i] for i in keep]
+		self._vocabulary = {event: column for column, event in enumerate(events)}
+		self._global_max = numbers.max()
+		return self._finish(docs, numbers)
+
+	def transform(self, docs, pipe=None):
+		"""Convert new docs with the events and global max of the last convert. Other events are ignored."""
+		numbers = pn.VocabularyBuilder(vocabulary=self._vocabulary, fixed=True)\
+			.add_all(d.eventSet for d in docs).to_csr()
+		if self.binary:
+			numbers.data[:] = 1
+		return self._finish(docs, numbers)
+
+	def _finish(self, docs, numbers):
+		"""Normalize the (docs x events) CSR counts and assign to Documents.numbers"""
+		if not self.sparse:
+			numbers = numbers.toarray()
 
 		if self.normalization == "None":
 			# equivalent to JGAAP's absolute centroid driver
 			pass
 		elif self.normalization == "Per-document max":
-			numbers = numbers / np.max(numbers, axis=1, keepdims=1)
+			if self.sparse:
+				numbers = pn.scale_rows(numbers, 1 / numbers.max(axis=1).toarray())
+			else:
+				numbers = numbers / np.max(numbers, axis=1, keepdims=1)
 		elif self.normalization == "Per-document token count":
 			# equivalent to JGAAP's centroid driver
-			numbers = numbers / np.sum(numbers, axis=1, keepdims=1)
+			if self.sparse:
+				numbers = pn.scale_rows(numbers, 1 / numbers.sum(axis=1))
+			else:
+				numbers = numbers / np.sum(numbers, axis=1, keepdims=1)
 		elif self.normalization == "Global max":
-			numbers = numbers / np.max(numbers)
+			numbers = numbers / self._global_max
 		# elif self.normalization == "Per-token max":
 		# 	numbers = numbers / np.max(numbers, axis=0, keepdims=1)
 
 		for d_index in range(len(docs)):
 			# distribute aggregate results to each doc obj
-			docs[d_index].numbers = numbers[d_index:d_index+1,:][0]
+			# sparse rows stay 2D (1 x features) CSR arrays.
+			if self.sparse:
+				docs[d_index].numbers = numbers[d_index:d_index+1,:]
+			else:
+				docs[d_index].numbers = numbers[d_index:d_index+1,:][0]
 		return numbers
 
 	def displayDescription():
 		return (
-			"Converts events to their frequencies, using sklearn's count vectorizer\n" +\
+			"Converts events to their frequencies\n" +\
 			"Normalization:\n\tNone: use raw token counts (with \"Centroid Driver\", equiv. to JGAAP's Absolute Centroid Driver)\n" +\
 			"\tPer-document token count: divide counts by total number of tokens in each doc (with \"Centroid Driver\", equiv. to JGAAP's Centroid Driver)\n" +\
 			"\tGlobal max: divide counts by the count of most-appeared token in a doc\n" +\
 			"Max features: only tally top n tokens by raw counts. If zero, tally all.\n"+\
-			"binary: use 0, 1 for token presence/absence instead of counting frequencies."
+			"binary: use 0, 1 for token presence/absence instead of counting frequencies.\n"+\
+			"Sparse (CSR): keep the feature matrix sparse. Recommended for large n-gram feature sets."
 		)
 
 	def displayName():
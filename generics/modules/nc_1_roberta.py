@@ -3,7 +3,7 @@ from backend.Histograms import generateAbsoluteHistogram as gh
 from backend import PrepareNumbers as pn
 import numpy as np
 from transformers import RobertaModel, RobertaTokenizer
-from multiprocessing import Pool, cpu_count
+from backend.WorkerPool import pool_map
 from torch.cuda import is_available as cuda_is_available
 from torch import tensor, long as long_int
 from gc import collect as collect_garbage
@@ -76,10 +76,8 @@ class Roberta(Embedding):
 		if self.convert_from == "canonicized text":
 			print("tokenizing from text")
 			text = [d.text for d in docs]
-			with Pool(cpu_count()-1) as p:
-				tokenized = p.map(self.tokenizer_pool, [d.text for d in docs]) #kwargs, padding="max_length"
+			tokenized = pool_map(self.tokenizer_pool, [d.text for d in docs], self._pool) #kwargs, padding="max_length"
 			# tokenized: [{"input_ids": ..., "attention_mask": ...}, {...}, ...]
-			del p
 			ids = [d["input_ids"] for d in tokenized]
 			mask = [d["attention_mask"] for d in tokenized]
 			del self._tokenizer; collect_garbage()
@@ -88,8 +86,7 @@ class Roberta(Embedding):
 			print("tokenizing from features")
 			# [{input_ids, mask}, {input_id, mask}, ...]
 			self._tokenizer_args["padding"] = "do_not_pad"
-			with Pool(cpu_count()-1) as p:
-				events = p.map(self.tokenizer_pool, [d.eventSet for d in docs])
+			events = pool_map(self.tokenizer_pool, [d.eventSet for d in docs], self._pool)
 			bos_id = events[0]["input_ids"][0][0]; eos_id = events[-1]["input_ids"][-1][-1]
 			bos_mask = events[0]["attention_mask"][0][0]; eos_mask = events[-1]["attention_mask"][-1][-1]
 			del self._tokenizer; collect_garbage()
@@ -0,0 +1,68 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from collections import Counter
+
+from nltk import ngrams
+
+from backend.CharNGrams import char_ngram_counts, char_ngram_counts_by_order, char_ngram_ids, char_ngrams, char_ngrams_by_order
+from backend.run_experiment import PreprocessingChain
+from generics.EventDriver import CharacterNGramEventDriver, MultiCharacterNGramEventDriver
+
+
+def nltk_char_ngrams(text, n):
+	return [''.join(val) for val in ngrams(text, n)]
+
+
+class char_ngrams_test(unittest.TestCase):
+
+	texts = ["", "a", "abab abab", "The quick brown fox jumps over the lazy dog.\n",
+		"Ünïcödé — 中文 text with \ud800 a lone surrogate. " * 3]
+
+	def test_same_as_nltk(self):
+		for text in self.texts:
+			# n = 10 and 20 take more than one word per key.
+			for n in [1, 2, 3, 9, 10, 20]:
+				self.assertEqual(char_ngrams(text, n), nltk_char_ngrams(text, n))
+				counts = char_ngram_counts(text, n)
+				self.assertEqual(counts, Counter(nltk_char_ngrams(text, n)))
+				self.assertEqual(list(counts), list(Counter(nltk_char_ngrams(text, n))))
+
+	def test_by_order(self):
+		for text in self.texts:
+			self.assertEqual(char_ngrams_by_order(text, 1, 12), {n: char_ngrams(text, n) for n in range(1, 13)})
+			self.assertEqual(char_ngram_counts_by_order(text, 3, 5), {n: char_ngram_counts(text, n) for n in range(3, 6)})
+		self.assertEqual(char_ngrams_by_order("abcd", 2, 3, tag=True), {2: ["ab_2", "bc_2", "cd_2"], 3: ["abc_3", "bcd_3"]})
+
+	def test_ids(self):
+		ids, ngrams = char_ngram_ids("abcab", 2)
+		self.assertEqual(ids.tolist(), [0, 1, 2, 0])
+		self.assertEqual(ngrams, ["ab", "bc", "ca"])
+
+	def test_event_driver(self):
+		event_driver = CharacterNGramEventDriver()
+		event_driver.n = 3
+		text = "abcabcab"
+		self.assertEqual(event_driver.process_single(text), nltk_char_ngrams(text, 3))
+		self.assertEqual(event_driver.count_single(text), Counter(nltk_char_ngrams(text, 3)))
+		with self.assertRaises(ValueError):
+			event_driver.process_single("ab")
+		chain = PreprocessingChain([str.lower], [event_driver.process_single], [],
+			event_counters=[event_driver.count_single])
+		self.assertEqual(chain.count("ABCabc"), Counter(chain("ABCabc")))
+
+	def test_multi_event_driver(self):
+		event_driver = MultiCharacterNGramEventDriver()
+		event_driver.n_min, event_driver.n_max = 2, 4
+		text = "abcabcab"
+		events = sum([[ngram + "_%d" % n for ngram in nltk_char_ngrams(text, n)] for n in [2, 3, 4]], [])
+		self.assertEqual(event_driver.process_single(text), events)
+		self.assertEqual(event_driver.count_single(text), Counter(events))
+		with self.assertRaises(ValueError):
+			event_driver.process_single("a")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import os
+from glob import glob
+
+from backend.CLI import makeAPI, parseExperimentRow, planBatch, runBatchParallel, runGroup
+
+
+def result_paths():
+	return set(glob(os.path.join(getcwd(), "tmp", "**"), recursive=True))
+
+
+def remove_new_results(before):
+	"""Removes the result files and directories that are not in before. Returns the text of each file, by path."""
+	new = result_paths() - before
+	files = dict()
+	for path in new:
+		if os.path.isfile(path):
+			with open(path) as result_file:
+				files[path] = result_file.read()
+			os.remove(path)
+	for path in sorted(new - set(files), key=len, reverse=True):
+		os.rmdir(path)
+	return files
+
+
+def results_by_name(files, prefix):
+	"""Results text of each experiment named prefix + <name>, by name. files: as from remove_new_results."""
+	results = dict()
+	for path, text in files.items():
+		name = os.path.basename(path)
+		if name.startswith(prefix):
+			# the file name ends with the time the results were written.
+			results[name[len(prefix):].rstrip("0123456789.txt")] = text
+	return results
+
+
+class cli_batch(unittest.TestCase):
+
+	def test_rows_sharing_pre_processing_are_grouped(self):
+		corpus_a = "resources/aaac/problemA/loadA.csv"
+		corpus_b = "resources/aaac/problemB/loadB.csv"
+		rows = [parseExperimentRow(exp) for exp in [
+			["e1", "Unify Case", "Character NGrams|n:3", "", "Frequency", "Centroid Driver", "Histogram Distance", corpus_a],
+			["e2", "", "Character NGrams", "", "Frequency", "Centroid Driver", "Histogram Distance", corpus_b],
+			["e3", "Unify Case", "Character NGrams|n:3", "", "Frequency", "K-Nearest Neighbors", "Cosine Distance", corpus_a],
+			["e4", "Unify Case", "Character NGrams|n:4", "", "Frequency", "Centroid Driver", "Histogram Distance", corpus_a],
+			["e5", "", "Character NGrams", "Centroid Driver", "Histogram Distance", corpus_b],
+		]]
+		batch = planBatch(rows)
+		self.assertEqual([[row["name"] for row in group] for group in batch], [["e1", "e3"], ["e2", "e5"], ["e4"]])
+
+	def test_jgaap_row(self):
+		row = parseExperimentRow(["e1", "", "Character NGrams", "Absolute Centroid Driver", "Histogram Distance",
+			"resources/aaac/problemA/loadA.csv"])
+		self.assertEqual(row["AnalysisMethods"], ["Centroid Driver"])
+		self.assertEqual(row["Embeddings"], ["Frequency|normalization:None"])
+		self.assertEqual(row["Canonicizers"], [])
+		self.assertTrue(row["cross_compatibility_note"])
+
+	def test_jobs_same_as_serial(self):
+		experiments = [
+			["e1_", "Unify Case", "Character NGrams|n:3", "", "Frequency", "Centroid Driver", "Histogram Distance", "resources/aaac/problemA/loadA.csv"],
+			["e2_", "", "Words (Whitespace-Delimited)", "", "Frequency", "K-Nearest Neighbors", "Cosine Distance", "resources/aaac/problemB/loadB.csv"],
+			["e3_", "Unify Case", "Character NGrams|n:3", "", "Frequency", "K-Nearest Neighbors", "Cosine Distance", "resources/aaac/problemA/loadA.csv"],
+		]
+		settings = {"workers": 1, "fused": True, "streaming": False, "compact_documents": False, "cache_dir": None, "cache_size": None}
+		before = result_paths()
+		try:
+			api = makeAPI(settings)
+			for group in planBatch([parseExperimentRow(["test_serial_" + exp[0]] + exp[1:]) for exp in experiments]):
+				runGroup(api, group)
+			runBatchParallel(planBatch([parseExperimentRow(["test_jobs_" + exp[0]] + exp[1:]) for exp in experiments]), settings, 2)
+		finally:
+			written = remove_new_results(before)
+		serial = results_by_name(written, "test_serial_")
+		self.assertEqual(sorted(serial), ["e1_", "e2_", "e3_"])
+		self.assertEqual(results_by_name(written, "test_jobs_"), serial)
+
+	def test_jobs_failure_is_raised(self):
+		experiments = [
+			["test_jobs_e1_", "", "Words (Whitespace-Delimited)", "", "Frequency", "Centroid Driver", "Histogram Distance", "resources/aaac/problemB/loadB.csv"],
+			["test_jobs_e2_", "", "No Such Event Driver", "", "Frequency", "Centroid Driver", "Histogram Distance", "resources/aaac/problemA/loadA.csv"],
+		]
+		settings = {"workers": 1, "fused": True, "streaming": False, "compact_documents": False, "cache_dir": None, "cache_size": None}
+		before = result_paths()
+		try:
+			with self.assertRaises(KeyError):
+				runBatchParallel(planBatch([parseExperimentRow(exp) for exp in experiments]), settings, 2)
+		finally:
+			written = remove_new_results(before)
+		# the group that didn't fail still ran.
+		self.assertEqual(list(results_by_name(written, "test_jobs_")), ["e1_"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import numpy as np
+
+from backend.API import API
+from backend.CompactDocument import CompactDocument, EventVocabulary, count_event_ids, keep_event_ids, uses_event_ids
+from backend.CSVIO import readCorpusCSV
+from backend.Document import Document
+from backend import run_experiment
+
+
+def run(document_class, culler="Most Common Events", **options):
+	api = API([])
+	api.default_mp = False
+	api.documents = [document_class(doc[0], doc[2], "", doc[1], **options)
+		for doc in readCorpusCSV("./resources/aaac/problemA/loadA.csv")]
+	api.modulesInUse = {mod_type: [] for mod_type in api.modulesInUse}
+	api.modulesInUse["Canonicizers"].append(api.canonicizers["Unify Case"]())
+	api.modulesInUse["EventDrivers"].append(api.eventDrivers["Character NGrams"]())
+	api.modulesInUse["EventDrivers"].append(api.eventDrivers["Words (Whitespace-Delimited)"]())
+	api.modulesInUse["EventCulling"].append(api.eventCulling[culler]())
+	api.modulesInUse["Embeddings"].append(api.embeddings["Frequency"]())
+	api.modulesInUse["AnalysisMethods"].append(api.analysisMethods["Centroid Driver"]())
+	api.modulesInUse["DistanceFunctions"].append(api.distanceFunctions["Cosine Distance"]())
+	return run_experiment.Experiment(api).run_experiment(skip_loading_docs=1, return_results=1), api.documents
+
+
+class compact_document(unittest.TestCase):
+
+	def test_events(self):
+		vocabulary = EventVocabulary()
+		a = CompactDocument("A", "a", "text", "a.txt", vocabulary=vocabulary, eventSet=["x", "y", "x"])
+		b = CompactDocument("A", "a", "text", "a.txt", vocabulary=vocabulary)
+		b.setEventSet(["y", "z"])
+		b.setEventSet(["x"])
+		self.assertEqual(a.eventSet, ["x", "y", "x"])
+		self.assertEqual(b.eventSet, ["y", "z", "x"])
+		self.assertEqual(a.event_ids.dtype, np.int32)
+		self.assertEqual(b.event_ids.tolist(), [1, 2, 0])
+		self.assertEqual(vocabulary.events, ["x", "y", "z"])
+		b.setEventSet([], append=False)
+		self.assertEqual(b.eventSet, [])
+		# equal only to itself, but the same document.
+		self.assertNotEqual(a, b)
+		self.assertEqual(a, a)
+		self.assertTrue(a.is_same_doc(b))
+		with self.assertRaises(AttributeError):
+			a.extra = 1
+
+	def test_same_results(self):
+		expected, _ = run(Document)
+		exp_return, docs = run(CompactDocument, vocabulary=EventVocabulary())
+		self.assertEqual(exp_return["status"], 0)
+		self.assertEqual(exp_return["results_text"], expected["results_text"])
+		self.assertIs(docs[0].vocabulary, docs[-1].vocabulary)
+
+	def test_event_ids(self):
+		vocabulary = EventVocabulary()
+		docs = [CompactDocument(eventSet=events, vocabulary=vocabulary)
+			for events in (["a", "b", "a"], ["c", "a"], ["b", "b", "d"])]
+		self.assertTrue(uses_event_ids(docs))
+		self.assertFalse(uses_event_ids(docs + [CompactDocument(eventSet=["a"])]))
+		self.assertFalse(uses_event_ids([Document(eventSet=["a"])]))
+		keep_event_ids(docs[1:], ["b", "a", "missing"])
+		counts, events = count_event_ids(docs)
+		self.assertEqual(events, ["a", "b"])
+		self.assertEqual(counts.toarray().tolist(), [[2, 1], [1, 0], [0, 2]])
+		self.assertEqual(docs[2].eventSet, ["b", "b"])
+
+	def test_cullers_on_event_ids(self):
+		for culler in ["Coefficient of Variation", "Mean Absolute Deviation", "Extreme Culler"]:
+			expected, _ = run(Document, culler)
+			exp_return, _ = run(CompactDocument, culler, vocabulary=EventVocabulary())
+			self.assertEqual(exp_return["results_text"], expected["results_text"], culler)
+
+
+if __name__ == "__main__":
+	unittest.main()
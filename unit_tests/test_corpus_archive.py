@@ -0,0 +1,55 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from backend.CorpusArchive import CorpusArchive, MEMBER_SEPARATOR, open_archive, pack_corpus
+from backend.CSVIO import readCorpusCSV, readDocument, readDocuments
+from backend.Document import Document
+
+CORPUS = "./resources/aaac/problemA/loadA.csv"
+
+
+class corpus_archive(unittest.TestCase):
+
+	def test_pack_and_read(self):
+		csv_rows = readCorpusCSV(CORPUS)
+		with TemporaryDirectory() as directory:
+			archive_path = pack_corpus(CORPUS, Path(directory, "A.pgca"))
+			self.assertEqual([p.name for p in Path(directory).iterdir()], ["A.pgca"])
+			rows = readCorpusCSV(archive_path)
+			self.assertEqual([[r[0], r[2]] for r in rows], [[r[0], r[2]] for r in csv_rows])
+			self.assertEqual([r[1].partition(MEMBER_SEPARATOR)[2] for r in rows], [r[1] for r in csv_rows])
+			self.assertEqual(readDocuments(r[1] for r in rows)[0], readDocuments(r[1] for r in csv_rows)[0])
+			doc = Document(rows[0][0], rows[0][2], "", rows[0][1])
+			self.assertEqual(doc.read_self(), Document(filepath=csv_rows[0][1]).read_self())
+			with CorpusArchive(archive_path) as archive:
+				self.assertEqual(len(archive), len(csv_rows))
+				self.assertEqual([d.text for d in archive.documents()],
+					[Document(filepath=r[1]).read_self() for r in csv_rows])
+			with self.assertRaises(FileNotFoundError):
+				readDocument(str(archive_path) + MEMBER_SEPARATOR + "missing.txt")
+
+	def test_reopened_when_changed(self):
+		with TemporaryDirectory() as directory:
+			corpus = Path(directory, "corpus.csv")
+			Path(directory, "a.txt").write_text("first")
+			corpus.write_text("A,%s,a\n" % Path(directory, "a.txt"))
+			archive_path = pack_corpus(corpus)
+			self.assertEqual(archive_path.suffix, ".pgca")
+			self.assertEqual(readDocument(readCorpusCSV(archive_path)[0][1]), "first")
+			self.assertIs(open_archive(archive_path), open_archive(archive_path))
+			Path(directory, "a.txt").write_text("second version")
+			pack_corpus(corpus)
+			self.assertEqual(readDocument(readCorpusCSV(archive_path)[0][1]), "second version")
+
+	def test_not_an_archive(self):
+		with self.assertRaises(ValueError):
+			CorpusArchive(CORPUS)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from backend import CSVIO
+from backend.CSVIO import readDocument, readDocuments
+
+
+class csvio(unittest.TestCase):
+
+	def test_encodings(self):
+		with TemporaryDirectory() as directory:
+			utf8 = Path(directory, "utf8.txt")
+			utf8.write_bytes("café — naïve\r\nline\rend".encode("utf-8"))
+			self.assertEqual(readDocument(utf8), "café — naïve\nline\nend")
+			# ISO-8859-15 only after the sample used to detect the encoding.
+			latin = Path(directory, "latin.txt")
+			latin.write_bytes(b"a" * CSVIO.ENCODING_SAMPLE_SIZE + "é€".encode("ISO-8859-15"))
+			self.assertEqual(readDocument(latin), "a" * CSVIO.ENCODING_SAMPLE_SIZE + "é€")
+			# a character cut off at the end of the sample.
+			cut = Path(directory, "cut.txt")
+			cut.write_bytes(b"a" * (CSVIO.ENCODING_SAMPLE_SIZE - 1) + "é".encode("utf-8"))
+			self.assertEqual(CSVIO.detectEncoding(cut.read_bytes()[:CSVIO.ENCODING_SAMPLE_SIZE], ["UTF-8", "ISO-8859-15"]), 0)
+			self.assertEqual(readDocument(cut), "a" * (CSVIO.ENCODING_SAMPLE_SIZE - 1) + "é")
+			self.assertEqual(readDocument(Path(directory, "utf8.txt")), utf8.read_text())
+
+	def test_read_documents(self):
+		with TemporaryDirectory() as directory:
+			paths = []
+			for i in range(20):
+				paths.append(Path(directory, "%d.txt" % i))
+				paths[-1].write_text("document %d\n" % i * (i + 1))
+			minimum = CSVIO.MMAP_MIN_SIZE
+			CSVIO.MMAP_MIN_SIZE = 100 # memory-map the larger ones.
+			try:
+				texts, n_bytes = readDocuments(paths, threads=4)
+			finally:
+				CSVIO.MMAP_MIN_SIZE = minimum
+			self.assertEqual(texts, [p.read_text() for p in paths])
+			self.assertEqual(n_bytes, sum(p.stat().st_size for p in paths))
+			Path(directory, "empty.txt").write_text("")
+			self.assertEqual(readDocuments([Path(directory, "empty.txt")]), ([""], 0))
+			with self.assertRaises(OSError) as error:
+				readDocuments(paths + [Path(directory, "missing.txt")])
+			self.assertEqual(Path(error.exception.filename).name, "missing.txt")
+
+
+if __name__ == "__main__":
+	unittest.main()
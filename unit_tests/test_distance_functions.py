@@ -0,0 +1,45 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from generics.modules.df_0 import HistogramDistance, CosineDistance
+from generics.modules.df_JSDivergence import JSDistance
+
+
+class distance_functions(unittest.TestCase):
+
+	def setUp(self):
+		rng = np.random.default_rng(0)
+		self.unknown = rng.random((9, 40))
+		self.known = rng.random((25, 40))
+		# mostly-zero frequencies for the sparse tests
+		self.unknown[self.unknown < 0.7] = 0
+		self.known[self.known < 0.7] = 0
+
+	def test_histogram_distance_matches_broadcast(self):
+		expected = np.sum(np.square(self.unknown[:,np.newaxis] - self.known), axis=2)
+		df = HistogramDistance()
+		self.assertTrue(np.allclose(df.distance(self.unknown, self.known), expected))
+
+	def test_histogram_distance_small_blocks(self):
+		# budget so small that every block holds a single unknown row.
+		df = HistogramDistance()
+		df.memory_budget = 0
+		expected = np.sum(np.square(self.unknown[:,np.newaxis] - self.known), axis=2)
+		self.assertTrue(np.allclose(df.distance(self.unknown, self.known), expected))
+		self.assertTrue((df.distance(self.known, self.known) >= 0).all())
+
+	def test_sparse_inputs_match_dense(self):
+		unknown_csr, known_csr = csr_array(self.unknown), csr_array(self.known)
+		for df in [HistogramDistance(), CosineDistance(), JSDistance()]:
+			expected = df.distance(self.unknown, self.known)
+			self.assertTrue(np.allclose(df.distance(unknown_csr, known_csr), expected), df.__class__.displayName())
+			self.assertTrue(np.allclose(df.distance(unknown_csr, self.known), expected), df.__class__.displayName())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import numpy as np
+from scipy.sparse import csr_array, issparse
+
+from backend.Document import Document
+from generics.modules.nc_0 import Frequency
+
+
+def make_docs():
+	event_sets = [["a", "b", "a", "c"], ["b", "b", "d"], ["c", "a", "e", "e", "e"]]
+	return [Document("a%d" % i, "t%d" % i, "", "", eventSet=events) for i, events in enumerate(event_sets)]
+
+
+class frequency_sparse(unittest.TestCase):
+
+	def convert(self, sparse, normalization, **options):
+		embedding = Frequency()
+		embedding.sparse = sparse
+		embedding.normalization = normalization
+		for option, value in options.items():
+			setattr(embedding, option, value)
+		docs = make_docs()
+		return embedding, docs, embedding.convert(docs)
+
+	def test_sparse_equals_dense(self):
+		for normalization in Frequency._variable_options["normalization"]["options"]:
+			for options in [{}, {"binary": 1}, {"max_features": 3}]:
+				with self.subTest(normalization=normalization, **options):
+					_, dense_docs, dense = self.convert(0, normalization, **options)
+					_, sparse_docs, sparse = self.convert(1, normalization, **options)
+					self.assertIsInstance(sparse, csr_array)
+					self.assertFalse(issparse(dense))
+					np.testing.assert_allclose(sparse.toarray(), dense)
+					for sparse_doc, dense_doc in zip(sparse_docs, dense_docs):
+						self.assertTrue(issparse(sparse_doc.numbers))
+						np.testing.assert_allclose(sparse_doc.numbers.toarray()[0], dense_doc.numbers)
+
+	def test_sparse_transform(self):
+		for normalization in Frequency._variable_options["normalization"]["options"]:
+			with self.subTest(normalization=normalization):
+				dense_embedding, _, _ = self.convert(0, normalization)
+				sparse_embedding, _, _ = self.convert(1, normalization)
+				new_docs = [Document("", "u", "", "", eventSet=["a", "e", "f", "e"])]
+				sparse = sparse_embedding.transform(new_docs)
+				self.assertIsInstance(sparse, csr_array)
+				np.testing.assert_allclose(sparse.toarray(), dense_embedding.transform(new_docs))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from backend.API import API
+from backend.CSVIO import readCorpusCSV
+from backend.Document import Document
+from backend import run_experiment
+from util.generate_random import generate_corpus
+
+
+class generate_random(unittest.TestCase):
+
+	def test_corpus_csv(self):
+		with TemporaryDirectory() as directory:
+			csv_path = generate_corpus(directory, 50, n_authors=4, unknown_fraction=0.3, files_per_directory=20, seed=1)
+			rows = readCorpusCSV(csv_path)
+			self.assertEqual(len(rows), 50)
+			self.assertEqual(len(list(Path(directory, "texts").iterdir())), 3)
+			for author, path, title in rows:
+				self.assertTrue(Path(path).read_text().strip())
+				if author == "":
+					self.assertRegex(title, r"^Correct: Author0[1-4]$")
+				else:
+					self.assertRegex(author, r"^Author0[1-4]$")
+			self.assertTrue(any(row[0] == "" for row in rows))
+			first_text = Path(rows[0][1]).read_text()
+			# same seed, same corpus.
+			generate_corpus(directory, 50, n_authors=4, unknown_fraction=0.3, files_per_directory=20, seed=1)
+			self.assertEqual(Path(rows[0][1]).read_text(), first_text)
+
+	def test_authors_distinguishable(self):
+		with TemporaryDirectory() as directory:
+			csv_path = generate_corpus(directory, 80, n_authors=4, mean_words=400, seed=2)
+			api = API([])
+			api.default_mp = False
+			api.documents = [Document(row[0], row[2], "", row[1]) for row in readCorpusCSV(csv_path)]
+			api.modulesInUse = {mod_type: [] for mod_type in api.modulesInUse}
+			api.modulesInUse["EventDrivers"].append(api.eventDrivers["Words (Whitespace-Delimited)"]())
+			api.modulesInUse["Embeddings"].append(api.embeddings["Frequency"]())
+			api.modulesInUse["AnalysisMethods"].append(api.analysisMethods["Centroid Driver"]())
+			api.modulesInUse["DistanceFunctions"].append(api.distanceFunctions["Cosine Distance"]())
+			exp_return = run_experiment.Experiment(api).run_experiment(skip_loading_docs=1, return_results=1)
+		unknown = [d for d in api.documents if d.author == ""]
+		results = exp_return["full_exp_dump"][0]["doc_results"]
+		correct = sum(1 for doc in unknown
+			if doc.title == "Correct: " + min(results[doc.filepath], key=results[doc.filepath].get))
+		self.assertGreater(correct / len(unknown), 0.8)
+
+
+if __name__ == "__main__":
+	unittest.main()
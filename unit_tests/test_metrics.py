@@ -0,0 +1,60 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from json import dumps
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from backend.API import API
+from backend.CSVIO import readCorpusCSV
+from backend.Document import Document
+from backend.Metrics import ExperimentMetrics, matrix_metrics
+from backend import run_experiment
+
+
+class metrics(unittest.TestCase):
+
+	def test_matrix_metrics(self):
+		dense = np.array([[0, 1, 2], [0, 0, 3]])
+		self.assertEqual(matrix_metrics(dense), {"shape": [2, 3], "nonzero": 3, "density": 0.5})
+		self.assertEqual(matrix_metrics(csr_array(dense)), matrix_metrics(dense))
+
+	def test_failed_stage_not_recorded(self):
+		m = ExperimentMetrics()
+		with m.stage("EventDrivers", "A", docs=[1, 2]) as record:
+			record["events"] = 10
+		with self.assertRaises(ValueError):
+			with m.stage("EventDrivers", "B"):
+				raise ValueError()
+		self.assertEqual([r["module"] for r in m.records], ["A"])
+		self.assertEqual(m.records[0]["documents"], 2)
+		self.assertIn("events_per_second", m.records[0])
+
+	def test_experiment_metrics(self):
+		api = API([])
+		api.default_mp = False
+		api.documents = [Document(doc[0], doc[2], "", doc[1])
+			for doc in readCorpusCSV("./resources/aaac/problemA/loadA.csv")]
+		api.modulesInUse = {mod_type: [] for mod_type in api.modulesInUse}
+		api.modulesInUse["EventDrivers"].append(api.eventDrivers["Words (Whitespace-Delimited)"]())
+		api.modulesInUse["Embeddings"].append(api.embeddings["Frequency"]())
+		api.modulesInUse["AnalysisMethods"].append(api.analysisMethods["Centroid Driver"]())
+		api.modulesInUse["DistanceFunctions"].append(api.distanceFunctions["Histogram Distance"]())
+		exp_return = run_experiment.Experiment(api).run_experiment(skip_loading_docs=1, return_results=1)
+		self.assertEqual(exp_return["status"], 0)
+		stages = [r["stage"] for r in exp_return["metrics"]]
+		self.assertEqual(stages, ["Reading documents", "EventDrivers", "Embeddings",
+			"AnalysisMethods: train", "AnalysisMethods: analyze"])
+		embedding = exp_return["metrics"][2]
+		self.assertEqual(embedding["feature_matrix"]["shape"][0], len(api.documents))
+		self.assertGreater(exp_return["metrics"][1]["events"], 0)
+		self.assertEqual(exp_return["full_exp_dump"][0]["metrics"], exp_return["metrics"])
+		# saved as JSON by the GUI.
+		dumps(exp_return["full_exp_dump"])
+
+
+if __name__ == "__main__":
+	unittest.main()
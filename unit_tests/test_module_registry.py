@@ -0,0 +1,69 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from backend.ModuleRegistry import discover, scan_file
+
+
+class module_registry(unittest.TestCase):
+
+	def test_discovers_without_importing(self):
+		registry = discover("./generics")
+		self.assertIn("Character NGrams", registry["EventDrivers"])
+		self.assertIn("Frequency", registry["Embeddings"])
+		# RoBERTa needs transformers and torch, which aren't needed to list it.
+		roberta = registry["Embeddings"]["RoBERTa"]
+		self.assertFalse(roberta.is_loaded())
+		self.assertIsInstance(roberta.displayDescription(), str)
+		self.assertEqual(roberta.module_name, "generics.modules.nc_1_roberta")
+
+	def test_create_module(self):
+		frequency = discover("./generics")["Embeddings"]["Frequency"]
+		self.assertEqual(frequency.normalization, "Global max")
+		self.assertEqual(frequency._variable_options["max_features"]["options"], range(0, 101))
+		module = frequency()
+		self.assertTrue(frequency.is_loaded())
+		self.assertEqual(module.__class__.displayName(), "Frequency")
+		self.assertIs(module.__class__, frequency.load())
+
+	def test_class_attribute(self):
+		svm = discover("./generics")["AnalysisMethods"]["Linear SVM (sklearn)"]
+		self.assertTrue(svm.class_attribute("_NoDistanceFunction_", False))
+		centroid = discover("./generics")["AnalysisMethods"]["Centroid Driver"]
+		self.assertFalse(centroid.class_attribute("_NoDistanceFunction_", False))
+
+	def test_scan_file(self):
+		with TemporaryDirectory() as directory:
+			path = Path(directory) / "fake.py"
+			path.write_text(
+				"from generics.Canonicizer import Canonicizer\n" +
+				"class Fake(Canonicizer):\n" +
+				"\tlevel = 2\n\tcheck = lambda x: x\n" +
+				"\t_variable_options = {'level': {'options': list(range(1, 4)), 'default': 1}}\n" +
+				"\tdef displayName():\n\t\treturn 'Fake'\n" +
+				"\tdef displayDescription():\n\t\t'''docstring'''\n\t\treturn 'A ' + 'fake.'\n" +
+				"class Helper:\n\tdef displayName():\n\t\treturn 'Helper'\n"
+			)
+			modules = scan_file(path, "fake")
+		self.assertEqual(len(modules), 1)
+		self.assertEqual(modules[0].module_type, "Canonicizers")
+		self.assertEqual(modules[0].displayDescription(), "A fake.")
+		self.assertEqual(modules[0].attributes["_variable_options"]["level"]["options"], [1, 2, 3])
+		self.assertEqual(modules[0].unread, {"check"})
+
+	def test_duplicate_display_names(self):
+		with TemporaryDirectory() as directory:
+			(Path(directory) / "modules").mkdir()
+			for name in ["a", "b"]:
+				(Path(directory) / "modules" / ("%s.py" % name)).write_text(
+					"class Cls_%s(EventDriver):\n\tdef displayName():\n\t\treturn 'Same'\n" % name)
+			with self.assertRaises(ValueError):
+				discover(directory)
+
+
+if __name__ == "__main__":
+	unittest.main()
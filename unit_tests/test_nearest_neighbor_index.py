@@ -0,0 +1,49 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from backend.Document import Document
+from backend.NearestNeighborIndex import RandomProjectionIndex
+from generics.AnalysisMethod import KNearestNeighbor
+from generics.modules.df_0 import HistogramDistance
+
+
+class nearest_neighbor_index(unittest.TestCase):
+
+	def setUp(self):
+		rng = np.random.default_rng(0)
+		# 10 well-separated clusters of 20 docs.
+		centers = rng.random((10, 30)) * 10
+		self.labels = np.repeat(np.arange(10), 20)
+		self.known = centers[self.labels] + rng.random((200, 30)) * 0.1
+		self.unknown = centers + rng.random((10, 30)) * 0.1
+
+	def test_candidates_contain_nearest(self):
+		index = RandomProjectionIndex(dimensions=16).fit(csr_array(self.known))
+		candidates = index.query(self.unknown, 20)
+		self.assertEqual(candidates.shape, (10, 20))
+		for row in range(10):
+			self.assertTrue((self.labels[candidates[row]] == row).all())
+		self.assertEqual(index.query(self.unknown, 500).shape, (10, 200))
+
+	def test_knn_with_index(self):
+		known_docs = [Document(author="a%d" % label) for label in self.labels]
+		results = []
+		for index in ["Exact", "Random projection"]:
+			knn = KNearestNeighbor()
+			knn.index = index
+			knn.setDistanceFunction(HistogramDistance())
+			knn.train(known_docs, self.known)
+			results.append(knn.analyze([Document()] * 10, self.unknown))
+		self.assertEqual([min(r, key=r.get) for r in results[1]], ["a%d" % i for i in range(10)])
+		for exact, approximate in zip(*results):
+			self.assertEqual(sorted(exact, key=exact.get), sorted(approximate, key=approximate.get))
+			self.assertTrue(np.allclose([exact[a] for a in exact], [approximate[a] for a in exact]))
+
+
+if __name__ == "__main__":
+	unittest.main()
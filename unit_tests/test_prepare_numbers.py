@@ -0,0 +1,84 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from backend import PrepareNumbers as pn
+from backend.Document import Document
+from generics.AnalysisMethod import CentroidDriver
+
+
+class prepare_numbers(unittest.TestCase):
+
+	def setUp(self):
+		rng = np.random.default_rng(0)
+		self.data = rng.random((60, 20))
+		self.data[self.data < 0.6] = 0
+		self.labels = rng.integers(0, 5, (60, 1))
+
+	def test_mean_per_author(self):
+		means, labels = pn.find_mean_per_author(self.data, self.labels)
+		for row, label in enumerate(labels[:,0]):
+			self.assertTrue(np.allclose(means[row], self.data[self.labels[:,0] == label].mean(axis=0)))
+		sparse_means, sparse_labels = pn.find_mean_per_author(csr_array(self.data), self.labels)
+		self.assertTrue(np.allclose(sparse_means, means))
+		self.assertTrue((sparse_labels == labels).all())
+
+	def test_update_mean_per_author(self):
+		means, labels = pn.find_mean_per_author(self.data, self.labels)
+		first = self.labels[:,0] != 4
+		partial = pn.find_mean_per_author(self.data[first], self.labels[first], return_counts=True)
+		updated_means, updated_labels, counts = pn.update_mean_per_author(*partial,
+			csr_array(self.data[~first]), self.labels[~first])
+		self.assertTrue(np.allclose(updated_means, means))
+		self.assertTrue((updated_labels == labels).all())
+		self.assertEqual(counts.sum(), 60)
+
+	def test_centroid_driver_partial_train(self):
+		docs = [Document(author="a%d" % label) for label in self.labels[:,0]]
+		full = CentroidDriver()
+		full.train(docs, self.data)
+		incremental = CentroidDriver()
+		incremental.train(docs[:30], self.data[:30])
+		incremental.partial_train(docs[30:], self.data[30:])
+		order = [list(incremental._labels_to_categories.values()).index(full._labels_to_categories[i])
+			for i in range(len(full._labels_to_categories))]
+		self.assertTrue(np.allclose(incremental._mean_per_author[order], full._mean_per_author))
+
+	def test_vocabulary_builder(self):
+		builder = pn.VocabularyBuilder()
+		builder.add(["b", "a", "b"]).add({"c": 2, "a": 1})
+		self.assertEqual(builder.feature_names(), ["b", "a", "c"])
+		self.assertTrue(np.array_equal(builder.to_csr().toarray(), [[2, 1, 0], [0, 1, 2]]))
+		# columns of earlier rows stay put; a fixed vocabulary drops unknown events.
+		fixed = pn.VocabularyBuilder(vocabulary=builder.vocabulary, fixed=True).add(["d", "c", "b"])
+		self.assertTrue(np.array_equal(fixed.to_csr().toarray(), [[1, 0, 1]]))
+		matrix, events = builder.to_sorted_csr()
+		self.assertEqual(events, ["a", "b", "c"])
+		self.assertTrue(np.array_equal(matrix.toarray(), [[1, 2, 0], [1, 0, 2]]))
+		self.assertTrue(np.array_equal(pn.dicts_to_array([{"a": 1, "b": 2}, {"a": 3, "c": 4}]), [[1, 2, 0], [3, 0, 4]]))
+
+	def test_feature_hashing(self):
+		hashed = pn.VocabularyBuilder(n_features=4).add(["a", "b", "a"]).add({"a": 2, "b": 1}).to_csr()
+		self.assertEqual(hashed.shape, (2, 4))
+		self.assertTrue(np.array_equal(hashed.toarray()[0], hashed.toarray()[1]))
+		self.assertEqual(hashed.sum(), 6)
+
+	def test_k_nearest_votes(self):
+		distances = np.array([[0.3, 0.1, 0.2, 0.2, 0.2, 0.9]])
+		labels = np.array([2, 0, 3, 1, 1, 0])
+		# ties at the k-th distance go to the lowest labels.
+		nearest, nearest_distances = pn.k_nearest(distances, labels, 3)
+		self.assertEqual(nearest.tolist(), [[1, 3, 4]])
+		self.assertEqual(nearest_distances.tolist(), [[0.1, 0.2, 0.2]])
+		votes, means, minimums = pn.k_nearest_votes(distances, labels, 4, 4)
+		self.assertEqual(votes.tolist(), [[1, 2, 0, 1]])
+		self.assertTrue(np.allclose(means[0, [0, 1, 3]], [0.1, 0.2, 0.2]))
+		self.assertEqual(minimums[0, 2], np.inf)
+
+
+if __name__ == "__main__":
+	unittest.main()
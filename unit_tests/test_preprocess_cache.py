@@ -0,0 +1,55 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from tempfile import TemporaryDirectory
+
+from backend.PreprocessCache import PreprocessCache
+from generics.Canonicizer import UnifyCase
+from generics.EventDriver import CharacterNGramEventDriver
+
+
+class preprocess_cache(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = TemporaryDirectory()
+		self.cache = PreprocessCache(self.directory.name)
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_round_trip(self):
+		key = self.cache.key("Some text", [UnifyCase()], [CharacterNGramEventDriver()])
+		self.assertIsNone(self.cache.get(key))
+		events = ["som", "ome", "me ", "som"]
+		self.cache.put(key, "some text", events)
+		self.assertEqual(self.cache.get(key), ("some text", events))
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+	def test_key_depends_on_text_and_parameters(self):
+		ed = CharacterNGramEventDriver()
+		key = self.cache.key("Some text", [UnifyCase()], [ed])
+		self.assertNotEqual(key, self.cache.key("Some text.", [UnifyCase()], [ed]))
+		self.assertNotEqual(key, self.cache.key("Some text", [], [ed]))
+		ed.n = ed.n + 1
+		self.assertNotEqual(key, self.cache.key("Some text", [UnifyCase()], [ed]))
+
+	def test_key_depends_on_language(self):
+		global_parameters = {"language": "English", "language_code": {"English": "eng", "French": "fra"}}
+		key = self.cache.key("Some text", [], [CharacterNGramEventDriver()], global_parameters)
+		self.cache.put(key, "Some text", ["Some", "text"])
+		french = dict(global_parameters, language="French")
+		french_key = self.cache.key("Some text", [], [CharacterNGramEventDriver()], french)
+		self.assertNotEqual(key, french_key)
+		self.assertIsNone(self.cache.get(french_key))
+
+	def test_eviction(self):
+		cache = PreprocessCache(self.directory.name, max_size=0)
+		key = cache.key("Some text", [], [])
+		cache.put(key, "Some text", ["Some", "text"])
+		self.assertIsNone(cache.get(key))
+
+
+if __name__ == "__main__":
+	unittest.main()
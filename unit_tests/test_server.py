@@ -0,0 +1,89 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import json
+from http.server import ThreadingHTTPServer
+from threading import Thread
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from backend.Server import AttributionBatcher, make_handler
+
+
+class LengthPipeline:
+	"""Stands in for a trained pipeline: scores authors by text length."""
+	def __init__(self):
+		self.batches = []
+
+	def attribute(self, texts):
+		self.batches.append(len(texts))
+		return [{"short": len(t), "long": 100 - len(t)} for t in texts]
+
+
+class FailingPipeline(LengthPipeline):
+	"""A LengthPipeline that fails on batches containing the text "bad"."""
+
+	def attribute(self, texts):
+		if "bad" in texts:
+			raise ValueError("Character n-gram list is empty.")
+		return super().attribute(texts)
+
+
+class server(unittest.TestCase):
+
+	def test_concurrent_requests_are_batched(self):
+		pipeline = LengthPipeline()
+		batcher = AttributionBatcher(pipeline, max_batch=64, max_wait=0.5)
+		results = [None] * 8
+		def request(i):
+			results[i] = batcher.attribute(["x" * i, "x" * 90])
+		threads = [Thread(target=request, args=(i,)) for i in range(8)]
+		for t in threads: t.start()
+		for t in threads: t.join()
+		self.assertEqual(sum(pipeline.batches), 16)
+		self.assertLess(len(pipeline.batches), 8)
+		for i in range(8):
+			self.assertEqual(results[i][0], [("short", i), ("long", 100 - i)])
+			self.assertEqual(results[i][1][0], ("long", 10))
+		stats = batcher.stats()
+		self.assertEqual((stats["requests"], stats["documents"]), (8, 16))
+
+	def test_failing_request_does_not_fail_its_batch(self):
+		pipeline = FailingPipeline()
+		batcher = AttributionBatcher(pipeline, max_batch=64, max_wait=0.5)
+		texts = ["x" * 10, "bad", "x" * 20, "x" * 30]
+		results, errors = [None] * 4, [None] * 4
+		def request(i):
+			try:
+				results[i] = batcher.attribute([texts[i]])
+			except ValueError as error:
+				errors[i] = error
+		threads = [Thread(target=request, args=(i,)) for i in range(4)]
+		for t in threads: t.start()
+		for t in threads: t.join()
+		self.assertIsNone(results[1])
+		self.assertIsInstance(errors[1], ValueError)
+		for i in [0, 2, 3]:
+			self.assertIsNone(errors[i])
+			self.assertEqual(results[i][0][0], ("short", len(texts[i])))
+		self.assertEqual(batcher.stats()["errors"], 1)
+
+	def test_texts_must_be_a_list(self):
+		server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(AttributionBatcher(LengthPipeline())))
+		Thread(target=server.serve_forever, daemon=True).start()
+		url = "http://127.0.0.1:%d/attribute" % server.server_address[1]
+		try:
+			with self.assertRaises(HTTPError) as context:
+				urlopen(url, json.dumps({"texts": "abc"}).encode("utf-8"))
+			self.assertEqual(context.exception.code, 400)
+			with urlopen(url, json.dumps({"texts": ["abc"]}).encode("utf-8")) as response:
+				self.assertEqual(len(json.loads(response.read())["results"]), 1)
+		finally:
+			server.shutdown()
+			server.server_close()
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import sleep
+
+from util import StartupProfiler
+from util.StartupProfiler import StartupProfiler as Profiler
+
+
+class startup_profiler(unittest.TestCase):
+
+	def test_imports_and_phases(self):
+		with TemporaryDirectory() as directory:
+			Path(directory, "profiled_outer.py").write_text("import time\ntime.sleep(0.02)\nimport profiled_inner\n")
+			Path(directory, "profiled_inner.py").write_text("import time\ntime.sleep(0.05)\n")
+			sys.path.insert(0, directory)
+			profiler = Profiler().start()
+			try:
+				with profiler.phase("outer phase"):
+					with profiler.phase("inner phase"):
+						import profiled_outer
+			finally:
+				profiler.stop()
+				sys.path.remove(directory)
+				sys.modules.pop("profiled_outer", None)
+				sys.modules.pop("profiled_inner", None)
+		imports = {name: (own, cumulative) for name, own, cumulative in profiler.imports}
+		self.assertGreaterEqual(imports["profiled_inner"][0], 0.05)
+		self.assertGreaterEqual(imports["profiled_outer"][1], 0.07)
+		self.assertLess(imports["profiled_outer"][0], imports["profiled_inner"][0])
+		self.assertEqual([name for name, _ in profiler.phases], ["outer phase > inner phase", "outer phase"])
+		report = profiler.report()
+		# slowest own time first.
+		self.assertLess(report.index("profiled_inner"), report.index("profiled_outer"))
+
+	def test_phase_without_profiling(self):
+		with StartupProfiler.phase("not recorded"):
+			sleep(0)
+		StartupProfiler.finish_profiling()
+
+	def test_finish_writes_report(self):
+		with TemporaryDirectory() as directory:
+			path = Path(directory, "profile.txt")
+			StartupProfiler.start_profiling(path)
+			with StartupProfiler.phase("a phase"):
+				pass
+			StartupProfiler.finish_profiling()
+			self.assertIn("a phase", path.read_text())
+		self.assertIsNone(StartupProfiler._profiler)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from backend.API import API
+from backend.CSVIO import readCorpusCSV
+from backend.Document import Document
+from backend import run_experiment
+
+
+def make_api(culler=None):
+	api = API([])
+	api.default_mp = False
+	api.documents = [Document(doc[0], doc[2], "", doc[1])
+		for doc in readCorpusCSV("./resources/aaac/problemA/loadA.csv")]
+	api.modulesInUse = {mod_type: [] for mod_type in api.modulesInUse}
+	api.modulesInUse["Canonicizers"].append(api.canonicizers["Unify Case"]())
+	api.modulesInUse["EventDrivers"].append(api.eventDrivers["Character NGrams"]())
+	if culler is not None:
+		api.modulesInUse["EventCulling"].append(api.eventCulling[culler]())
+	api.modulesInUse["Embeddings"].append(api.embeddings["Frequency"]())
+	api.modulesInUse["AnalysisMethods"].append(api.analysisMethods["Centroid Driver"]())
+	api.modulesInUse["DistanceFunctions"].append(api.distanceFunctions["Histogram Distance"]())
+	return api
+
+
+class streaming(unittest.TestCase):
+
+	def test_same_results(self):
+		expected = run_experiment.Experiment(make_api()).run_experiment(skip_loading_docs=1, return_results=1)
+		api = make_api()
+		experiment = run_experiment.Experiment(api, streaming=True)
+		exp_return = experiment.run_experiment(skip_loading_docs=1, return_results=1)
+		self.assertEqual(exp_return["status"], 0)
+		self.assertEqual(exp_return["results_text"], expected["results_text"])
+		self.assertEqual(exp_return["metrics"][0]["stage"], "Streaming pre-processing")
+		# only the counts are kept.
+		self.assertTrue(all(d.text == "" and d.eventSet == [] for d in api.documents))
+		counts, events = experiment.streamed_counts
+		self.assertEqual(counts.shape, (len(api.documents), len(events)))
+
+		# reusing the counts.
+		reused = run_experiment.Experiment(api, streaming=True).run_experiment(skip_loading_docs=1,
+			streamed_counts=experiment.streamed_counts, return_results=1)
+		self.assertEqual(reused["results_text"], expected["results_text"])
+		self.assertNotIn("Streaming pre-processing", [r["stage"] for r in reused["metrics"]])
+
+	def test_corpus_level_culler(self):
+		exp_return = run_experiment.Experiment(make_api("Most Common Events"), streaming=True)\
+			.run_experiment(skip_loading_docs=1, return_results=1)
+		self.assertEqual(exp_return["status"], 1)
+		self.assertIn("Most Common Events", exp_return["message"])
+
+
+if __name__ == "__main__":
+	unittest.main()
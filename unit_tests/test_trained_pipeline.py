@@ -0,0 +1,44 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd, path
+sys_path.append(getcwd())
+
+from tempfile import TemporaryDirectory
+
+from backend.Document import Document
+from backend.TrainedPipeline import TrainedPipeline
+from generics.AnalysisMethod import CentroidDriver
+from generics.Canonicizer import UnifyCase
+from generics.EventDriver import CharacterNGramEventDriver
+from generics.modules.df_0 import HistogramDistance
+from generics.modules.nc_0 import Frequency
+
+
+class trained_pipeline(unittest.TestCase):
+
+	def test_save_load_attribute(self):
+		known_docs = [Document("a", text="aaaa abab aaab"), Document("a", text="abaa aaaa"),
+			Document("b", text="xyzz zzyx xyxz"), Document("b", text="zzzz yxzy")]
+		unknown_texts = ["AAAB ABAA", "ZYXZ XXZZ", "aaaa zzzz abcd"]
+		event_driver = CharacterNGramEventDriver()
+		centroid = CentroidDriver()
+		centroid.setDistanceFunction(HistogramDistance())
+		pipeline = TrainedPipeline([UnifyCase()], [event_driver], [], Frequency(), centroid, centroid._distance)
+		for mod in pipeline._modules():
+			mod._default_multiprocessing = False
+
+		# train on the known docs as an experiment would.
+		pipeline.pre_process(known_docs)
+		centroid.train(known_docs, pipeline.embedding.convert(known_docs))
+		expected = pipeline.attribute(unknown_texts)
+		self.assertEqual([min(r, key=r.get) for r in expected[:2]], ["a", "b"])
+
+		with TemporaryDirectory() as directory:
+			pipeline.save(path.join(directory, "pipeline.pgp"))
+			loaded = TrainedPipeline.load(path.join(directory, "pipeline.pgp"))
+		self.assertEqual(loaded.attribute(unknown_texts), expected)
+		self.assertEqual(loaded.module_names()["Canonicizers"], ["Unify Case"])
+
+
+if __name__ == "__main__":
+	unittest.main()
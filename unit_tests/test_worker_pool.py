@@ -0,0 +1,37 @@
+import unittest
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+from pickle import dumps, loads
+
+from backend.WorkerPool import WorkerPool, pool_map
+
+
+class worker_pool(unittest.TestCase):
+
+	def test_map_keeps_order(self):
+		items = ["a" * i for i in range(50)]
+		with WorkerPool(2) as pool:
+			self.assertEqual(pool.map(len, items), list(range(50)))
+			# the same workers are reused by the next stage.
+			first_pool = pool._pool
+			self.assertEqual(pool.map(len, items, chunksize=1), list(range(50)))
+			self.assertIs(pool._pool, first_pool)
+
+	def test_single_worker_runs_in_process(self):
+		pool = WorkerPool(1)
+		self.assertEqual(pool.map(len, ["ab", "c"]), [2, 1])
+		self.assertIsNone(pool._pool)
+
+	def test_pickled_pool_is_serial(self):
+		with WorkerPool(2) as pool:
+			pool.map(len, ["ab", "c"])
+			copied = loads(dumps(pool))
+		self.assertEqual(copied.workers, 1)
+		self.assertIsNone(copied._pool)
+		self.assertEqual(pool_map(len, ["ab", "c"], copied), [2, 1])
+
+
+if __name__ == "__main__":
+	unittest.main()
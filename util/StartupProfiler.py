@@ -0,0 +1,139 @@
+"""
+Start-up profiling for the CLI and the GUI (PyGAAP.py --profile-startup).
+
+Records the time of each module import (own time, and with the imports it triggers)
+and of named phases, e.g. creating the API or building the GUI's widgets, from when
+profiling starts until finish_profiling(), and writes a report sorted by time.
+
+Phases are marked with ```with phase("name"):```, which does nothing unless profiling.
+"""
+
+import sys
+from contextlib import contextmanager, nullcontext
+from importlib.abc import MetaPathFinder
+from time import perf_counter
+
+DEFAULT_REPORT = "startup_profile.txt"
+
+_profiler = None # the active StartupProfiler, if profiling.
+
+
+class _ImportTimer(MetaPathFinder):
+	"""Finds modules with the other finders and times the execution of each module found."""
+
+	def __init__(self, profiler):
+		self.profiler = profiler
+
+	def find_spec(self, name, path=None, target=None):
+		for finder in sys.meta_path:
+			if finder is self or not hasattr(finder, "find_spec"): continue
+			spec = finder.find_spec(name, path, target)
+			if spec is not None: break
+		else:
+			return None
+		loader = spec.loader
+		# built-in and frozen modules are loaded by classes shared by all their modules: not timed.
+		if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+			return spec
+		exec_module = loader.exec_module
+		profiler = self.profiler
+		def timed_exec_module(module):
+			profiler._enter_import()
+			start = perf_counter()
+			try:
+				exec_module(module)
+			finally:
+				profiler._exit_import(name, perf_counter() - start)
+		try:
+			loader.exec_module = timed_exec_module
+		except AttributeError:
+			pass
+		return spec
+
+
+class StartupProfiler:
+
+	def __init__(self):
+		self.imports = [] # (module name, own seconds, cumulative seconds)
+		self.phases = [] # (phase name, with the phases it's part of, seconds)
+		self._child_import_time = [0.0]
+		self._phase_names = []
+		self._finder = _ImportTimer(self)
+		self._start = None
+		self.total = None
+
+	def start(self):
+		self._start = perf_counter()
+		sys.meta_path.insert(0, self._finder)
+		return self
+
+	def stop(self):
+		"""Stops recording. Returns the seconds since start()."""
+		if self._finder in sys.meta_path:
+			sys.meta_path.remove(self._finder)
+		if self.total is None:
+			self.total = perf_counter() - self._start
+		return self.total
+
+	def _enter_import(self):
+		self._child_import_time.append(0.0)
+
+	def _exit_import(self, name, seconds):
+		children = self._child_import_time.pop()
+		self._child_import_time[-1] += seconds
+		self.imports.append((name, seconds - children, seconds))
+
+	@contextmanager
+	def phase(self, name):
+		self._phase_names.append(name)
+		full_name = " > ".join(self._phase_names)
+		start = perf_counter()
+		try:
+			yield
+		finally:
+			self._phase_names.pop()
+			self.phases.append((full_name, perf_counter() - start))
+
+	def report(self, max_imports=None):
+		"""The phases and the imports as text, slowest first."""
+		total = self.total if self.total is not None else perf_counter() - self._start
+		imports = sorted(self.imports, key=lambda i: -i[1])
+		lines = ["PyGAAP start-up profile", "Total: %.4fs" % total, "",
+			"Phases (slowest first; \"a > b\": phase b, part of phase a):",
+			"%10s  %s" % ("seconds", "phase")]
+		lines += ["%10.4f  %s" % (seconds, name) for name, seconds in sorted(self.phases, key=lambda p: -p[1])]
+		lines += ["", "Imports: %d modules, %.4fs (slowest own time first)" %
+			(len(imports), sum(i[1] for i in imports)),
+			"%10s  %10s  %s" % ("own", "cumulative", "module")]
+		lines += ["%10.4f  %10.4f  %s" % (own, cumulative, name)
+			for name, own, cumulative in imports[:max_imports]]
+		return "\n".join(lines) + "\n"
+
+	def write(self, path):
+		with open(path, "w") as f:
+			f.write(self.report())
+
+
+def start_profiling(report_path=DEFAULT_REPORT):
+	"""Starts the start-up profiler. finish_profiling() writes the report to report_path."""
+	global _profiler
+	_profiler = StartupProfiler().start()
+	_profiler.report_path = report_path
+	return _profiler
+
+
+def finish_profiling():
+	"""Stops the start-up profiler, if profiling, and writes its report. Only the first call does anything."""
+	global _profiler
+	if _profiler is None: return
+	profiler, _profiler = _profiler, None
+	profiler.stop()
+	profiler.write(profiler.report_path)
+	print("Start-up profile (%.3fs) written to %s" % (profiler.total, profiler.report_path))
+
+
+def phase(name):
+	"""Context manager timing a start-up phase. Does nothing if not profiling."""
+	if _profiler is None:
+		return nullcontext()
+	return _profiler.phase(name)
@@ -1,6 +1,35 @@
-from backend.Document import Document
+"""
+Random documents and synthetic corpora for tests, benchmarks and scaling experiments.
+
+rand_docs makes documents with random event sets, for testing analysis methods.
+
+generate_corpus writes a corpus of author-styled random texts and a corpus CSV
+that backend.CSVIO.readCorpusCSV can read (author, file path, title; unknown
+documents have no author, and their title is "Correct: <author>", as in the AAAC problems).
+Words are drawn from a Zipf distribution over a made-up vocabulary. Each author
+rescales the word frequencies with random factors (how much: style_strength)
+and has their own mean sentence length and comma rate, so authors can be told
+apart by the usual features. Document lengths (in words) are log-normal.
+
+Run from the PyGAAP directory:
+    python util/generate_random.py <output directory> [--docs N] [--authors N] [--vocabulary N] ...
+"""
+
+import argparse
+from sys import path as sys_path
+from os import getcwd
+sys_path.append(getcwd())
+
+import csv
+from pathlib import Path
 from random import choice, randint
 
+import numpy as np
+
+from backend.Document import Document
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "de", "va", "shi", "bu", "ro", "ge", "fa",
+    "an", "el", "in", "or", "um", "th", "st", "qu", "ze", "wy"]
 
 
 def rand_docs(num_docs=100, num_authors=12, num_features=120):
@@ -16,3 +45,122 @@ def rand_docs(num_docs=100, num_authors=12, num_features=120):
 
     return large_doc_list
 
+
+def make_vocabulary(size, rng):
+    """size distinct made-up words. Earlier (more frequent) words are shorter."""
+    words = []
+    seen = set()
+    syllables = np.array(SYLLABLES)
+    while len(words) < size:
+        # 1 syllable for the first few words, up to 5 for the rarest.
+        n_syllables = 1 + min(4, int(np.log(len(words) + 2) / np.log(len(SYLLABLES)) * 2))
+        word = "".join(syllables[rng.integers(0, len(SYLLABLES), n_syllables)])
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+class AuthorStyle:
+    """An author's word distribution, mean sentence length and comma rate."""
+
+    def __init__(self, base_weights, style_strength, rng):
+        weights = base_weights * np.exp(style_strength * rng.standard_normal(len(base_weights)))
+        self.cumulative = np.cumsum(weights / weights.sum())
+        self.sentence_length = rng.uniform(8, 25)
+        self.comma_rate = rng.uniform(0.02, 0.12)
+
+    def word_ids(self, n_words, rng):
+        ids = np.searchsorted(self.cumulative, rng.random(n_words), side="right")
+        return np.minimum(ids, len(self.cumulative) - 1)
+
+
+class CorpusGenerator:
+    """Generates author-styled texts. See the module docstring."""
+
+    def __init__(self, n_authors=10, vocabulary_size=5000, zipf_exponent=1.1, style_strength=0.5, seed=0):
+        self.rng = np.random.default_rng(seed)
+        words = make_vocabulary(vocabulary_size, self.rng)
+        # each word in 6 forms: (lower case, capitalized) x (no punctuation, ",", ".").
+        self._forms = np.array([(w.capitalize() if capital else w) + punctuation
+            for w in words for capital in (0, 1) for punctuation in ("", ",", ".")])
+        base_weights = 1 / np.arange(1, vocabulary_size + 1) ** zipf_exponent
+        self.authors = ["Author%02d" % (i + 1) for i in range(n_authors)]
+        self.styles = [AuthorStyle(base_weights, style_strength, self.rng) for _ in range(n_authors)]
+
+    def text(self, author_index, n_words):
+        """A text of n_words words in the author's style."""
+        style = self.styles[author_index]
+        ids = style.word_ids(n_words, self.rng)
+        ends_sentence = self.rng.random(n_words) < 1 / style.sentence_length
+        ends_sentence[-1] = True
+        comma = ~ends_sentence & (self.rng.random(n_words) < style.comma_rate)
+        capital = np.empty(n_words, dtype=bool)
+        capital[0] = True
+        capital[1:] = ends_sentence[:-1]
+        forms = ids * 6 + capital * 3 + np.where(ends_sentence, 2, comma.astype(int))
+        return " ".join(self._forms[forms].tolist()) + "\n"
+
+    def lengths(self, n_docs, mean_words, length_sigma):
+        """Log-normal document lengths in words, with mean mean_words. At least one word."""
+        mu = np.log(mean_words) - length_sigma ** 2 / 2
+        return np.maximum(1, np.round(self.rng.lognormal(mu, length_sigma, n_docs))).astype(int)
+
+
+def generate_corpus(directory, n_docs=1000, n_authors=10, **options):
+    """
+    Writes n_docs texts under directory/texts/ and the corpus CSV directory/corpus.csv.
+    Returns the path of the CSV.
+    Options: ```vocabulary_size``` (5000), ```mean_words``` (500), ```length_sigma``` (0.5; 0 for equal lengths),
+    ```unknown_fraction``` (0.2), ```zipf_exponent``` (1.1), ```style_strength``` (0.5), ```seed``` (0),
+    ```files_per_directory``` (1000), ```verbose``` (False).
+    """
+    generator = CorpusGenerator(n_authors, options.get("vocabulary_size", 5000),
+        options.get("zipf_exponent", 1.1), options.get("style_strength", 0.5), options.get("seed", 0))
+    lengths = generator.lengths(n_docs, options.get("mean_words", 500), options.get("length_sigma", 0.5))
+    authors = generator.rng.integers(0, n_authors, n_docs)
+    unknown = generator.rng.random(n_docs) < options.get("unknown_fraction", 0.2)
+    files_per_directory = options.get("files_per_directory", 1000)
+    verbose = options.get("verbose", False)
+
+    directory = Path(directory)
+    csv_path = directory / "corpus.csv"
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(csv_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        for i in range(n_docs):
+            text_directory = directory / "texts" / ("%04d" % (i // files_per_directory))
+            if i % files_per_directory == 0:
+                text_directory.mkdir(parents=True, exist_ok=True)
+            path = text_directory / ("doc%07d.txt" % i)
+            path.write_text(generator.text(authors[i], lengths[i]))
+            author = generator.authors[authors[i]]
+            writer.writerow(["", str(path), "Correct: " + author] if unknown[i] else [author, str(path), ""])
+            if verbose and (i + 1) % 10000 == 0:
+                print("%d/%d documents" % (i + 1, n_docs))
+    return csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic corpus of author-styled random texts and its corpus CSV.")
+    parser.add_argument("directory", help="Output directory. The corpus CSV is <directory>/corpus.csv.")
+    parser.add_argument("--docs", type=int, default=1000, help="Number of documents. Default: 1000")
+    parser.add_argument("--authors", type=int, default=10, help="Number of authors. Default: 10")
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Vocabulary size. Default: 5000")
+    parser.add_argument("--mean-words", type=float, default=500, help="Mean document length in words. Default: 500")
+    parser.add_argument("--length-sigma", type=float, default=0.5,
+        help="Spread (sigma of the log-normal) of document lengths. 0: all the same length. Default: 0.5")
+    parser.add_argument("--unknown", type=float, default=0.2, help="Fraction of documents without an author. Default: 0.2")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of word frequencies. Default: 1.1")
+    parser.add_argument("--style", type=float, default=0.5,
+        help="How much authors' word frequencies differ (0: not at all). Default: 0.5")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    args = parser.parse_args()
+    csv_path = generate_corpus(args.directory, args.docs, args.authors, vocabulary_size=args.vocabulary,
+        mean_words=args.mean_words, length_sigma=args.length_sigma, unknown_fraction=args.unknown,
+        zipf_exponent=args.zipf, style_strength=args.style, seed=args.seed, verbose=True)
+    print("Wrote", csv_path)
+
+
+if __name__ == "__main__":
+    main()